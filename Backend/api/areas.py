@@ -0,0 +1,45 @@
+from typing import Callable, Optional
+from sqlalchemy import text
+
+# Relative difference between declared and geodesic area above which a row is flagged.
+# Must match the area_discrepancy generated columns in database/init.sql.
+AREA_DISCREPANCY_TOLERANCE = 0.1
+
+# Area on the WGS84 spheroid in hectares; must match compute_geodesic_area() in database/init.sql
+AREA_SQL = 'ST_Area(t.geometry::geography) / 10000'
+
+RECOMPUTE_BATCH_SIZE = 5000
+
+# Recompute one id range; rows whose stored value is already right are not rewritten,
+# so a re-run does not fire update triggers or flood the change feed
+RECOMPUTE_SQL = """
+    WITH batch AS (
+        SELECT id FROM {table} WHERE id > :after ORDER BY id LIMIT :limit
+    ), updated AS (
+        UPDATE {table} AS t SET geodesic_area_hectares = {area}
+        FROM batch
+        WHERE t.id = batch.id
+          AND t.geodesic_area_hectares IS DISTINCT FROM {area}
+        RETURNING t.id
+    )
+    SELECT (SELECT max(id) FROM batch) AS last_id, (SELECT count(*) FROM updated) AS updated
+"""
+
+def recompute_areas(session, model, batch_size: int = RECOMPUTE_BATCH_SIZE,
+                    progress: Optional[Callable[[int, int], None]] = None) -> int:
+    """Recompute geodesic_area_hectares for a whole table in id-ordered batches.
+
+    Each batch commits on its own, so locks stay short and an interrupted run can
+    simply be restarted. Returns the number of rows whose area changed.
+    """
+    sql = text(RECOMPUTE_SQL.format(table=model.__tablename__, area=AREA_SQL))
+    after, total = 0, 0
+    while True:
+        row = session.execute(sql, {'after': after, 'limit': batch_size}).one()
+        session.commit()
+        if row.last_id is None:
+            return total
+        after = row.last_id
+        total += row.updated
+        if progress:
+            progress(after, total)
@@ -1,35 +1,94 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from api.models import Asset, Claim, User, db
+from flask import Blueprint, Response, request, jsonify
+from flask_jwt_extended import jwt_required
+from api.models import Asset, Claim, db
+from api.pagination import get_page_size, keyset_paginate, apply_keyset, stream_json_response
+from api.spatial import spatial_filters, wants_geojson, parse_simplification
+from api.serialization import project, row_json, json_list_response
+from api.tiles import get_tile, invalidate_tiles, MVT_MIMETYPE
+from api.conditional import conditional, table_version_source
+from api.authz import current_principal, can_access
+from api.changes import fetch_changes, prune_changes, CursorExpired, CHANGE_LOG_RETENTION_DAYS
+from api.areas import recompute_areas, RECOMPUTE_BATCH_SIZE
 from geoalchemy2.shape import from_shape
 from shapely.geometry import shape
-import json
+from sqlalchemy.orm import joinedload
+from typing import List
+import click
 
 assets_bp = Blueprint('assets', __name__)
 
+def visible_assets(user):
+    """Asset query scoped to the user: admins see all, others only assets on their own claims"""
+    if user.role == 'admin':
+        return Asset.query
+    # Ownership is checked by a join in SQL rather than an IN list of the user's claim ids
+    return Asset.query.join(Claim, Claim.id == Asset.claim_id).filter(Claim.user_id == user.id)
+
+def classification_filters(args) -> List:
+    """Attribute filters for asset listing, evaluated in SQL"""
+    filters = []
+    if args.get('predicted_class'):
+        # Containment is answered by the jsonb_path_ops GIN index on classification_result
+        filters.append(Asset.classification_result.contains({'predicted_class': args['predicted_class']}))
+    try:
+        if args.get('min_confidence'):
+            filters.append(Asset.confidence_score >= float(args['min_confidence']))
+        if args.get('max_confidence'):
+            filters.append(Asset.confidence_score <= float(args['max_confidence']))
+    except ValueError:
+        raise ValueError('min_confidence and max_confidence must be numbers')
+    if args.get('asset_type'):
+        filters.append(Asset.asset_type == args['asset_type'])
+    for field in ('district', 'state'):
+        if args.get(field):
+            filters.append(Asset.claim.has(getattr(Claim, field) == args[field]))
+    return filters
+
+def load_asset(asset_id):
+    """Load an asset together with its claim's owner in a single query"""
+    return Asset.query.options(
+        joinedload(Asset.claim).load_only(Claim.id, Claim.user_id)
+    ).filter(Asset.id == asset_id).first()
+
 @assets_bp.route('/', methods=['GET'])
 @jwt_required()
+@conditional(table_version_source('assets', 'claims'))
 def get_assets():
-    """Get all assets for the current user's claims"""
+    """Get assets for the current user's claims, filtered by classification and area, keyset-paginated"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = current_principal()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        # Admin can see all assets, others see only their own
-        if user.role == 'admin':
-            assets = Asset.query.all()
-        else:
-            # Get user's claims first
-            user_claims = Claim.query.filter_by(user_id=user_id).all()
-            claim_ids = [claim.id for claim in user_claims]
-            assets = Asset.query.filter(Asset.claim_id.in_(claim_ids)).all()
-        
-        return jsonify({
-            'assets': [asset.to_dict() for asset in assets]
-        }), 200
+        query = visible_assets(user)
+        cursor = request.args.get('cursor')
+        geojson = wants_geojson(request.args)
+        
+        try:
+            # Viewport and proximity filters run as PostGIS predicates on the GIST index
+            query = query.filter(*spatial_filters(Asset.geometry, request.args))
+            query = query.filter(*classification_filters(request.args))
+            
+            # Fields and geometry are encoded to JSON in SQL; no ORM objects are built
+            level = parse_simplification(request.args)
+            query = project(query, Asset, request.args, level, as_feature=geojson)
+            
+            key = 'features' if geojson else 'assets'
+            members = {'type': 'FeatureCollection'} if geojson else {}
+            
+            # Streaming mode sends every row in chunks from a server-side cursor
+            if request.args.get('stream', '').lower() == 'true':
+                return stream_json_response(apply_keyset(query, Asset, cursor), key, row_json,
+                                            members=members)
+            
+            limit = get_page_size(request.args)
+            rows, next_cursor = keyset_paginate(query, Asset, cursor, limit)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        members.update({'next_cursor': next_cursor, 'has_more': next_cursor is not None})
+        return json_list_response(key, rows, members=members)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -39,7 +98,6 @@ def get_assets():
 def create_asset():
     """Create a new asset"""
     try:
-        user_id = get_jwt_identity()
         data = request.get_json()
         
         # Validate required fields
@@ -51,8 +109,11 @@ def create_asset():
         if not claim:
             return jsonify({'error': 'Claim not found'}), 404
         
-        user = User.query.get(user_id)
-        if user.role != 'admin' and claim.user_id != user_id:
+        user = current_principal()
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        if not can_access(user, claim.user_id):
             return jsonify({'error': 'Access denied'}), 403
         
         # Create asset
@@ -62,7 +123,7 @@ def create_asset():
             area_hectares=data.get('area_hectares'),
             description=data.get('description'),
             satellite_image_path=data.get('satellite_image_path'),
-            classification_result=json.dumps(data.get('classification_result', {})),
+            classification_result=data.get('classification_result', {}),
             confidence_score=data.get('confidence_score'),
             claim_id=data['claim_id']
         )
@@ -76,8 +137,11 @@ def create_asset():
                 return jsonify({'error': f'Invalid geometry: {str(e)}'}), 400
         
         db.session.add(asset)
+        new_geometry = asset.geometry
         db.session.commit()
         
+        invalidate_tiles('assets', new_geometry)
+        
         return jsonify({
             'message': 'Asset created successfully',
             'asset': asset.to_dict()
@@ -92,15 +156,17 @@ def create_asset():
 def get_asset(asset_id):
     """Get a specific asset"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = current_principal()
+        
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
         
-        asset = Asset.query.get(asset_id)
+        asset = load_asset(asset_id)
         if not asset:
             return jsonify({'error': 'Asset not found'}), 404
         
         # Check permissions
-        if user.role != 'admin' and asset.claim.user_id != user_id:
+        if not can_access(user, asset.claim.user_id):
             return jsonify({'error': 'Access denied'}), 403
         
         return jsonify({'asset': asset.to_dict()}), 200
@@ -113,18 +179,21 @@ def get_asset(asset_id):
 def update_asset(asset_id):
     """Update a specific asset"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = current_principal()
+        
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
         
-        asset = Asset.query.get(asset_id)
+        asset = load_asset(asset_id)
         if not asset:
             return jsonify({'error': 'Asset not found'}), 404
         
         # Check permissions
-        if user.role != 'admin' and asset.claim.user_id != user_id:
+        if not can_access(user, asset.claim.user_id):
             return jsonify({'error': 'Access denied'}), 403
         
         data = request.get_json()
+        old_geometry = asset.geometry
         
         # Update fields
         updatable_fields = [
@@ -134,10 +203,7 @@ def update_asset(asset_id):
         
         for field in updatable_fields:
             if field in data:
-                if field == 'classification_result':
-                    asset.classification_result = json.dumps(data[field])
-                else:
-                    setattr(asset, field, data[field])
+                setattr(asset, field, data[field])
         
         # Handle geometry update
         if 'geometry' in data:
@@ -147,8 +213,12 @@ def update_asset(asset_id):
             except Exception as e:
                 return jsonify({'error': f'Invalid geometry: {str(e)}'}), 400
         
+        new_geometry = asset.geometry
         db.session.commit()
         
+        # Tiles carry asset attributes too, so refresh both the old and new footprint
+        invalidate_tiles('assets', old_geometry, new_geometry)
+        
         return jsonify({
             'message': 'Asset updated successfully',
             'asset': asset.to_dict()
@@ -163,20 +233,25 @@ def update_asset(asset_id):
 def delete_asset(asset_id):
     """Delete a specific asset"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = current_principal()
         
-        asset = Asset.query.get(asset_id)
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        asset = load_asset(asset_id)
         if not asset:
             return jsonify({'error': 'Asset not found'}), 404
         
         # Check permissions
-        if user.role != 'admin' and asset.claim.user_id != user_id:
+        if not can_access(user, asset.claim.user_id):
             return jsonify({'error': 'Access denied'}), 403
         
+        old_geometry = asset.geometry
         db.session.delete(asset)
         db.session.commit()
         
+        invalidate_tiles('assets', old_geometry)
+        
         return jsonify({'message': 'Asset deleted successfully'}), 200
         
     except Exception as e:
@@ -185,26 +260,94 @@ def delete_asset(asset_id):
 
 @assets_bp.route('/by-claim/<int:claim_id>', methods=['GET'])
 @jwt_required()
+@conditional(table_version_source('assets', 'claims'))
 def get_assets_by_claim(claim_id):
     """Get all assets for a specific claim"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = current_principal()
+        
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
         
         claim = Claim.query.get(claim_id)
         if not claim:
             return jsonify({'error': 'Claim not found'}), 404
         
         # Check permissions
-        if user.role != 'admin' and claim.user_id != user_id:
+        if not can_access(user, claim.user_id):
             return jsonify({'error': 'Access denied'}), 403
         
-        assets = Asset.query.filter_by(claim_id=claim_id).all()
+        try:
+            rows = project(Asset.query.filter_by(claim_id=claim_id), Asset, request.args).all()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        return jsonify({
-            'claim_id': claim_id,
-            'assets': [asset.to_dict() for asset in assets]
-        }), 200
+        return json_list_response('assets', rows, members={'claim_id': claim_id})
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@assets_bp.route('/tiles/<int:z>/<int:x>/<int:y>.pbf', methods=['GET'])
+@jwt_required()
+def get_asset_tile(z, x, y):
+    """Get a Mapbox Vector Tile of assets"""
+    try:
+        user = current_principal()
+        
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        try:
+            tile = get_tile(db.session, 'assets', z, x, y, user)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return Response(tile, mimetype=MVT_MIMETYPE)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@assets_bp.route('/changes', methods=['GET'])
+@jwt_required()
+def get_asset_changes():
+    """Get inserts, updates and deletes of assets since a change-feed cursor"""
+    try:
+        user = current_principal()
+        
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        owner_id = None if user.role == 'admin' else user.id
+        query = visible_assets(user)
+        
+        try:
+            page = fetch_changes(db.session, Asset, query, request.args, owner_id)
+        except CursorExpired as e:
+            return jsonify({'error': str(e)}), 410
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return json_list_response('changes', page['items'], serializer=str, members={
+            'next_cursor': page['next_cursor'],
+            'has_more': page['has_more']
+        })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+@assets_bp.cli.command('recompute-areas')
+@click.option('--batch-size', default=RECOMPUTE_BATCH_SIZE, show_default=True, help='Rows updated per transaction')
+def recompute_asset_areas_command(batch_size):
+    """Recompute the stored geodesic area of every asset"""
+    updated = recompute_areas(db.session, Asset, batch_size,
+                              progress=lambda last_id, total: click.echo(f'up to id {last_id}: {total} updated'))
+    click.echo(f'Recomputed areas, {updated} assets changed')
+
+@assets_bp.cli.command('prune-changes')
+@click.option('--retention-days', default=CHANGE_LOG_RETENTION_DAYS, show_default=True,
+              help='Days of change feed to keep')
+def prune_asset_changes_command(retention_days):
+    """Delete asset change-feed entries older than the retention period (run daily, e.g. from cron)"""
+    deleted = prune_changes(db.session, Asset.__tablename__, retention_days,
+                            progress=lambda total: click.echo(f'{total} deleted'))
+    click.echo(f'Pruned {deleted} asset change-log entries')
@@ -1,10 +1,18 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from api.models import User, db
-from werkzeug.security import generate_password_hash
+from api.authz import token_claims, publish_auth_version
+from api.hashing import password_hasher, login_throttle, HashingBusy, TooManyAttempts
+from werkzeug.security import generate_password_hash, check_password_hash
 
 auth_bp = Blueprint('auth', __name__)
 
+def _retry_later(e, status: int):
+    """Error response with a Retry-After hint for throttled or busy authentication"""
+    response = jsonify({'error': str(e)})
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response, status
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     """Register a new user"""
@@ -28,13 +36,14 @@ def register():
             email=data['email'],
             role=data.get('role', 'user')
         )
-        user.set_password(data['password'])
+        # Hashing slots are limited so a spike fails fast instead of starving every worker
+        user.password_hash = password_hasher.run(generate_password_hash, data['password'])
         
         db.session.add(user)
         db.session.commit()
         
         # Create access token
-        access_token = create_access_token(identity=user.id)
+        access_token = create_access_token(identity=user.id, additional_claims=token_claims(user))
         
         return jsonify({
             'message': 'User registered successfully',
@@ -42,6 +51,9 @@ def register():
             'user': user.to_dict()
         }), 201
         
+    except HashingBusy as e:
+        db.session.rollback()
+        return _retry_later(e, 503)
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -55,12 +67,16 @@ def login():
         if not data or not data.get('username') or not data.get('password'):
             return jsonify({'error': 'Username and password are required'}), 400
         
+        login_throttle.hit(data['username'], request.remote_addr)
+        
         user = User.query.filter_by(username=data['username']).first()
         
-        if not user or not user.check_password(data['password']):
+        if not user or not password_hasher.run(check_password_hash, user.password_hash, data['password']):
             return jsonify({'error': 'Invalid credentials'}), 401
         
-        access_token = create_access_token(identity=user.id)
+        login_throttle.clear(data['username'], request.remote_addr)
+        
+        access_token = create_access_token(identity=user.id, additional_claims=token_claims(user))
         
         return jsonify({
             'message': 'Login successful',
@@ -68,6 +84,10 @@ def login():
             'user': user.to_dict()
         }), 200
         
+    except TooManyAttempts as e:
+        return _retry_later(e, 429)
+    except HashingBusy as e:
+        return _retry_later(e, 503)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -102,15 +122,27 @@ def update_profile():
         
         if 'email' in data:
             user.email = data['email']
+        role_changed = False
         if 'role' in data and user.role == 'admin':  # Only admin can change roles
+            role_changed = data['role'] != user.role
             user.role = data['role']
+            if role_changed:
+                user.auth_version = (user.auth_version or 0) + 1
         
         db.session.commit()
+        if role_changed:
+            publish_auth_version(user)
         
-        return jsonify({
+        response = {
             'message': 'Profile updated successfully',
             'user': user.to_dict()
-        }), 200
+        }
+        
+        if role_changed:
+            # Tokens issued before the change no longer match auth_version
+            response['access_token'] = create_access_token(identity=user.id, additional_claims=token_claims(user))
+        
+        return jsonify(response), 200
         
     except Exception as e:
         db.session.rollback()
@@ -0,0 +1,109 @@
+import os
+from collections import namedtuple
+from typing import Dict, Optional
+from flask import g
+from flask_jwt_extended import get_jwt, get_jwt_identity
+
+from api.models import User, db
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# What handlers need to authorize a request; tile scoping and imports only read id and role
+Principal = namedtuple('Principal', ['id', 'role'])
+
+# Seconds a cached auth version is trusted; bounds how long a role change or deletion
+# made directly in the database (not through the API) takes to apply
+AUTH_VERSION_TTL = int(os.getenv('AUTH_VERSION_TTL', 60))
+DELETED = 'deleted'
+
+class AuthVersionCache:
+    """Each user's current users.auth_version, shared by every worker through Redis.
+
+    The database column is authoritative and is bumped with every role change.
+    Fills use SET NX and changes a plain SET, so a worker that read the old
+    version just before a change commits cannot overwrite the new one.
+    """
+
+    def __init__(self, client, ttl: int = AUTH_VERSION_TTL):
+        self.client = client
+        self.ttl = ttl
+
+    def _key(self, user_id) -> str:
+        return f'auth:version:{user_id}'
+
+    def get(self, user_id) -> Optional[str]:
+        value = self.client.get(self._key(user_id))
+        return value.decode() if value is not None else None
+
+    def fill(self, user_id, version) -> None:
+        self.client.set(self._key(user_id), str(version), ex=self.ttl, nx=True)
+
+    def publish(self, user_id, version) -> None:
+        """Record a committed change so every worker stops trusting older tokens at once"""
+        self.client.set(self._key(user_id), str(version), ex=self.ttl)
+
+def create_auth_version_cache() -> Optional[AuthVersionCache]:
+    """Use Redis when REDIS_URL is configured; without it every request reads the users table"""
+    redis_url = os.getenv('REDIS_URL')
+    if redis_url and redis is not None:
+        return AuthVersionCache(redis.Redis.from_url(redis_url))
+    return None
+
+auth_versions = create_auth_version_cache()
+
+def token_claims(user) -> Dict[str, object]:
+    """Additional JWT claims; the role is trusted only while auth_version is current"""
+    return {'role': user.role, 'user_id': user.id, 'auth_version': user.auth_version or 0}
+
+def publish_auth_version(user) -> None:
+    """Tell every worker about a committed role change"""
+    if auth_versions is not None:
+        try:
+            auth_versions.publish(user.id, user.auth_version)
+        except redis.RedisError:
+            # Workers fall back on the cache TTL; the database already has the new version
+            pass
+
+def _token_principal(user_id, claims) -> Optional[Principal]:
+    """The principal from the token's claims if its auth_version is still current, else None"""
+    if auth_versions is None or 'auth_version' not in claims or 'role' not in claims:
+        return None
+    try:
+        current = auth_versions.get(user_id)
+    except redis.RedisError:
+        return None
+    if current is not None and current == str(claims['auth_version']):
+        return Principal(int(user_id), claims['role'])
+    return None
+
+def _load_principal(user_id) -> Optional[Principal]:
+    row = db.session.execute(
+        db.select(User.id, User.role, User.auth_version).where(User.id == user_id)
+    ).first()
+    if auth_versions is not None:
+        try:
+            auth_versions.fill(user_id, DELETED if row is None else row.auth_version or 0)
+        except redis.RedisError:
+            pass
+    return Principal(row.id, row.role) if row else None
+
+def current_principal() -> Optional[Principal]:
+    """The authenticated user's id and role, or None if the user no longer exists.
+
+    With Redis configured, the token's role is used without a database read as
+    long as its auth_version matches the user's current one; a stale token, a
+    cache miss or a Redis error falls back to reading the users table. Without
+    Redis the table is read on every request. Either way the result is kept for
+    the rest of the request.
+    """
+    if '_principal' not in g:
+        user_id = get_jwt_identity()
+        g._principal = _token_principal(user_id, get_jwt()) or _load_principal(user_id)
+    return g._principal
+
+def can_access(principal: Principal, owner_id) -> bool:
+    """Admins may access any record, other users only their own"""
+    return principal.role == 'admin' or owner_id == principal.id
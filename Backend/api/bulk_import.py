@@ -0,0 +1,434 @@
+import csv
+import io
+import json
+import math
+from typing import Any, Dict, IO, Iterator, List, Optional, Tuple
+import numpy as np
+import shapely
+from sqlalchemy import text
+
+from api.models import Claim, CLAIM_STATUSES, CLAIM_TYPES
+from api.claim_numbers import claim_number_allocator, format_claim_number, is_generated_format
+from api.tiles import invalidate_tiles
+
+CHUNK_SIZE = 5000
+REQUIRED_FIELDS = ['applicant_name', 'village', 'district', 'state', 'claim_type']
+TEXT_FIELDS = ['claim_number', 'applicant_name', 'applicant_address', 'village', 'district', 'state',
+               'claim_type', 'land_description']
+# Checked per line so one overlong value cannot fail the COPY of its whole chunk
+FIELD_LENGTHS = {
+    column.name: column.type.length
+    for column in Claim.__table__.columns
+    if column.name in TEXT_FIELDS and getattr(column.type, 'length', None)
+}
+POLYGON_TYPE_ID = 3
+
+STAGING_COLUMNS = [
+    'line_no', 'claim_number', 'applicant_name', 'applicant_address', 'village',
+    'district', 'state', 'claim_type', 'land_area', 'land_description',
+    'supporting_documents', 'status', 'geometry'
+]
+
+CREATE_STAGING_SQL = """
+    CREATE TEMP TABLE claims_import_staging (
+        line_no INTEGER NOT NULL,
+        id INTEGER,
+        claim_number VARCHAR(50),
+        applicant_name VARCHAR(100) NOT NULL,
+        applicant_address TEXT,
+        village VARCHAR(100),
+        district VARCHAR(100),
+        state VARCHAR(100),
+        claim_type VARCHAR(50),
+        land_area FLOAT,
+        land_description TEXT,
+        supporting_documents JSONB,
+        status VARCHAR(20),
+        geometry GEOMETRY(POLYGON, 4326)
+    ) ON COMMIT DROP
+"""
+
+# Claim ids come from the claims sequence up front so merged rows can be matched back to lines
+ASSIGN_IDS_SQL = """
+    UPDATE claims_import_staging
+    SET id = nextval(pg_get_serial_sequence('claims', 'id'))
+"""
+
+MERGE_SQL = """
+    INSERT INTO claims (
+        id, claim_number, applicant_name, applicant_address, village, district, state,
+        claim_type, land_area, land_description, supporting_documents, status, geometry,
+        user_id, created_at, updated_at
+    )
+    SELECT DISTINCT ON (claim_number)
+        id, claim_number, applicant_name, applicant_address, village, district, state,
+        claim_type, land_area, land_description, supporting_documents, status, geometry,
+        :user_id, now(), now()
+    FROM claims_import_staging
+    ORDER BY claim_number, line_no
+    ON CONFLICT (claim_number) DO NOTHING
+    RETURNING id
+"""
+
+STAGED_ROWS_SQL = "SELECT line_no, id, claim_number FROM claims_import_staging"
+
+def detect_format(filename: str, content_type: Optional[str] = None) -> str:
+    """Pick the import format from the file name or content type"""
+    name = (filename or '').lower()
+    content_type = (content_type or '').lower()
+    if name.endswith('.csv') or 'csv' in content_type:
+        return 'csv'
+    if name.endswith(('.geojsonl', '.geojsons', '.ndjson', '.jsonl')) or 'ndjson' in content_type:
+        return 'geojsonl'
+    if name.endswith(('.geojson', '.json')) or 'json' in content_type:
+        return 'geojson'
+    raise ValueError('Unsupported import format; use CSV, GeoJSON or line-delimited GeoJSON')
+
+def read_csv_rows(stream: IO[bytes]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (line number, row) pairs from a CSV upload without buffering the file"""
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    for row in reader:
+        yield reader.line_num, row
+
+def _feature_row(feature: Any) -> Dict[str, Any]:
+    if not isinstance(feature, dict):
+        raise ValueError('GeoJSON feature must be an object')
+    properties = feature.get('properties') or {}
+    if not isinstance(properties, dict):
+        raise ValueError('GeoJSON feature properties must be an object')
+    row = dict(properties)
+    row['geometry'] = feature.get('geometry')
+    return row
+
+def read_geojson_lines(stream: IO[bytes]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield features from line-delimited GeoJSON, one feature per line"""
+    for line_no, line in enumerate(io.TextIOWrapper(stream, encoding='utf-8-sig'), start=1):
+        line = line.strip().lstrip('\x1e')
+        if not line:
+            continue
+        try:
+            yield line_no, _feature_row(json.loads(line))
+        except ValueError as e:
+            message = 'Malformed GeoJSON feature' if isinstance(e, json.JSONDecodeError) else str(e)
+            yield line_no, {'_error': message}
+
+class _JsonReader:
+    """Decodes consecutive JSON values from a text stream, reading it one block at a time"""
+
+    BLOCK_SIZE = 1 << 16
+
+    def __init__(self, stream: IO[str]):
+        self.stream = stream
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> None:
+        block = self.stream.read(self.BLOCK_SIZE)
+        self.buffer = self.buffer[self.pos:] + block
+        self.pos = 0
+        self.eof = not block
+
+    def peek(self) -> str:
+        """Next non-whitespace character, or '' at the end of the stream"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer) or self.eof:
+                return self.buffer[self.pos:self.pos + 1]
+            self._fill()
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise ValueError(f"Malformed GeoJSON: expected '{char}'")
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode the next value, reading more of the stream until it is complete"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise ValueError('Malformed GeoJSON')
+                self._fill()
+                continue
+            # A number ending at the buffer edge may continue in the next block
+            if end == len(self.buffer) and not self.eof:
+                self._fill()
+                continue
+            self.pos = end
+            return value
+
+def read_geojson_features(stream: IO[bytes]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield features from a GeoJSON FeatureCollection, numbered by feature index.
+
+    The collection is decoded incrementally, one feature at a time. Members
+    before "features" are read up front, so a file that is not a
+    FeatureCollection raises ValueError before anything is imported.
+    """
+    reader = _JsonReader(io.TextIOWrapper(stream, encoding='utf-8-sig'))
+    reader.expect('{')
+    while True:
+        if reader.peek() == '}':
+            raise ValueError('GeoJSON FeatureCollection has no features array')
+        key = reader.value()
+        if not isinstance(key, str):
+            raise ValueError('Malformed GeoJSON: expected a member name')
+        reader.expect(':')
+        if key == 'features':
+            break
+        reader.value()
+        if reader.peek() != '}':
+            reader.expect(',')
+    reader.expect('[')
+    return _read_features(reader)
+
+def _read_features(reader: _JsonReader) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    if reader.peek() == ']':
+        return
+    index = 0
+    while True:
+        index += 1
+        try:
+            feature = reader.value()
+        except ValueError:
+            raise ValueError(f'Malformed GeoJSON at feature {index}')
+        try:
+            yield index, _feature_row(feature)
+        except ValueError as e:
+            yield index, {'_error': str(e)}
+        separator = reader.peek()
+        reader.pos += 1
+        if separator == ']':
+            return
+        if separator != ',':
+            raise ValueError(f'Malformed GeoJSON after feature {index}')
+
+READERS = {
+    'csv': read_csv_rows,
+    'geojsonl': read_geojson_lines,
+    'geojson': read_geojson_features
+}
+
+def validate_row(row: Dict[str, Any], allow_status: bool) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+    """Normalise one input row into staging values, collecting validation errors"""
+    if '_error' in row:
+        return None, [row['_error']]
+
+    errors = [f'{field} is required' for field in REQUIRED_FIELDS if not row.get(field)]
+
+    for field in TEXT_FIELDS:
+        value = row.get(field)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            row[field] = value = str(value)
+        if value is not None and not isinstance(value, str):
+            errors.append(f'{field} must be text')
+        elif value and field in FIELD_LENGTHS and len(value) > FIELD_LENGTHS[field]:
+            errors.append(f'{field} must be at most {FIELD_LENGTHS[field]} characters')
+
+    claim_number = row.get('claim_number')
+    if isinstance(claim_number, str) and claim_number and is_generated_format(claim_number):
+        errors.append(f'claim_number {claim_number} is reserved for generated numbers; leave it empty to allocate one')
+
+    if row.get('claim_type') and row['claim_type'] not in CLAIM_TYPES:
+        errors.append(f'claim_type must be one of {", ".join(CLAIM_TYPES)}')
+
+    land_area = row.get('land_area')
+    if land_area in (None, ''):
+        land_area = None
+    else:
+        try:
+            land_area = float(land_area)
+        except (TypeError, ValueError):
+            errors.append('land_area must be a number')
+        else:
+            if not math.isfinite(land_area):
+                errors.append('land_area must be a finite number')
+
+    documents = row.get('supporting_documents') or []
+    if isinstance(documents, str):
+        try:
+            documents = json.loads(documents)
+        except ValueError:
+            documents = None
+    if not isinstance(documents, list):
+        errors.append('supporting_documents must be a JSON array')
+
+    status = row.get('status') or 'pending'
+    if not allow_status:
+        status = 'pending'
+    elif status not in CLAIM_STATUSES:
+        errors.append(f'status must be one of {", ".join(CLAIM_STATUSES)}')
+
+    if errors:
+        return None, errors
+
+    return {
+        'claim_number': row.get('claim_number') or None,
+        'applicant_name': row['applicant_name'],
+        'applicant_address': row.get('applicant_address') or None,
+        'village': row['village'],
+        'district': row['district'],
+        'state': row['state'],
+        'claim_type': row['claim_type'],
+        'land_area': land_area,
+        'land_description': row.get('land_description') or None,
+        'supporting_documents': json.dumps(documents),
+        'status': status,
+        'geometry': row.get('geometry') or None
+    }, []
+
+def convert_geometries(raw: List[Any]) -> Tuple[np.ndarray, List[Optional[str]]]:
+    """Parse a chunk of WKT/GeoJSON geometries in one vectorized pass.
+
+    Returns the Shapely geometries and, per row, an error message or None.
+    Z and M coordinates are dropped, as the geometry column is 2D.
+    """
+    raw_text = np.array([
+        json.dumps(value) if isinstance(value, dict) else value
+        for value in raw
+    ], dtype=object)
+    is_geojson = np.array([isinstance(value, str) and value.lstrip().startswith('{') for value in raw_text])
+    is_wkt = np.array([isinstance(value, str) and not flag for value, flag in zip(raw_text, is_geojson)])
+
+    geometries = np.full(len(raw), None, dtype=object)
+    if is_wkt.any():
+        geometries[is_wkt] = shapely.from_wkt(raw_text[is_wkt], on_invalid='ignore')
+    if is_geojson.any():
+        geometries[is_geojson] = shapely.from_geojson(raw_text[is_geojson], on_invalid='ignore')
+    geometries = shapely.force_2d(geometries)
+
+    type_ids = shapely.get_type_id(geometries)
+    errors = []
+    for value, geometry, type_id in zip(raw_text, geometries, type_ids):
+        if value is None:
+            errors.append(None)
+        elif geometry is None:
+            errors.append('Invalid geometry')
+        elif type_id != POLYGON_TYPE_ID:
+            errors.append('geometry must be a Polygon')
+        else:
+            errors.append(None)
+    return geometries, errors
+
+class ClaimImporter:
+    """Bulk claim import: validate in chunks, COPY into a staging table, merge into claims"""
+
+    def __init__(self, session, user_id: int, allow_status: bool = False, chunk_size: int = CHUNK_SIZE):
+        self.session = session
+        self.user_id = user_id
+        self.allow_status = allow_status
+        self.chunk_size = chunk_size
+        self.accepted: List[Dict[str, Any]] = []
+        self.rejected: List[Dict[str, Any]] = []
+
+    def run(self, rows: Iterator[Tuple[int, Dict[str, Any]]]) -> Dict[str, Any]:
+        """Import all rows, committing one chunk at a time.
+
+        A ValueError from the reader (unreadable input) is re-raised after the
+        lines read before it have been imported.
+        """
+        chunk = []
+        rows = iter(rows)
+        while True:
+            try:
+                line_no, row = next(rows)
+            except StopIteration:
+                break
+            except ValueError:
+                if chunk:
+                    self._import_chunk(chunk)
+                raise
+            chunk.append((line_no, row))
+            if len(chunk) >= self.chunk_size:
+                self._import_chunk(chunk)
+                chunk = []
+        if chunk:
+            self._import_chunk(chunk)
+        return self.report()
+
+    def report(self) -> Dict[str, Any]:
+        """Accepted and rejected lines so far"""
+        self.accepted.sort(key=lambda entry: entry['line'])
+        self.rejected.sort(key=lambda entry: entry['line'])
+        return {
+            'accepted_count': len(self.accepted),
+            'rejected_count': len(self.rejected),
+            'accepted': self.accepted,
+            'rejected': self.rejected
+        }
+
+    def _reject(self, line_no: int, errors: List[str]) -> None:
+        self.rejected.append({'line': line_no, 'errors': errors})
+
+    def _import_chunk(self, chunk: List[Tuple[int, Dict[str, Any]]]) -> None:
+        staged = []
+        for line_no, row in chunk:
+            values, errors = validate_row(row, self.allow_status)
+            if errors:
+                self._reject(line_no, errors)
+            else:
+                staged.append((line_no, values))
+
+        if not staged:
+            return
+
+        geometries, geometry_errors = convert_geometries([values['geometry'] for _, values in staged])
+        geometry_hex = shapely.to_wkb(shapely.set_srid(geometries, 4326), hex=True, include_srid=True)
+
+        valid = []
+        for (line_no, values), geometry, wkb, error in zip(staged, geometries, geometry_hex, geometry_errors):
+            if error:
+                self._reject(line_no, [error])
+            else:
+                valid.append((line_no, values, geometry, wkb))
+
+        if not valid:
+            return
+
+        # Rows without a claim_number draw from the shared sequence in one round trip
+        unnumbered = [values for _, values, _, _ in valid if not values['claim_number']]
+        for values, number in zip(unnumbered, claim_number_allocator.take(self.session, len(unnumbered))):
+            values['claim_number'] = format_claim_number(number, values['state'], values['district'])
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        valid_geometries = {}
+        for line_no, values, geometry, wkb in valid:
+            valid_geometries[line_no] = geometry
+            writer.writerow([
+                line_no, values['claim_number'], values['applicant_name'], values['applicant_address'],
+                values['village'], values['district'], values['state'], values['claim_type'],
+                values['land_area'], values['land_description'], values['supporting_documents'],
+                values['status'], wkb
+            ])
+
+        buffer.seek(0)
+
+        try:
+            self.session.execute(text(CREATE_STAGING_SQL))
+            cursor = self.session.connection().connection.cursor()
+            cursor.copy_expert(
+                f"COPY claims_import_staging ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+            self.session.execute(text(ASSIGN_IDS_SQL))
+            inserted = {row[0] for row in self.session.execute(text(MERGE_SQL), {'user_id': self.user_id})}
+            staged_rows = self.session.execute(text(STAGED_ROWS_SQL)).fetchall()
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+        merged_geometries = []
+        for line_no, claim_id, claim_number in sorted(staged_rows):
+            if claim_id in inserted:
+                self.accepted.append({'line': line_no, 'claim_id': claim_id, 'claim_number': claim_number})
+                merged_geometries.append(valid_geometries[line_no])
+            else:
+                self._reject(line_no, [f'Duplicate claim_number {claim_number}'])
+
+        invalidate_tiles('claims', *merged_geometries)
@@ -0,0 +1,169 @@
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import text
+
+from api.serialization import project
+
+MAX_CHANGES = 1000
+
+# Days of change_log kept by the prune-changes commands; older cursors must resync
+CHANGE_LOG_RETENTION_DAYS = float(os.getenv('CHANGE_LOG_RETENTION_DAYS', 7))
+PRUNE_BATCH_SIZE = 5000
+
+# Only transactions older than the snapshot xmin are returned: they have all finished, so no
+# change can later appear behind the cursor. Changes within a transaction are ordered by id.
+# The xmin is the oldest transaction still running anywhere in the database, so one
+# long-running or idle-in-transaction session holds back the feed for every consumer
+# until it ends; idle_in_transaction_session_timeout bounds how long that can last.
+CHANGES_SQL_TEMPLATE = """
+    SELECT id, txid, row_id, operation
+    FROM change_log
+    WHERE table_name = :table_name
+      AND (txid, id) > (:txid, :id)
+      AND txid < txid_snapshot_xmin(txid_current_snapshot())
+      {owner_filter}
+    ORDER BY txid, id
+    LIMIT :limit
+"""
+
+CHANGES_SQL = text(CHANGES_SQL_TEMPLATE.format(owner_filter=''))
+OWNED_CHANGES_SQL = text(CHANGES_SQL_TEMPLATE.format(owner_filter='AND owner_id = :owner_id'))
+
+HORIZON_SQL = text("SELECT txid, change_id FROM change_log_horizon WHERE table_name = :table_name")
+
+# Newest finished change older than the cutoff; everything up to it is pruned
+PRUNE_HORIZON_SQL = text("""
+    SELECT txid, id
+    FROM change_log
+    WHERE table_name = :table_name
+      AND changed_at < :cutoff
+      AND txid < txid_snapshot_xmin(txid_current_snapshot())
+    ORDER BY txid DESC, id DESC
+    LIMIT 1
+""")
+
+SET_HORIZON_SQL = text("""
+    INSERT INTO change_log_horizon (table_name, txid, change_id)
+    VALUES (:table_name, :txid, :id)
+    ON CONFLICT (table_name) DO UPDATE
+    SET txid = EXCLUDED.txid, change_id = EXCLUDED.change_id
+    WHERE (change_log_horizon.txid, change_log_horizon.change_id) < (EXCLUDED.txid, EXCLUDED.change_id)
+""")
+
+PRUNE_SQL = text("""
+    DELETE FROM change_log
+    WHERE id IN (
+        SELECT id FROM change_log
+        WHERE table_name = :table_name AND (txid, id) <= (:txid, :id)
+        ORDER BY txid, id
+        LIMIT :limit
+    )
+""")
+
+class CursorExpired(Exception):
+    """The cursor points at changes that have been pruned; the client must resync"""
+
+    def __init__(self):
+        super().__init__('since cursor is older than the retained change log; reload the full list '
+                         'and continue from a fresh cursor')
+
+def encode_change_cursor(txid: int, change_id: int) -> str:
+    """Opaque, monotonic change-feed cursor"""
+    return f'{txid}-{change_id}'
+
+def decode_change_cursor(cursor: Optional[str]) -> Tuple[int, int]:
+    """Parse a since= cursor; an empty or 0 cursor starts from the beginning"""
+    if not cursor or cursor == '0':
+        return 0, 0
+    try:
+        txid, change_id = cursor.split('-')
+        return int(txid), int(change_id)
+    except ValueError:
+        raise ValueError('Invalid since cursor')
+
+def get_change_limit(args) -> int:
+    """Read limit= for a change-feed page, clamped to MAX_CHANGES"""
+    try:
+        limit = int(args.get('limit', MAX_CHANGES))
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    return max(1, min(limit, MAX_CHANGES))
+
+def fetch_changes(session, model, query, args, owner_id: Optional[int] = None) -> Dict[str, Any]:
+    """One page of the change feed for a table: upserts with current row data, tombstones for deletes.
+
+    query is the model query scoped to rows the caller may see, and owner_id
+    limits the log to that owner. Repeated changes to a row within the page
+    collapse into its latest state. A cursor behind the pruned part of the log
+    raises CursorExpired; since=0 starts at the oldest retained change.
+    """
+    txid, change_id = decode_change_cursor(args.get('since'))
+    limit = get_change_limit(args)
+
+    if (txid, change_id) != (0, 0):
+        horizon = session.execute(HORIZON_SQL, {'table_name': model.__tablename__}).first()
+        if horizon and (txid, change_id) < (horizon.txid, horizon.change_id):
+            raise CursorExpired()
+
+    params = {'table_name': model.__tablename__, 'txid': txid, 'id': change_id, 'limit': limit + 1}
+    if owner_id is None:
+        changes = session.execute(CHANGES_SQL, params).fetchall()
+    else:
+        changes = session.execute(OWNED_CHANGES_SQL, dict(params, owner_id=owner_id)).fetchall()
+
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    next_cursor = encode_change_cursor(changes[-1].txid, changes[-1].id) if changes else args.get('since') or '0'
+
+    # Latest position of each changed row, in feed order
+    latest = {}
+    for change in changes:
+        latest.pop(change.row_id, None)
+        latest[change.row_id] = change.operation
+
+    rows = {}
+    upsert_ids = [row_id for row_id, operation in latest.items() if operation != 'delete']
+    if upsert_ids:
+        query = project(query.filter(model.id.in_(upsert_ids)), model, args)
+        rows = {row.id: row.json for row in query}
+
+    items: List[str] = []
+    for row_id in latest:
+        # A row missing now was deleted or moved away after this change; its tombstone follows later
+        if row_id in rows:
+            items.append('{"op": "upsert", "id": %d, "data": %s}' % (row_id, rows[row_id]))
+        else:
+            items.append(json.dumps({'op': 'delete', 'id': row_id}))
+
+    return {
+        'items': items,
+        'next_cursor': next_cursor,
+        'has_more': has_more
+    }
+
+def prune_changes(session, table_name: str, retention_days: float = CHANGE_LOG_RETENTION_DAYS,
+                  batch_size: int = PRUNE_BATCH_SIZE, progress: Optional[Callable[[int], None]] = None) -> int:
+    """Delete a table's change_log rows older than the retention period, in committed batches.
+
+    The horizon is recorded first, so cursors into the pruned range fail with
+    CursorExpired instead of silently skipping changes. Returns the rows deleted.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    horizon = session.execute(PRUNE_HORIZON_SQL, {'table_name': table_name, 'cutoff': cutoff}).first()
+    if horizon is None:
+        return 0
+    params = {'table_name': table_name, 'txid': horizon.txid, 'id': horizon.id}
+    session.execute(SET_HORIZON_SQL, params)
+    session.commit()
+
+    total = 0
+    while True:
+        deleted = session.execute(PRUNE_SQL, dict(params, limit=batch_size)).rowcount
+        session.commit()
+        total += deleted
+        if progress and deleted:
+            progress(total)
+        if deleted < batch_size:
+            return total
@@ -0,0 +1,78 @@
+import os
+import re
+import threading
+from collections import deque
+from typing import List, Optional
+from sqlalchemy import text
+
+SEQUENCE_NAME = 'claim_number_seq'
+BLOCK_SIZE = int(os.getenv('CLAIM_NUMBER_BLOCK_SIZE', 50))
+
+# none -> FRA000123, state -> FRA-MAH-000123, district -> FRA-MAH-PUN-000123
+PREFIX_SCOPE = os.getenv('CLAIM_NUMBER_PREFIX_SCOPE', 'none')
+
+FETCH_SQL = text(f"SELECT nextval('{SEQUENCE_NAME}') FROM generate_series(1, :count)")
+
+def region_code(name: Optional[str]) -> str:
+    """Short upper-case code for a state or district name"""
+    code = re.sub(r'[^A-Za-z0-9]', '', name or '').upper()[:3]
+    return code or 'XXX'
+
+def format_claim_number(value: int, state: Optional[str] = None, district: Optional[str] = None,
+                        scope: str = PREFIX_SCOPE) -> str:
+    """Render a sequence value as a claim number with the configured regional prefix"""
+    if scope == 'district':
+        return f'FRA-{region_code(state)}-{region_code(district)}-{value:06d}'
+    if scope == 'state':
+        return f'FRA-{region_code(state)}-{value:06d}'
+    return f'FRA{value:06d}'
+
+# Every number format_claim_number can render, whatever the prefix scope
+GENERATED_PATTERN = re.compile(r'FRA(\d{6,}|(-[A-Z0-9]{1,3}){1,2}-\d{6,})', re.IGNORECASE)
+
+def is_generated_format(claim_number: str) -> bool:
+    """Whether a claim number lies in the sequence's namespace, where only the allocator may issue numbers.
+
+    Workers hold prefetched blocks of the sequence, so moving it with setval
+    cannot protect an imported number; such numbers are rejected instead.
+    """
+    return GENERATED_PATTERN.fullmatch(claim_number.strip()) is not None
+
+class ClaimNumberAllocator:
+    """Hands out claim numbers from blocks prefetched off a database sequence.
+
+    Uniqueness comes from the sequence alone, so concurrent workers never collide
+    and the regional prefix is purely informational. Numbers left in a block when
+    a worker exits are skipped, leaving harmless gaps.
+    """
+
+    def __init__(self, block_size: int = BLOCK_SIZE):
+        self.block_size = block_size
+        self._values = deque()
+        self._lock = threading.Lock()
+
+    def _refill(self, session, count: int) -> None:
+        rows = session.execute(FETCH_SQL, {'count': count})
+        self._values.extend(row[0] for row in rows)
+
+    def take(self, session, count: int) -> List[int]:
+        """Reserve count sequence values, fetching a fresh block when the current one runs out"""
+        with self._lock:
+            if len(self._values) < count:
+                self._refill(session, count - len(self._values) + self.block_size)
+            return [self._values.popleft() for _ in range(count)]
+
+    def allocate(self, session, state: Optional[str] = None, district: Optional[str] = None) -> str:
+        """Allocate one claim number"""
+        return format_claim_number(self.take(session, 1)[0], state, district)
+
+    def reset(self) -> None:
+        """Forget prefetched values, e.g. in a freshly forked worker"""
+        self._values = deque()
+        self._lock = threading.Lock()
+
+claim_number_allocator = ClaimNumberAllocator()
+
+# A block prefetched before gunicorn forks must not be shared between workers
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=claim_number_allocator.reset)
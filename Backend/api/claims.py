@@ -1,32 +1,71 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from api.models import Claim, User, db
+from api.models import Claim, User, CLAIM_STATUSES, db
+from api.pagination import get_page_size, keyset_paginate, apply_keyset, stream_json_response
+from api.spatial import spatial_filters, wants_geojson, parse_simplification
+from api.serialization import project, row_json, json_list_response
+from api.tiles import get_tile, invalidate_tiles, MVT_MIMETYPE
+from api.bulk_import import ClaimImporter, READERS, CHUNK_SIZE, detect_format
+from api.claim_numbers import claim_number_allocator
+from api.conditional import conditional, table_version_source
+from api.authz import current_principal, can_access
+from api.changes import fetch_changes, prune_changes, CursorExpired, CHANGE_LOG_RETENTION_DAYS
+from api.search import parse_query, search_conditions, search_rank
+from api.areas import recompute_areas, RECOMPUTE_BATCH_SIZE
 from geoalchemy2.shape import from_shape
-from shapely.geometry import shape
-import json
+from shapely.geometry import box, shape
+from sqlalchemy import func, update
+import click
 
 claims_bp = Blueprint('claims', __name__)
 
+MAX_SEARCH_RESULTS = 100
+MAX_BATCH_SIZE = 10000
+BATCH_FILTER_FIELDS = ['state', 'district', 'village', 'status']
+
 @claims_bp.route('/', methods=['GET'])
 @jwt_required()
+@conditional(table_version_source('claims'))
 def get_claims():
-    """Get all claims for the current user"""
+    """Get claims for the current user, keyset-paginated on (created_at, id)"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = current_principal()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
         # Admin can see all claims, others see only their own
         if user.role == 'admin':
-            claims = Claim.query.all()
+            query = Claim.query
         else:
-            claims = Claim.query.filter_by(user_id=user_id).all()
+            query = Claim.query.filter_by(user_id=user.id)
         
-        return jsonify({
-            'claims': [claim.to_dict() for claim in claims]
-        }), 200
+        cursor = request.args.get('cursor')
+        geojson = wants_geojson(request.args)
+        
+        try:
+            # Viewport and proximity filters run as PostGIS predicates on the GIST index
+            query = query.filter(*spatial_filters(Claim.geometry, request.args))
+            
+            # Fields and geometry are encoded to JSON in SQL; no ORM objects are built
+            level = parse_simplification(request.args)
+            query = project(query, Claim, request.args, level, as_feature=geojson)
+            
+            key = 'features' if geojson else 'claims'
+            members = {'type': 'FeatureCollection'} if geojson else {}
+            
+            # Streaming mode sends every row in chunks from a server-side cursor
+            if request.args.get('stream', '').lower() == 'true':
+                return stream_json_response(apply_keyset(query, Claim, cursor), key, row_json,
+                                            members=members)
+            
+            limit = get_page_size(request.args)
+            rows, next_cursor = keyset_paginate(query, Claim, cursor, limit)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        members.update({'next_cursor': next_cursor, 'has_more': next_cursor is not None})
+        return json_list_response(key, rows, members=members)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -45,9 +84,8 @@ def create_claim():
             if not data.get(field):
                 return jsonify({'error': f'{field} is required'}), 400
         
-        # Generate claim number
-        claim_count = Claim.query.count()
-        claim_number = f"FRA{claim_count + 1:06d}"
+        # Generate claim number from the prefetched sequence block
+        claim_number = claim_number_allocator.allocate(db.session, data['state'], data['district'])
         
         # Create claim
         claim = Claim(
@@ -60,7 +98,7 @@ def create_claim():
             claim_type=data['claim_type'],
             land_area=data.get('land_area'),
             land_description=data.get('land_description'),
-            supporting_documents=json.dumps(data.get('supporting_documents', [])),
+            supporting_documents=data.get('supporting_documents', []),
             user_id=user_id
         )
         
@@ -73,8 +111,11 @@ def create_claim():
                 return jsonify({'error': f'Invalid geometry: {str(e)}'}), 400
         
         db.session.add(claim)
+        new_geometry = claim.geometry
         db.session.commit()
         
+        invalidate_tiles('claims', new_geometry)
+        
         return jsonify({
             'message': 'Claim created successfully',
             'claim': claim.to_dict()
@@ -89,15 +130,17 @@ def create_claim():
 def get_claim(claim_id):
     """Get a specific claim"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = current_principal()
+        
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
         
         claim = Claim.query.get(claim_id)
         if not claim:
             return jsonify({'error': 'Claim not found'}), 404
         
         # Check permissions
-        if user.role != 'admin' and claim.user_id != user_id:
+        if not can_access(user, claim.user_id):
             return jsonify({'error': 'Access denied'}), 403
         
         return jsonify({'claim': claim.to_dict()}), 200
@@ -110,18 +153,21 @@ def get_claim(claim_id):
 def update_claim(claim_id):
     """Update a specific claim"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = current_principal()
+        
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
         
         claim = Claim.query.get(claim_id)
         if not claim:
             return jsonify({'error': 'Claim not found'}), 404
         
         # Check permissions
-        if user.role != 'admin' and claim.user_id != user_id:
+        if not can_access(user, claim.user_id):
             return jsonify({'error': 'Access denied'}), 403
         
         data = request.get_json()
+        old_geometry = claim.geometry
         
         # Update fields
         updatable_fields = [
@@ -131,10 +177,7 @@ def update_claim(claim_id):
         
         for field in updatable_fields:
             if field in data:
-                if field == 'supporting_documents':
-                    claim.supporting_documents = json.dumps(data[field])
-                else:
-                    setattr(claim, field, data[field])
+                setattr(claim, field, data[field])
         
         # Handle geometry update
         if 'geometry' in data:
@@ -148,8 +191,12 @@ def update_claim(claim_id):
         if 'status' in data and user.role == 'admin':
             claim.status = data['status']
         
+        new_geometry = claim.geometry
         db.session.commit()
         
+        # Tiles carry claim attributes too, so refresh both the old and new footprint
+        invalidate_tiles('claims', old_geometry, new_geometry)
+        
         return jsonify({
             'message': 'Claim updated successfully',
             'claim': claim.to_dict()
@@ -164,22 +211,290 @@ def update_claim(claim_id):
 def delete_claim(claim_id):
     """Delete a specific claim"""
     try:
-        user_id = get_jwt_identity()
-        user = User.query.get(user_id)
+        user = current_principal()
+        
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
         
         claim = Claim.query.get(claim_id)
         if not claim:
             return jsonify({'error': 'Claim not found'}), 404
         
         # Check permissions
-        if user.role != 'admin' and claim.user_id != user_id:
+        if not can_access(user, claim.user_id):
             return jsonify({'error': 'Access denied'}), 403
         
+        old_geometry = claim.geometry
         db.session.delete(claim)
         db.session.commit()
         
+        invalidate_tiles('claims', old_geometry)
+        
         return jsonify({'message': 'Claim deleted successfully'}), 200
         
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
+
+@claims_bp.route('/tiles/<int:z>/<int:x>/<int:y>.pbf', methods=['GET'])
+@jwt_required()
+def get_claim_tile(z, x, y):
+    """Get a Mapbox Vector Tile of claims"""
+    try:
+        user = current_principal()
+        
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        try:
+            tile = get_tile(db.session, 'claims', z, x, y, user)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return Response(tile, mimetype=MVT_MIMETYPE)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@claims_bp.route('/bulk-import', methods=['POST'])
+@jwt_required()
+def bulk_import_claims():
+    """Import a CSV or GeoJSON batch of claims and report accepted and rejected lines"""
+    try:
+        user = current_principal()
+        
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        if user.role not in ('admin', 'officer'):
+            return jsonify({'error': 'Access denied'}), 403
+        
+        upload = request.files.get('file')
+        if not upload:
+            return jsonify({'error': 'No file provided'}), 400
+        
+        try:
+            file_format = request.form.get('format') or detect_format(upload.filename, upload.mimetype)
+            rows = READERS[file_format](upload.stream)
+        except (KeyError, ValueError) as e:
+            return jsonify({'error': str(e) if isinstance(e, ValueError) else 'Unsupported format'}), 400
+        
+        importer = ClaimImporter(db.session, user.id, allow_status=user.role == 'admin')
+        try:
+            report = importer.run(rows)
+        except ValueError as e:
+            # Unreadable input part way through; lines before it were imported
+            return jsonify({'error': str(e), 'report': importer.report()}), 400
+        
+        return jsonify({
+            'message': 'Bulk import completed',
+            'report': report
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@claims_bp.cli.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--username', required=True, help='User the imported claims are filed under')
+@click.option('--format', 'file_format', type=click.Choice(sorted(READERS)), help='Defaults to the file extension')
+@click.option('--chunk-size', default=CHUNK_SIZE, show_default=True, help='Rows validated and copied per transaction')
+def import_claims_command(path, username, file_format, chunk_size):
+    """Bulk import claims from a CSV or GeoJSON file"""
+    user = User.query.filter_by(username=username).first()
+    if not user:
+        raise click.ClickException(f'User {username} not found')
+    
+    try:
+        file_format = file_format or detect_format(path)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    
+    with open(path, 'rb') as f:
+        importer = ClaimImporter(db.session, user.id, allow_status=user.role == 'admin', chunk_size=chunk_size)
+        try:
+            report = importer.run(READERS[file_format](f))
+        except ValueError as e:
+            report = importer.report()
+            click.echo(f"Stopped after {report['accepted_count']} accepted claims: {e}", err=True)
+            raise click.ClickException(str(e))
+    
+    for entry in report['rejected']:
+        click.echo(f"line {entry['line']}: {'; '.join(entry['errors'])}", err=True)
+    click.echo(f"Accepted {report['accepted_count']} claims, rejected {report['rejected_count']}")
+
+@claims_bp.cli.command('recompute-areas')
+@click.option('--batch-size', default=RECOMPUTE_BATCH_SIZE, show_default=True, help='Rows updated per transaction')
+def recompute_claim_areas_command(batch_size):
+    """Recompute the stored geodesic area of every claim"""
+    updated = recompute_areas(db.session, Claim, batch_size,
+                              progress=lambda last_id, total: click.echo(f'up to id {last_id}: {total} updated'))
+    click.echo(f'Recomputed areas, {updated} claims changed')
+
+@claims_bp.cli.command('prune-changes')
+@click.option('--retention-days', default=CHANGE_LOG_RETENTION_DAYS, show_default=True,
+              help='Days of change feed to keep')
+def prune_claim_changes_command(retention_days):
+    """Delete claim change-feed entries older than the retention period (run daily, e.g. from cron)"""
+    deleted = prune_changes(db.session, Claim.__tablename__, retention_days,
+                            progress=lambda total: click.echo(f'{total} deleted'))
+    click.echo(f'Pruned {deleted} claim change-log entries')
+
+@claims_bp.route('/search', methods=['GET'])
+@jwt_required()
+def search_claims():
+    """Fuzzy search claims by applicant, village, district and land description"""
+    try:
+        user = current_principal()
+        
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        try:
+            q = parse_query(request.args.get('q'))
+            limit = min(get_page_size(request.args), MAX_SEARCH_RESULTS)
+            offset = max(int(request.args.get('offset', 0)), 0)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        query = Claim.query.filter(*search_conditions(q))
+        if user.role != 'admin':
+            query = query.filter(Claim.user_id == user.id)
+        
+        try:
+            rank = search_rank(q)
+            query = project(query, Claim, request.args, parse_simplification(request.args), extra={'score': rank})
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        rows = query.order_by(rank.desc(), Claim.id).offset(offset).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        
+        return json_list_response('claims', rows[:limit], members={
+            'query': q,
+            'offset': offset,
+            'has_more': has_more
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@claims_bp.route('/batch-status', methods=['POST'])
+@jwt_required()
+def batch_update_status():
+    """Move many claims to a new status in one set-based UPDATE"""
+    try:
+        user = current_principal()
+        
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        # Only admin can update status
+        if user.role != 'admin':
+            return jsonify({'error': 'Access denied'}), 403
+        
+        data = request.get_json() or {}
+        status = data.get('status')
+        claim_ids = data.get('claim_ids')
+        filters = data.get('filter') or {}
+        
+        if status not in CLAIM_STATUSES:
+            return jsonify({'error': f"status must be one of {', '.join(CLAIM_STATUSES)}"}), 400
+        
+        if not claim_ids and not filters:
+            return jsonify({'error': 'claim_ids or filter is required'}), 400
+        
+        unknown = [field for field in filters if field not in BATCH_FILTER_FIELDS]
+        if unknown:
+            return jsonify({'error': f"Unsupported filter fields: {', '.join(unknown)}"}), 400
+        
+        target = db.session.query(Claim.id, Claim.status.label('previous_status'))
+        if claim_ids:
+            if len(claim_ids) > MAX_BATCH_SIZE:
+                return jsonify({'error': f'At most {MAX_BATCH_SIZE} claim_ids per batch'}), 400
+            try:
+                claim_ids = [int(claim_id) for claim_id in claim_ids]
+            except (TypeError, ValueError):
+                return jsonify({'error': 'claim_ids must be integers'}), 400
+            target = target.filter(Claim.id.in_(claim_ids))
+        for field, value in filters.items():
+            target = target.filter(getattr(Claim, field) == value)
+        
+        # Claims already in the target status are left alone so they are not rewritten
+        target = target.filter(Claim.status != status).with_for_update().subquery()
+        
+        statement = update(Claim) \
+            .where(Claim.id == target.c.id) \
+            .values(status=status) \
+            .returning(
+                Claim.id, Claim.claim_number, target.c.previous_status,
+                func.ST_XMin(Claim.geometry), func.ST_YMin(Claim.geometry),
+                func.ST_XMax(Claim.geometry), func.ST_YMax(Claim.geometry)
+            ) \
+            .execution_options(synchronize_session=False)
+        rows = db.session.execute(statement).fetchall()
+        
+        updated = [{
+            'id': row[0],
+            'claim_number': row[1],
+            'previous_status': row[2],
+            'status': status
+        } for row in rows]
+        
+        # Explain requested ids that were not updated; only needed when some are left over
+        unchanged, not_found = [], []
+        if claim_ids:
+            remaining = set(claim_ids) - {row[0] for row in rows}
+            if remaining:
+                existing = {claim_id for claim_id, in db.session.query(Claim.id).filter(Claim.id.in_(remaining))}
+                unchanged = sorted(existing)
+                not_found = sorted(remaining - existing)
+        
+        db.session.commit()
+        
+        # Tiles carry claim status, so refresh the footprint of every changed claim
+        invalidate_tiles('claims', *[box(*row[3:]) for row in rows if row[3] is not None])
+        
+        return jsonify({
+            'message': 'Claim statuses updated successfully',
+            'status': status,
+            'updated_count': len(updated),
+            'updated': updated,
+            'unchanged': unchanged,
+            'not_found': not_found
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@claims_bp.route('/changes', methods=['GET'])
+@jwt_required()
+def get_claim_changes():
+    """Get inserts, updates and deletes of claims since a change-feed cursor"""
+    try:
+        user = current_principal()
+        
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        if user.role == 'admin':
+            owner_id, query = None, Claim.query
+        else:
+            owner_id, query = user.id, Claim.query.filter_by(user_id=user.id)
+        
+        try:
+            page = fetch_changes(db.session, Claim, query, request.args, owner_id)
+        except CursorExpired as e:
+            return jsonify({'error': str(e)}), 410
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return json_list_response('changes', page['items'], serializer=str, members={
+            'next_cursor': page['next_cursor'],
+            'has_more': page['has_more']
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
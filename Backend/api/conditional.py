@@ -0,0 +1,87 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from typing import Callable, Optional, Tuple
+from flask import Response, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import bindparam, text
+
+from api.authz import current_principal
+from api.models import db
+
+TABLE_VERSIONS_SQL = text(
+    "SELECT version, updated_at FROM table_versions WHERE table_name IN :tables ORDER BY table_name"
+).bindparams(bindparam('tables', expanding=True))
+
+def table_version_source(*tables: str) -> Callable[[], Tuple[str, Optional[datetime]]]:
+    """Version source backed by the trigger-maintained table_versions counters"""
+    def source():
+        rows = db.session.execute(TABLE_VERSIONS_SQL, {'tables': list(tables)}).fetchall()
+        version = '.'.join(str(row.version) for row in rows)
+        last_modified = max((row.updated_at for row in rows), default=None)
+        return version, last_modified
+    return source
+
+def make_etag(*parts) -> str:
+    """Strong ETag over the data version and everything else that shapes the payload"""
+    return hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+def settled_last_modified(last_modified: Optional[datetime]) -> Optional[datetime]:
+    """The modification time if it is usable as a one-second HTTP date, otherwise None.
+
+    Last-Modified only has one-second resolution, so a second write within the
+    same second would be hidden behind it. Until that second has passed the time
+    is withheld, leaving the ETag as the only validator.
+    """
+    if last_modified is None:
+        return None
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    if datetime.now(timezone.utc) - last_modified.replace(microsecond=0) < timedelta(seconds=1):
+        return None
+    return last_modified
+
+def _not_modified(etag: str, last_modified: Optional[datetime]) -> bool:
+    # The ETag decides whenever the client sent one
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since and last_modified:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+def conditional(version_source: Callable[[], Tuple[str, Optional[datetime]]], per_user: bool = True):
+    """Answer If-None-Match / If-Modified-Since with 304 before the view builds its payload.
+
+    The ETag covers the data version, the request path and query string and,
+    for per-user views, the JWT identity and the user's current role. Apply
+    below @jwt_required().
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            version, last_modified = version_source()
+            last_modified = settled_last_modified(last_modified)
+            identity, role = None, None
+            if per_user:
+                # Admins and other users see different rows at the same URL, so a role
+                # change must change the ETag even when the data has not
+                identity = get_jwt_identity()
+                principal = current_principal()
+                role = principal.role if principal else None
+            etag = make_etag(version, identity, role, request.full_path)
+
+            if _not_modified(etag, last_modified):
+                response = Response(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if last_modified:
+                response.last_modified = last_modified
+            # Clients may keep the payload but must revalidate it on every use
+            response.headers['Cache-Control'] = 'private, no-cache' if per_user else 'no-cache'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,257 @@
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Callable, Dict, List, TypeVar
+from flask import current_app
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+T = TypeVar('T')
+
+# Password hashes allowed to run at once, across every worker when Redis is configured
+HASH_CONCURRENCY = int(os.getenv('PASSWORD_HASH_CONCURRENCY', 4))
+# Seconds after which a hashing slot held by a crashed worker is reclaimed
+HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', 10))
+
+LOGIN_ATTEMPTS = int(os.getenv('LOGIN_ATTEMPTS_PER_WINDOW', 10))
+# Attempts on one username from all clients together, so rotating addresses does not lift the limit
+LOGIN_USER_ATTEMPTS = int(os.getenv('LOGIN_USER_ATTEMPTS_PER_WINDOW', 50))
+LOGIN_WINDOW = float(os.getenv('LOGIN_ATTEMPT_WINDOW', 60))
+
+class HashingBusy(Exception):
+    """Every hashing slot is taken; the client should retry later"""
+
+    def __init__(self, retry_after: int = 1):
+        super().__init__('Authentication service is busy, please retry shortly')
+        self.retry_after = retry_after
+
+class TooManyAttempts(Exception):
+    """A username exceeded its attempt budget, from one client or overall, for the current window"""
+
+    def __init__(self, retry_after: int):
+        super().__init__('Too many login attempts, please wait before retrying')
+        self.retry_after = retry_after
+
+def _attempt_keys(username: str, client: str) -> List[str]:
+    """The per-client key and the per-username key an attempt counts against.
+
+    The per-client budget is the tight one, so a client guessing at an account
+    is stopped without locking the owner out from elsewhere; the higher
+    per-username ceiling stops guessing spread across many addresses.
+    """
+    username = username.strip().lower()
+    return [f'{username}|{client or "-"}', f'{username}|*']
+
+def _redis_unavailable(what: str, e: Exception) -> None:
+    current_app.logger.warning(f'Redis unavailable, {what} per process: {str(e)}')
+
+class LocalHashingSlots:
+    """Hashing slots counted in process memory; only bounds one worker process"""
+
+    def __init__(self, limit: int = HASH_CONCURRENCY):
+        self.limit = limit
+        self.reset()
+
+    def reset(self) -> None:
+        self._slots = threading.BoundedSemaphore(self.limit)
+
+    def acquire(self) -> object:
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy()
+        return None
+
+    def release(self, token: object) -> None:
+        self._slots.release()
+
+class RedisHashingSlots:
+    """Hashing slots shared by every worker, as a Redis sorted set of leases.
+
+    Leases are scored with the Redis server clock and expire after the hash
+    timeout, so a worker that dies mid-hash cannot leak its slot. While Redis
+    is unreachable each process falls back to its own LocalHashingSlots.
+    """
+
+    ACQUIRE_SCRIPT = """
+        local now = redis.call('TIME')
+        local t = tonumber(now[1]) + tonumber(now[2]) / 1000000
+        redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', t - tonumber(ARGV[2]))
+        if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[1]) then
+            return 0
+        end
+        redis.call('ZADD', KEYS[1], t, ARGV[3])
+        redis.call('EXPIRE', KEYS[1], math.ceil(tonumber(ARGV[2])))
+        return 1
+    """
+
+    def __init__(self, client, limit: int = HASH_CONCURRENCY, timeout: float = HASH_TIMEOUT,
+                 key: str = 'auth:hashing-slots'):
+        self.client = client
+        self.limit = limit
+        self.timeout = timeout
+        self.key = key
+        self._acquire = client.register_script(self.ACQUIRE_SCRIPT)
+        self.fallback = LocalHashingSlots(limit)
+
+    def reset(self) -> None:
+        self.fallback.reset()
+
+    def acquire(self) -> object:
+        token = uuid.uuid4().hex
+        try:
+            acquired = self._acquire(keys=[self.key], args=[self.limit, self.timeout, token])
+        except redis.RedisError as e:
+            _redis_unavailable('counting hashing slots', e)
+            return self.fallback.acquire()
+        if not acquired:
+            raise HashingBusy()
+        return token
+
+    def release(self, token: object) -> None:
+        if token is None:
+            self.fallback.release(token)
+            return
+        try:
+            self.client.zrem(self.key, token)
+        except redis.RedisError:
+            # The lease expires after the hash timeout
+            pass
+
+class PasswordHasher:
+    """Runs password hashing on the request's own worker, behind a concurrency limit.
+
+    Hashing is CPU-bound, so handing it to another thread frees nothing for a
+    sync worker; what protects the service during a login spike is capping how
+    many hashes run at once and failing fast with HashingBusy beyond that.
+    """
+
+    def __init__(self, slots):
+        self.slots = slots
+
+    def reset(self) -> None:
+        """Start over with fresh slots, e.g. in a freshly forked worker"""
+        self.slots.reset()
+
+    def run(self, fn: Callable[..., T], *args) -> T:
+        """Run a hashing call once a slot is free, raising HashingBusy if none is"""
+        token = self.slots.acquire()
+        try:
+            return fn(*args)
+        finally:
+            self.slots.release(token)
+
+class LoginThrottle:
+    """Sliding-window attempt counters per username and client and per username, kept in process memory.
+
+    Each worker process counts separately, so the effective limits are multiplied
+    by the number of workers; RedisLoginThrottle shares one count.
+    """
+
+    def __init__(self, max_attempts: int = LOGIN_ATTEMPTS, window: float = LOGIN_WINDOW,
+                 max_user_attempts: int = LOGIN_USER_ATTEMPTS):
+        self.max_attempts = max_attempts
+        self.max_user_attempts = max_user_attempts
+        self.window = window
+        self.reset()
+
+    def reset(self) -> None:
+        self._attempts: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def hit(self, username: str, client: str) -> None:
+        """Record an attempt, raising TooManyAttempts once the window's budget is spent"""
+        now = time.monotonic()
+        with self._lock:
+            counters = [self._attempts.setdefault(key, deque()) for key in _attempt_keys(username, client)]
+            for attempts, limit in zip(counters, (self.max_attempts, self.max_user_attempts)):
+                while attempts and attempts[0] <= now - self.window:
+                    attempts.popleft()
+                if len(attempts) >= limit:
+                    raise TooManyAttempts(retry_after=max(1, int(attempts[0] + self.window - now) + 1))
+            for attempts in counters:
+                attempts.append(now)
+            # Drop idle keys now and then so the table does not grow without bound
+            if len(self._attempts) > 10000:
+                self._attempts = {k: v for k, v in self._attempts.items() if v and v[-1] > now - self.window}
+
+    def clear(self, username: str, client: str) -> None:
+        """Forget the client's attempts after a successful login; the per-username count runs out its window"""
+        with self._lock:
+            self._attempts.pop(_attempt_keys(username, client)[0], None)
+
+class RedisLoginThrottle:
+    """Fixed-window attempt counters per username and client and per username, shared by every worker.
+
+    While Redis is unreachable each process falls back to its own LoginThrottle,
+    so logins stay limited rather than failing or going unthrottled.
+    """
+
+    def __init__(self, client, max_attempts: int = LOGIN_ATTEMPTS, window: float = LOGIN_WINDOW,
+                 max_user_attempts: int = LOGIN_USER_ATTEMPTS):
+        self.client = client
+        self.max_attempts = max_attempts
+        self.max_user_attempts = max_user_attempts
+        self.window = window
+        self.fallback = LoginThrottle(max_attempts, window, max_user_attempts)
+
+    def _keys(self, username: str, client: str) -> List[str]:
+        return [f'auth:login-attempts:{key}' for key in _attempt_keys(username, client)]
+
+    def reset(self) -> None:
+        self.fallback.reset()
+
+    def hit(self, username: str, client: str) -> None:
+        """Record an attempt, raising TooManyAttempts once the window's budget is spent"""
+        keys = self._keys(username, client)
+        try:
+            pipeline = self.client.pipeline()
+            for key in keys:
+                pipeline.incr(key).ttl(key)
+            results = pipeline.execute()
+            ttls = []
+            for key, ttl in zip(keys, results[1::2]):
+                if ttl < 0:
+                    ttl = int(self.window)
+                    self.client.expire(key, ttl)
+                ttls.append(ttl)
+        except redis.RedisError as e:
+            _redis_unavailable('throttling logins', e)
+            self.fallback.hit(username, client)
+            return
+        for count, ttl, limit in zip(results[0::2], ttls, (self.max_attempts, self.max_user_attempts)):
+            if count > limit:
+                raise TooManyAttempts(retry_after=max(1, ttl))
+
+    def clear(self, username: str, client: str) -> None:
+        """Forget the client's attempts after a successful login; the per-username count runs out its window"""
+        self.fallback.clear(username, client)
+        try:
+            self.client.delete(self._keys(username, client)[0])
+        except redis.RedisError:
+            pass
+
+def create_password_hasher() -> PasswordHasher:
+    """Share hashing slots through Redis when REDIS_URL is configured, otherwise count per process"""
+    redis_url = os.getenv('REDIS_URL')
+    if redis_url and redis is not None:
+        return PasswordHasher(RedisHashingSlots(redis.Redis.from_url(redis_url)))
+    return PasswordHasher(LocalHashingSlots())
+
+def create_login_throttle():
+    """Share attempt counts through Redis when REDIS_URL is configured, otherwise count per process"""
+    redis_url = os.getenv('REDIS_URL')
+    if redis_url and redis is not None:
+        return RedisLoginThrottle(redis.Redis.from_url(redis_url))
+    return LoginThrottle()
+
+password_hasher = create_password_hasher()
+login_throttle = create_login_throttle()
+
+# Process-local slots and counters must not be inherited by forked workers
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=password_hasher.reset)
+    os.register_at_fork(after_in_child=login_throttle.reset)
@@ -1,12 +1,15 @@
 from flask_sqlalchemy import SQLAlchemy
 from geoalchemy2 import Geometry
+from sqlalchemy.dialects.postgresql import JSONB
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_jwt_extended import create_access_token
-import json
 
 db = SQLAlchemy()
 
+CLAIM_STATUSES = ('pending', 'approved', 'rejected')
+CLAIM_TYPES = ('individual', 'community')
+
 class User(db.Model):
     __tablename__ = 'users'
     
@@ -15,6 +18,8 @@ class User(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(128))
     role = db.Column(db.String(20), default='user')  # user, admin, officer
+    # Bumped with every role change so tokens carrying the old role stop being trusted
+    auth_version = db.Column(db.Integer, nullable=False, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -49,9 +54,20 @@ class Claim(db.Model):
     claim_type = db.Column(db.String(50))  # individual, community
     land_area = db.Column(db.Float)  # in hectares
     land_description = db.Column(db.Text)
-    supporting_documents = db.Column(db.Text)  # JSON array of document paths
+    supporting_documents = db.Column(JSONB)  # array of document paths
     status = db.Column(db.String(20), default='pending')  # pending, approved, rejected
     geometry = db.Column(Geometry('POLYGON', srid=4326))
+    # Simplified copies maintained by a database trigger, loaded only when requested
+    geometry_simplified_low = db.deferred(db.Column(Geometry('POLYGON', srid=4326)))
+    geometry_simplified_medium = db.deferred(db.Column(Geometry('POLYGON', srid=4326)))
+    geometry_simplified_high = db.deferred(db.Column(Geometry('POLYGON', srid=4326)))
+    # Geodesic area of the geometry in hectares, maintained by a database trigger
+    geodesic_area_hectares = db.Column(db.Float)
+    # land_area is more than 10% off the geodesic area (see api/areas.py)
+    area_discrepancy = db.Column(db.Boolean, db.Computed(
+        'land_area IS NOT NULL AND geodesic_area_hectares > 0 '
+        'AND abs(land_area - geodesic_area_hectares) > 0.1 * geodesic_area_hectares'
+    ))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -71,13 +87,27 @@ class Claim(db.Model):
             'claim_type': self.claim_type,
             'land_area': self.land_area,
             'land_description': self.land_description,
-            'supporting_documents': json.loads(self.supporting_documents) if self.supporting_documents else [],
+            'supporting_documents': self.supporting_documents or [],
             'status': self.status,
+            'geodesic_area_hectares': self.geodesic_area_hectares,
+            'area_discrepancy': self.area_discrepancy,
             'geometry': self.geometry.wkt if self.geometry else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+class ClaimStat(db.Model):
+    __tablename__ = 'claim_stats'
+    
+    # Counters maintained by triggers on claims; NULL dimensions are stored as ''
+    state = db.Column(db.String(100), primary_key=True, default='')
+    district = db.Column(db.String(100), primary_key=True, default='')
+    status = db.Column(db.String(20), primary_key=True, default='')
+    claim_type = db.Column(db.String(50), primary_key=True, default='')
+    claim_count = db.Column(db.BigInteger, nullable=False, default=0)
+    total_land_area = db.Column(db.Float, nullable=False, default=0)
+    land_area_count = db.Column(db.BigInteger, nullable=False, default=0)
+
 class Asset(db.Model):
     __tablename__ = 'assets'
     
@@ -87,9 +117,20 @@ class Asset(db.Model):
     area_hectares = db.Column(db.Float)
     description = db.Column(db.Text)
     satellite_image_path = db.Column(db.String(200))
-    classification_result = db.Column(db.Text)  # JSON with ML classification results
+    classification_result = db.Column(JSONB)  # ML classification results
     confidence_score = db.Column(db.Float)
     geometry = db.Column(Geometry('POLYGON', srid=4326))
+    # Simplified copies maintained by a database trigger, loaded only when requested
+    geometry_simplified_low = db.deferred(db.Column(Geometry('POLYGON', srid=4326)))
+    geometry_simplified_medium = db.deferred(db.Column(Geometry('POLYGON', srid=4326)))
+    geometry_simplified_high = db.deferred(db.Column(Geometry('POLYGON', srid=4326)))
+    # Geodesic area of the geometry in hectares, maintained by a database trigger
+    geodesic_area_hectares = db.Column(db.Float)
+    # area_hectares is more than 10% off the geodesic area (see api/areas.py)
+    area_discrepancy = db.Column(db.Boolean, db.Computed(
+        'area_hectares IS NOT NULL AND geodesic_area_hectares > 0 '
+        'AND abs(area_hectares - geodesic_area_hectares) > 0.1 * geodesic_area_hectares'
+    ))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     claim_id = db.Column(db.Integer, db.ForeignKey('claims.id'), nullable=False)
@@ -102,8 +143,10 @@ class Asset(db.Model):
             'area_hectares': self.area_hectares,
             'description': self.description,
             'satellite_image_path': self.satellite_image_path,
-            'classification_result': json.loads(self.classification_result) if self.classification_result else {},
+            'classification_result': self.classification_result or {},
             'confidence_score': self.confidence_score,
+            'geodesic_area_hectares': self.geodesic_area_hectares,
+            'area_discrepancy': self.area_discrepancy,
             'geometry': self.geometry.wkt if self.geometry else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
@@ -116,10 +159,10 @@ class Scheme(db.Model):
     scheme_name = db.Column(db.String(100), nullable=False)
     scheme_code = db.Column(db.String(50), unique=True, nullable=False)
     description = db.Column(db.Text)
-    eligibility_criteria = db.Column(db.Text)  # JSON with criteria
-    benefits = db.Column(db.Text)  # JSON with benefits
+    eligibility_criteria = db.Column(JSONB)  # criteria
+    benefits = db.Column(JSONB)
     application_process = db.Column(db.Text)
-    contact_info = db.Column(db.Text)  # JSON with contact details
+    contact_info = db.Column(JSONB)  # contact details
     is_active = db.Column(db.Boolean, default=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -130,11 +173,21 @@ class Scheme(db.Model):
             'scheme_name': self.scheme_name,
             'scheme_code': self.scheme_code,
             'description': self.description,
-            'eligibility_criteria': json.loads(self.eligibility_criteria) if self.eligibility_criteria else {},
-            'benefits': json.loads(self.benefits) if self.benefits else {},
+            'eligibility_criteria': self.eligibility_criteria or {},
+            'benefits': self.benefits or {},
             'application_process': self.application_process,
-            'contact_info': json.loads(self.contact_info) if self.contact_info else {},
+            'contact_info': self.contact_info or {},
             'is_active': self.is_active,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
+
+class DecisionRule(db.Model):
+    __tablename__ = 'decision_rules'
+    
+    # Insertion order is rule evaluation order
+    id = db.Column(db.Integer, primary_key=True)
+    rule_id = db.Column(db.String(50), unique=True, nullable=False)
+    rule = db.Column(JSONB, nullable=False)  # full rule as served by /api/dss/rules
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,74 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from flask import Response, stream_with_context
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_CHUNK_SIZE = 500
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Encode a (created_at, id) keyset position as an opaque cursor"""
+    payload = json.dumps([created_at.isoformat(), row_id])
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode an opaque cursor back into a (created_at, id) keyset position"""
+    try:
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+def get_page_size(args) -> int:
+    """Read the requested page size from query args, clamped to MAX_PAGE_SIZE"""
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    except (TypeError, ValueError):
+        raise ValueError('limit must be an integer')
+    if limit < 1:
+        raise ValueError('limit must be positive')
+    return min(limit, MAX_PAGE_SIZE)
+
+def apply_keyset(query, model, cursor: Optional[str]):
+    """Order a query by (created_at, id) and skip past the given cursor"""
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.filter(tuple_(model.created_at, model.id) > (created_at, row_id))
+    return query.order_by(model.created_at, model.id)
+
+def keyset_paginate(query, model, cursor: Optional[str], limit: int) -> Tuple[List[Any], Optional[str]]:
+    """Fetch one page of rows after the cursor, returning rows and the next cursor"""
+    rows = apply_keyset(query, model, cursor).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return rows, next_cursor
+
+def stream_json_response(query, key: str, serializer: Callable[[Any], str],
+                         chunk_size: int = STREAM_CHUNK_SIZE,
+                         members: Optional[Dict[str, Any]] = None) -> Response:
+    """Stream query results as a JSON object {key: [...]} from a server-side cursor.
+
+    The serializer returns each row's JSON text, so pre-encoded rows pass straight through.
+    """
+    def generate():
+        head = json.dumps(members)[1:-1] + ', ' if members else ''
+        yield '{%s"%s": [' % (head, key)
+        first = True
+        buffer = []
+        for row in query.yield_per(chunk_size):
+            buffer.append(serializer(row))
+            if len(buffer) >= chunk_size:
+                yield (',' if not first else '') + ','.join(buffer)
+                first = False
+                buffer = []
+        if buffer:
+            yield (',' if not first else '') + ','.join(buffer)
+        yield ']}'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
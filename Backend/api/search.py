@@ -0,0 +1,35 @@
+from typing import List
+from sqlalchemy import func, literal, literal_column, or_
+
+from api.models import Claim
+
+TEXT_SEARCH_CONFIG = literal_column("'english'")
+MIN_QUERY_LENGTH = 2
+
+# Columns matched fuzzily; each has a gin_trgm_ops index in database/init.sql
+TRIGRAM_COLUMNS = [Claim.applicant_name, Claim.village, Claim.district]
+
+def land_description_vector():
+    """tsvector over land_description; must match the idx_claims_land_description_tsv expression"""
+    return func.to_tsvector(TEXT_SEARCH_CONFIG, func.coalesce(Claim.land_description, ''))
+
+def parse_query(value: str) -> str:
+    """Validate the q= search parameter"""
+    query = (value or '').strip()
+    if len(query) < MIN_QUERY_LENGTH:
+        raise ValueError(f'q must be at least {MIN_QUERY_LENGTH} characters')
+    return query
+
+def search_conditions(query: str) -> List:
+    """Index-backed predicates: trigram word similarity on names, full text on descriptions"""
+    term = literal(query)
+    conditions = [term.op('<%')(column) for column in TRIGRAM_COLUMNS]
+    conditions.append(land_description_vector().op('@@')(func.websearch_to_tsquery(TEXT_SEARCH_CONFIG, term)))
+    return [or_(*conditions)]
+
+def search_rank(query: str):
+    """Relevance score: best trigram word similarity plus full-text rank"""
+    term = literal(query)
+    similarity = func.greatest(*[func.word_similarity(term, column) for column in TRIGRAM_COLUMNS])
+    text_rank = func.ts_rank(land_description_vector(), func.websearch_to_tsquery(TEXT_SEARCH_CONFIG, term))
+    return func.coalesce(similarity, 0) + text_rank
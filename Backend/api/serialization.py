@@ -0,0 +1,137 @@
+import json
+from typing import Any, Callable, Dict, List, Optional
+from flask import Response
+from sqlalchemy import JSON, Text, cast, func, literal_column, null
+from sqlalchemy.dialects.postgresql import JSONB
+
+from api.models import Asset, Claim
+from api.spatial import geometry_column
+
+GEOMETRY_FORMATS = ('geojson', 'wkt', 'none')
+
+def _json_column(column, empty: str):
+    """A JSONB column emitted as-is, with an empty default"""
+    return func.coalesce(column, cast(empty, JSONB))
+
+# Output field name -> SQL expression; geometry is handled separately by geometry_format
+FIELDS = {
+    Claim: {
+        'id': Claim.id,
+        'claim_number': Claim.claim_number,
+        'applicant_name': Claim.applicant_name,
+        'applicant_address': Claim.applicant_address,
+        'village': Claim.village,
+        'district': Claim.district,
+        'state': Claim.state,
+        'claim_type': Claim.claim_type,
+        'land_area': Claim.land_area,
+        'geodesic_area_hectares': Claim.geodesic_area_hectares,
+        'area_discrepancy': Claim.area_discrepancy,
+        'land_description': Claim.land_description,
+        'supporting_documents': _json_column(Claim.supporting_documents, '[]'),
+        'status': Claim.status,
+        'created_at': Claim.created_at,
+        'updated_at': Claim.updated_at
+    },
+    Asset: {
+        'id': Asset.id,
+        'asset_name': Asset.asset_name,
+        'asset_type': Asset.asset_type,
+        'area_hectares': Asset.area_hectares,
+        'geodesic_area_hectares': Asset.geodesic_area_hectares,
+        'area_discrepancy': Asset.area_discrepancy,
+        'description': Asset.description,
+        'satellite_image_path': Asset.satellite_image_path,
+        'classification_result': _json_column(Asset.classification_result, '{}'),
+        'confidence_score': Asset.confidence_score,
+        'created_at': Asset.created_at,
+        'updated_at': Asset.updated_at
+    }
+}
+
+def parse_fields(model, args) -> List[str]:
+    """Read fields=a,b,c into a validated field list; geometry is always allowed"""
+    available = FIELDS[model]
+    if not args.get('fields'):
+        return list(available) + ['geometry']
+    fields = [name.strip() for name in args['fields'].split(',') if name.strip()]
+    unknown = [name for name in fields if name != 'geometry' and name not in available]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+def parse_geometry_format(args, default: str = 'wkt') -> str:
+    """Read geometry_format=geojson|wkt|none"""
+    geometry_format = args.get('geometry_format', default)
+    if geometry_format not in GEOMETRY_FORMATS:
+        raise ValueError(f"geometry_format must be one of {', '.join(GEOMETRY_FORMATS)}")
+    return geometry_format
+
+def geometry_expression(column, geometry_format: str):
+    """Encode a geometry column in SQL as GeoJSON or WKT"""
+    if geometry_format == 'geojson':
+        return cast(func.ST_AsGeoJSON(column), JSON)
+    if geometry_format == 'wkt':
+        return func.ST_AsText(column)
+    return None
+
+def _sql_string(value: str):
+    # Keys are fixed identifiers from FIELDS, rendered inline so json_build_object sees text literals
+    return literal_column("'%s'" % value.replace("'", "''"))
+
+def _build_object(pairs: Dict[str, Any]):
+    args = []
+    for name, expression in pairs.items():
+        args.extend([_sql_string(name), expression])
+    return func.json_build_object(*args)
+
+def object_expression(model, fields: List[str], geometry_format: str, level: Optional[str] = None,
+                      extra: Optional[Dict[str, Any]] = None):
+    """json_build_object() for the requested fields of one row, plus any computed extras"""
+    pairs = {name: FIELDS[model][name] for name in fields if name != 'geometry'}
+    pairs.update(extra or {})
+    if 'geometry' in fields and geometry_format != 'none':
+        pairs['geometry'] = geometry_expression(geometry_column(model, level), geometry_format)
+    return _build_object(pairs)
+
+def feature_expression(model, fields: List[str], geometry_format: str, level: Optional[str] = None,
+                       extra: Optional[Dict[str, Any]] = None):
+    """json_build_object() for one row as a GeoJSON Feature"""
+    properties = {name: FIELDS[model][name] for name in fields if name != 'geometry'}
+    properties.update(extra or {})
+    geometry = null()
+    if 'geometry' in fields and geometry_format != 'none':
+        geometry = geometry_expression(geometry_column(model, level), 'geojson')
+    return _build_object({
+        'type': _sql_string('Feature'),
+        'id': model.id,
+        'geometry': geometry,
+        'properties': _build_object(properties)
+    })
+
+def project(query, model, args, level: Optional[str] = None, as_feature: bool = False,
+            extra: Optional[Dict[str, Any]] = None):
+    """Replace a model query's entities with one pre-encoded JSON text column per row.
+
+    The key columns (created_at, id) are kept alongside for keyset pagination.
+    """
+    fields = parse_fields(model, args)
+    if as_feature:
+        geometry_format = parse_geometry_format(args, default='geojson')
+        expression = feature_expression(model, fields, geometry_format, level, extra)
+    else:
+        geometry_format = parse_geometry_format(args)
+        expression = object_expression(model, fields, geometry_format, level, extra)
+    return query.with_entities(cast(expression, Text).label('json'), model.created_at, model.id)
+
+def row_json(row) -> str:
+    """The pre-encoded JSON text of a projected row"""
+    return row.json
+
+def json_list_response(key: str, rows: List[Any], status: int = 200,
+                       members: Optional[Dict[str, Any]] = None,
+                       serializer: Callable[[Any], str] = row_json) -> Response:
+    """Assemble {key: [...], **members} from pre-encoded rows without re-parsing them"""
+    head = json.dumps(members)[1:-1] + ', ' if members else ''
+    body = '{%s"%s": [%s]}' % (head, key, ','.join(serializer(row) for row in rows))
+    return Response(body, status=status, mimetype='application/json')
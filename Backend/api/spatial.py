@@ -0,0 +1,115 @@
+import json
+import math
+from typing import Any, List, Optional
+from geoalchemy2 import Geography
+from shapely.geometry import shape
+from sqlalchemy import cast, func
+
+SRID = 4326
+
+# Shortest ground length of one degree (latitude at the equator), used for index prefilters
+METERS_PER_DEGREE = 110574.0
+
+def parse_bbox(value: str) -> List[float]:
+    """Parse a bbox=minx,miny,maxx,maxy query parameter"""
+    try:
+        bbox = [float(part) for part in value.split(',')]
+    except ValueError:
+        raise ValueError('bbox must be four numbers: minx,miny,maxx,maxy')
+    if len(bbox) != 4:
+        raise ValueError('bbox must be four numbers: minx,miny,maxx,maxy')
+    if bbox[0] > bbox[2] or bbox[1] > bbox[3]:
+        raise ValueError('bbox min values must not exceed max values')
+    return bbox
+
+def parse_within_distance(value: str) -> List[float]:
+    """Parse a within_distance=lon,lat,meters query parameter"""
+    try:
+        lon, lat, meters = [float(part) for part in value.split(',')]
+    except ValueError:
+        raise ValueError('within_distance must be lon,lat,meters')
+    if meters < 0:
+        raise ValueError('within_distance meters must not be negative')
+    return [lon, lat, meters]
+
+def parse_geojson_geometry(value: str) -> str:
+    """Validate an intersects= GeoJSON geometry and return it as a JSON string"""
+    try:
+        geometry = json.loads(value)
+        if geometry.get('type') == 'Feature':
+            geometry = geometry['geometry']
+        shape(geometry)
+    except Exception:
+        raise ValueError('intersects must be a valid GeoJSON geometry')
+    return json.dumps(geometry)
+
+def has_spatial_filter(args) -> bool:
+    """Check whether any spatial filter parameter was supplied"""
+    return any(args.get(name) for name in ('bbox', 'intersects', 'within_distance'))
+
+# Precomputed simplification levels: (level, tolerance in degrees, deepest zoom served).
+# Tolerances must match the simplify_geometry_levels() trigger in database/init.sql.
+SIMPLIFICATION_LEVELS = [
+    ('low', 0.01, 7),
+    ('medium', 0.001, 10),
+    ('high', 0.0001, 13)
+]
+
+def simplification_level(zoom: Optional[int] = None, tolerance: Optional[float] = None) -> Optional[str]:
+    """Pick the coarsest precomputed level suitable for a zoom or tolerance, None for full detail"""
+    if tolerance is not None:
+        for level, level_tolerance, _ in SIMPLIFICATION_LEVELS:
+            if level_tolerance <= tolerance:
+                return level
+        return None
+    if zoom is not None:
+        for level, _, max_zoom in SIMPLIFICATION_LEVELS:
+            if zoom <= max_zoom:
+                return level
+    return None
+
+def parse_simplification(args) -> Optional[str]:
+    """Read zoom= or tolerance= query parameters into a simplification level"""
+    try:
+        zoom = int(args['zoom']) if args.get('zoom') else None
+        tolerance = float(args['tolerance']) if args.get('tolerance') else None
+    except ValueError:
+        raise ValueError('zoom must be an integer and tolerance a number')
+    return simplification_level(zoom, tolerance)
+
+def geometry_column(model, level: Optional[str] = None):
+    """The full-resolution or precomputed simplified geometry column of a model"""
+    return getattr(model, f'geometry_simplified_{level}') if level else model.geometry
+
+def spatial_filters(geometry_column, args) -> List[Any]:
+    """Build PostGIS predicates for bbox, intersects and within_distance parameters.
+
+    Every predicate is written so the planner can use the GIST index on the
+    geometry column; distance checks add a bounding-box prefilter before the
+    exact geography test.
+    """
+    filters = []
+
+    if args.get('bbox'):
+        minx, miny, maxx, maxy = parse_bbox(args['bbox'])
+        envelope = func.ST_MakeEnvelope(minx, miny, maxx, maxy, SRID)
+        filters.append(func.ST_Intersects(geometry_column, envelope))
+
+    if args.get('intersects'):
+        geometry = func.ST_SetSRID(func.ST_GeomFromGeoJSON(parse_geojson_geometry(args['intersects'])), SRID)
+        filters.append(func.ST_Intersects(geometry_column, geometry))
+
+    if args.get('within_distance'):
+        lon, lat, meters = parse_within_distance(args['within_distance'])
+        point = func.ST_SetSRID(func.ST_MakePoint(lon, lat), SRID)
+        # Degrees of longitude shrink with latitude, so widen the prefilter accordingly
+        cos_lat = max(math.cos(math.radians(lat)), 0.01)
+        degrees = meters / (METERS_PER_DEGREE * cos_lat)
+        filters.append(geometry_column.op('&&')(func.ST_Expand(point, degrees)))
+        filters.append(func.ST_DWithin(cast(geometry_column, Geography(srid=SRID)), cast(point, Geography(srid=SRID)), meters))
+
+    return filters
+
+def wants_geojson(args) -> bool:
+    """Spatial queries and format=geojson requests are answered as FeatureCollections"""
+    return args.get('format') == 'geojson' or has_spatial_filter(args)
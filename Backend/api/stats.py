@@ -0,0 +1,66 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from sqlalchemy import func
+from api.models import ClaimStat, db
+from api.conditional import conditional, table_version_source
+
+stats_bp = Blueprint('stats', __name__)
+
+DIMENSIONS = ['state', 'district', 'status', 'claim_type']
+
+def _totals(query):
+    """Aggregate counter rows into claim count and land area totals"""
+    count, land_area, land_area_count = query.with_entities(
+        func.coalesce(func.sum(ClaimStat.claim_count), 0),
+        func.coalesce(func.sum(ClaimStat.total_land_area), 0.0),
+        func.coalesce(func.sum(ClaimStat.land_area_count), 0)
+    ).one()
+    return {
+        'total_claims': int(count),
+        'total_land_area': float(land_area),
+        'avg_land_area': float(land_area) / land_area_count if land_area_count else None
+    }
+
+def _breakdown(query, dimension):
+    """Claim counts grouped by one dimension, largest first"""
+    column = getattr(ClaimStat, dimension)
+    rows = query.with_entities(column, func.sum(ClaimStat.claim_count).label('claims')) \
+        .group_by(column) \
+        .having(func.sum(ClaimStat.claim_count) > 0) \
+        .order_by(func.sum(ClaimStat.claim_count).desc(), column) \
+        .all()
+    return {(value or 'unspecified'): int(claims) for value, claims in rows}
+
+@stats_bp.route('/', methods=['GET'])
+@jwt_required()
+@conditional(table_version_source('claims'), per_user=False)
+def get_stats():
+    """Get claim statistics from the incrementally maintained counters"""
+    try:
+        query = db.session.query(ClaimStat)
+        
+        # Optional filters narrow every total and breakdown
+        for dimension in DIMENSIONS:
+            if request.args.get(dimension):
+                query = query.filter(getattr(ClaimStat, dimension) == request.args[dimension])
+        
+        stats = _totals(query)
+        breakdowns = {f'by_{dimension}': _breakdown(query, dimension) for dimension in DIMENSIONS}
+        
+        by_status = breakdowns['by_status']
+        by_claim_type = breakdowns['by_claim_type']
+        stats.update({
+            'approved_claims': by_status.get('approved', 0),
+            'pending_claims': by_status.get('pending', 0),
+            'rejected_claims': by_status.get('rejected', 0),
+            'individual_claims': by_claim_type.get('individual', 0),
+            'community_claims': by_claim_type.get('community', 0)
+        })
+        
+        return jsonify({
+            'stats': stats,
+            'breakdowns': breakdowns
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,285 @@
+import math
+import os
+import shutil
+import threading
+import time
+from typing import Iterable, Iterator, Optional, Tuple
+from flask import current_app
+from geoalchemy2.elements import WKBElement
+from geoalchemy2.shape import to_shape
+from sqlalchemy import text
+
+from api.spatial import simplification_level
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+MVT_MIMETYPE = 'application/vnd.mapbox-vector-tile'
+MAX_ZOOM = 22
+
+# Tiles deeper than this are cheap to render and too numerous to invalidate, so they are not cached
+CACHE_MAX_ZOOM = int(os.getenv('TILE_CACHE_MAX_ZOOM', 14))
+CACHE_TTL = int(os.getenv('TILE_CACHE_TTL', 86400))
+# Writes touching more cached tiles than this invalidate the whole layer instead
+INVALIDATION_LIMIT = int(os.getenv('TILE_INVALIDATION_LIMIT', 2000))
+
+# Per-layer tile queries; {scope} is replaced by the ownership filter for non-admin users
+# and {geometry} by the simplified geometry column suited to the zoom level
+TILE_LAYERS = {
+    'claims': {
+        'sql': """
+            WITH bounds AS (SELECT ST_TileEnvelope(:z, :x, :y) AS geom)
+            SELECT ST_AsMVT(tile.*, 'claims', 4096, 'geom', 'id') FROM (
+                SELECT c.id, c.claim_number, c.status, c.claim_type, c.land_area,
+                       ST_AsMVTGeom(ST_Transform(c.{geometry}, 3857), bounds.geom) AS geom
+                FROM claims c, bounds
+                WHERE c.geometry && ST_Transform(bounds.geom, 4326) {scope}
+            ) AS tile
+        """,
+        'scope': 'AND c.user_id = :user_id'
+    },
+    'assets': {
+        'sql': """
+            WITH bounds AS (SELECT ST_TileEnvelope(:z, :x, :y) AS geom)
+            SELECT ST_AsMVT(tile.*, 'assets', 4096, 'geom', 'id') FROM (
+                SELECT a.id, a.asset_name, a.asset_type, a.confidence_score, a.claim_id,
+                       ST_AsMVTGeom(ST_Transform(a.{geometry}, 3857), bounds.geom) AS geom
+                FROM assets a JOIN claims c ON c.id = a.claim_id, bounds
+                WHERE a.geometry && ST_Transform(bounds.geom, 4326) {scope}
+            ) AS tile
+        """,
+        'scope': 'AND c.user_id = :user_id'
+    }
+}
+
+def validate_tile(z: int, x: int, y: int) -> None:
+    """Reject tile coordinates outside the XYZ grid"""
+    if z > MAX_ZOOM:
+        raise ValueError(f'Zoom must be between 0 and {MAX_ZOOM}')
+    if x >= 2 ** z or y >= 2 ** z:
+        raise ValueError('Tile coordinates out of range for zoom level')
+
+def tile_scope(user) -> str:
+    """Cache scope for a user: admins share one tile set, others get their own"""
+    return 'all' if user.role == 'admin' else f'user_{user.id}'
+
+def render_tile(session, layer: str, z: int, x: int, y: int, user) -> bytes:
+    """Render one vector tile with ST_AsMVT"""
+    config = TILE_LAYERS[layer]
+    params = {'z': z, 'x': x, 'y': y}
+    level = simplification_level(zoom=z)
+    geometry = f'geometry_simplified_{level}' if level else 'geometry'
+    if user.role == 'admin':
+        sql = config['sql'].format(scope='', geometry=geometry)
+    else:
+        sql = config['sql'].format(scope=config['scope'], geometry=geometry)
+        params['user_id'] = user.id
+    tile = session.execute(text(sql), params).scalar()
+    return bytes(tile) if tile else b''
+
+def lonlat_to_tile(lon: float, lat: float, z: int) -> Tuple[int, int]:
+    """Convert a WGS84 coordinate to the XYZ tile containing it"""
+    lat = max(min(lat, 85.0511), -85.0511)
+    n = 2 ** z
+    x = int((lon + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n)
+    return min(max(x, 0), n - 1), min(max(y, 0), n - 1)
+
+def tile_ranges(bounds: Tuple[float, float, float, float],
+                max_zoom: int = CACHE_MAX_ZOOM) -> Iterator[Tuple[int, int, int, int, int]]:
+    """Yield (z, x0, x1, y0, y1) tile ranges covering a (minx, miny, maxx, maxy) box per zoom"""
+    minx, miny, maxx, maxy = bounds
+    for z in range(max_zoom + 1):
+        x0, y0 = lonlat_to_tile(minx, maxy, z)
+        x1, y1 = lonlat_to_tile(maxx, miny, z)
+        yield z, x0, x1, y0, y1
+
+def count_tiles(bounds: Tuple[float, float, float, float], max_zoom: int = CACHE_MAX_ZOOM) -> int:
+    """Number of cached tiles intersecting a box, without enumerating them"""
+    return sum((x1 - x0 + 1) * (y1 - y0 + 1) for _, x0, x1, y0, y1 in tile_ranges(bounds, max_zoom))
+
+def tiles_for_bounds(bounds: Tuple[float, float, float, float],
+                     max_zoom: int = CACHE_MAX_ZOOM) -> Iterator[Tuple[int, int, int]]:
+    """Yield every cached tile that intersects a (minx, miny, maxx, maxy) box"""
+    for z, x0, x1, y0, y1 in tile_ranges(bounds, max_zoom):
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                yield z, x, y
+
+def geometry_bounds(geometry) -> Optional[Tuple[float, float, float, float]]:
+    """Bounds of a stored WKB geometry or Shapely geometry, if any"""
+    if geometry is None:
+        return None
+    if isinstance(geometry, WKBElement):
+        geometry = to_shape(geometry)
+    return geometry.bounds
+
+def _read_generation(path: str) -> str:
+    try:
+        with open(path) as f:
+            return f.read().strip() or '0'
+    except FileNotFoundError:
+        return '0'
+
+def _write_atomic(path: str, content: bytes) -> None:
+    """Write then rename so readers never see a partial file"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+class DiskTileCache:
+    """Tile cache stored as files under layer/<layer generation>/z/x/y/<tile generation>/<scope>.pbf.
+
+    Invalidation writes a new, never reused generation and only then deletes the
+    old directories, so a tile rendered before the write and stored afterwards
+    lands in an orphaned directory that is never read.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _layer_generation_path(self, layer: str) -> str:
+        return os.path.join(self.root, layer, 'generation')
+
+    def _tile_generation_path(self, layer: str, z: int, x: int, y: int) -> str:
+        return os.path.join(self.root, layer, 'tiles', str(z), str(x), str(y), 'generation')
+
+    def _tile_path(self, layer: str, z: int, x: int, y: int, scope: str, version: str) -> str:
+        layer_generation, tile_generation = version.split('.')
+        return os.path.join(self.root, layer, layer_generation, str(z), str(x), str(y),
+                            tile_generation, f'{scope}.pbf')
+
+    def version(self, layer: str, z: int, x: int, y: int) -> str:
+        return '%s.%s' % (_read_generation(self._layer_generation_path(layer)),
+                          _read_generation(self._tile_generation_path(layer, z, x, y)))
+
+    def get(self, layer: str, z: int, x: int, y: int, scope: str, version: str) -> Optional[bytes]:
+        try:
+            with open(self._tile_path(layer, z, x, y, scope, version), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def set(self, layer: str, z: int, x: int, y: int, scope: str, version: str, tile: bytes) -> None:
+        _write_atomic(self._tile_path(layer, z, x, y, scope, version), tile)
+
+    def invalidate(self, layer: str, tiles: Iterable[Tuple[int, int, int]]) -> None:
+        layer_generation = _read_generation(self._layer_generation_path(layer))
+        for z, x, y in tiles:
+            generation_path = self._tile_generation_path(layer, z, x, y)
+            old = _read_generation(generation_path)
+            _write_atomic(generation_path, str(time.time_ns()).encode())
+            shutil.rmtree(os.path.join(self.root, layer, layer_generation, str(z), str(x), str(y), old),
+                          ignore_errors=True)
+
+    def invalidate_layer(self, layer: str) -> None:
+        current = str(time.time_ns())
+        _write_atomic(self._layer_generation_path(layer), current.encode())
+        layer_dir = os.path.join(self.root, layer)
+        for name in os.listdir(layer_dir):
+            if name not in (current, 'generation', 'tiles') and os.path.isdir(os.path.join(layer_dir, name)):
+                shutil.rmtree(os.path.join(layer_dir, name), ignore_errors=True)
+
+class RedisTileCache:
+    """Tile cache in Redis, keyed by tile and its layer and per-tile data versions.
+
+    Callers read the version once before rendering and store the tile under that
+    version, so a tile rendered from data that changed meanwhile is orphaned.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def _layer_version_key(self, layer: str) -> str:
+        return f'tiles:layer-version:{layer}'
+
+    def _version_key(self, layer: str, z: int, x: int, y: int) -> str:
+        return f'tiles:version:{layer}:{z}:{x}:{y}'
+
+    def _tile_key(self, layer: str, z: int, x: int, y: int, scope: str, version: str) -> str:
+        return f'tiles:{layer}:{z}:{x}:{y}:v{version}:{scope}'
+
+    def version(self, layer: str, z: int, x: int, y: int) -> str:
+        layer_version, tile_version = self.client.mget(self._layer_version_key(layer),
+                                                       self._version_key(layer, z, x, y))
+        return '%s.%s' % ((layer_version or b'0').decode(), (tile_version or b'0').decode())
+
+    def get(self, layer: str, z: int, x: int, y: int, scope: str, version: str) -> Optional[bytes]:
+        return self.client.get(self._tile_key(layer, z, x, y, scope, version))
+
+    def set(self, layer: str, z: int, x: int, y: int, scope: str, version: str, tile: bytes) -> None:
+        self.client.set(self._tile_key(layer, z, x, y, scope, version), tile, ex=CACHE_TTL)
+
+    def invalidate(self, layer: str, tiles: Iterable[Tuple[int, int, int]]) -> None:
+        # Bumping the version orphans every cached scope of the tile; orphans expire via TTL
+        pipe = self.client.pipeline(transaction=False)
+        for z, x, y in tiles:
+            pipe.incr(self._version_key(layer, z, x, y))
+        pipe.execute()
+
+    def invalidate_layer(self, layer: str) -> None:
+        self.client.incr(self._layer_version_key(layer))
+
+def create_tile_cache():
+    """Use Redis when REDIS_URL is configured, otherwise cache tiles on disk"""
+    redis_url = os.getenv('REDIS_URL')
+    if redis_url and redis is not None:
+        return RedisTileCache(redis.Redis.from_url(redis_url))
+    return DiskTileCache(os.getenv('TILE_CACHE_DIR', './cache/tiles'))
+
+tile_cache = create_tile_cache()
+
+def get_tile(session, layer: str, z: int, x: int, y: int, user) -> bytes:
+    """Return a vector tile from the cache, rendering and storing it on a miss"""
+    validate_tile(z, x, y)
+    scope = tile_scope(user)
+    cacheable = z <= CACHE_MAX_ZOOM
+
+    if cacheable:
+        try:
+            # Read once before rendering: a write committed meanwhile bumps the version,
+            # so the tile rendered here is stored under the old one and never served
+            version = tile_cache.version(layer, z, x, y)
+            tile = tile_cache.get(layer, z, x, y, scope, version)
+        except Exception as e:
+            # A cache outage is a miss; without a version the tile must not be stored either
+            current_app.logger.warning(f'Tile cache read failed for {layer}: {str(e)}')
+            cacheable = False
+        else:
+            if tile is not None:
+                return tile
+
+    tile = render_tile(session, layer, z, x, y, user)
+
+    if cacheable:
+        try:
+            tile_cache.set(layer, z, x, y, scope, version, tile)
+        except Exception as e:
+            current_app.logger.warning(f'Tile cache write failed for {layer}: {str(e)}')
+
+    return tile
+
+def invalidate_tiles(layer: str, *geometries) -> None:
+    """Drop cached tiles covering any of the given (old or new) geometries.
+
+    Past TILE_INVALIDATION_LIMIT tiles (large polygons, bulk writes) the whole
+    layer is invalidated at once instead of tile by tile.
+    """
+    all_bounds = [bounds for bounds in map(geometry_bounds, geometries) if bounds]
+    if not all_bounds:
+        return
+    try:
+        if sum(count_tiles(bounds) for bounds in all_bounds) > INVALIDATION_LIMIT:
+            tile_cache.invalidate_layer(layer)
+        else:
+            tiles = set()
+            for bounds in all_bounds:
+                tiles.update(tiles_for_bounds(bounds))
+            tile_cache.invalidate(layer, tiles)
+    except Exception as e:
+        # The write already committed; a cache outage must not turn it into an error
+        current_app.logger.warning(f'Tile cache invalidation failed for {layer}: {str(e)}')
@@ -34,6 +34,7 @@ from api.assets import assets_bp
 from api.dss import dss_bp
 from api.ocr import ocr_bp
 from api.satellite import satellite_bp
+from api.stats import stats_bp
 
 # Register blueprints
 app.register_blueprint(auth_bp, url_prefix='/api/auth')
@@ -42,6 +43,13 @@ app.register_blueprint(assets_bp, url_prefix='/api/assets')
 app.register_blueprint(dss_bp, url_prefix='/api/dss')
 app.register_blueprint(ocr_bp, url_prefix='/api/ocr')
 app.register_blueprint(satellite_bp, url_prefix='/api/satellite')
+app.register_blueprint(stats_bp, url_prefix='/api/stats')
+
+# Load the promoted DSS model before serving (and before workers fork, when preloaded)
+if os.getenv('MODEL_WARMUP', 'true').lower() == 'true':
+    from dss.feature_store import feature_store
+    from dss.model_registry import model_registry
+    model_registry.warm_up(sample=feature_store.feature_matrix([{}]))
 
 @app.route('/')
 def health_check():
@@ -62,7 +70,8 @@ def api_docs():
             'assets': '/api/assets',
             'dss': '/api/dss',
             'ocr': '/api/ocr',
-            'satellite': '/api/satellite'
+            'satellite': '/api/satellite',
+            'stats': '/api/stats'
         }
     })
 
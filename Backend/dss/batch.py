@@ -0,0 +1,182 @@
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+import numpy as np
+
+# Fields counted by RuleEngine._calculate_completeness_score
+COMPLETENESS_FIELDS = ['applicant_name', 'village', 'district', 'state', 'claim_type']
+
+MISSING_CODE = -2
+UNKNOWN_CODE = -1
+
+class VectorizedRules:
+    """Rule set compiled for evaluating many claims at once with NumPy.
+
+    Equality fields are factorized to integer codes over the values the rules
+    mention and the batch's rows are grouped by code, so each rule starts from
+    the rows matching its most selective equality and filters them with array
+    comparisons (np.isin for list values). Range fields become float arrays with
+    NaN for missing or non-numeric values, which fail every comparison. Matches
+    and scores are the same as RuleEngine.evaluate_claim.
+    """
+
+    def __init__(self, rules: List[Dict]):
+        self.rules = list(rules)
+        self.vocab: Dict[str, Dict[Any, int]] = {}
+        self.range_fields = set()
+        self.conditions = []
+
+        for rule in self.rules:
+            compiled = []
+            for field, value in rule.get('conditions', {}).items():
+                if isinstance(value, dict):
+                    self.range_fields.add(field)
+                    compiled.append(('range', field, value.get('min', -np.inf), value.get('max', np.inf)))
+                else:
+                    vocab = self.vocab.setdefault(field, {})
+                    options = value if isinstance(value, list) else [value]
+                    codes = np.array([vocab.setdefault(option, len(vocab)) for option in options], dtype=np.int64)
+                    compiled.append(('eq', field, codes))
+            self.conditions.append(compiled)
+
+        self.weights = np.array([rule['weight'] for rule in self.rules], dtype=np.float64)
+        # Scores rise with weight and ties keep rule order, so this is the per-claim output order
+        self.order = np.argsort(-self.weights, kind='stable')
+
+        # Each match is its rule's JSON with only match_score filled in per claim
+        self.match_prefix = []
+        for rule in self.rules:
+            static = json.dumps({
+                'rule_id': rule['id'],
+                'rule_name': rule['name'],
+                'description': rule['description'],
+                'schemes': rule['schemes'],
+                'priority': rule['priority'],
+                'weight': rule['weight']
+            })
+            self.match_prefix.append(static[:-1] + ', "match_score": ')
+
+    @property
+    def fields(self) -> List[str]:
+        """Claim fields the rules and scoring read"""
+        return sorted(set(self.vocab) | self.range_fields | set(COMPLETENESS_FIELDS) | {'land_area'})
+
+    def unevaluable(self, available: Iterable[str]) -> List[int]:
+        """Positions of rules constraining a field outside available; they can never match such claims"""
+        available = set(available)
+        return [position for position, conditions in enumerate(self.conditions)
+                if any(condition[1] not in available for condition in conditions)]
+
+    def _codes(self, field: str, claims: Sequence[Dict]) -> np.ndarray:
+        vocab = self.vocab[field]
+        codes = np.empty(len(claims), dtype=np.int64)
+        for i, claim in enumerate(claims):
+            if field not in claim:
+                codes[i] = MISSING_CODE
+                continue
+            try:
+                codes[i] = vocab.get(claim[field], UNKNOWN_CODE)
+            except TypeError:
+                codes[i] = UNKNOWN_CODE
+        return codes
+
+    @staticmethod
+    def _numbers(field: str, claims: Sequence[Dict]) -> np.ndarray:
+        values = [claim.get(field) for claim in claims]
+        return np.array([value if isinstance(value, (int, float)) else np.nan for value in values],
+                        dtype=np.float64)
+
+    def _bonus(self, claims: Sequence[Dict], land_area: np.ndarray) -> np.ndarray:
+        """Per-claim score added to each matched rule's weight (see RuleEngine._claim_score_bonus)"""
+        area = np.where(land_area > 0, np.minimum(land_area / 10.0, 1.0), 0.0)
+        filled = np.zeros(len(claims), dtype=np.float64)
+        for field in COMPLETENESS_FIELDS:
+            filled += np.fromiter((bool(claim.get(field)) for claim in claims), dtype=bool, count=len(claims))
+        return area * 0.1 + filled / len(COMPLETENESS_FIELDS) * 0.2
+
+    def _matches(self, claims: Sequence[Dict]) -> Tuple[List[int], List[float], np.ndarray]:
+        """All matches as flat rule and score lists grouped by claim, plus per-claim offsets"""
+        count = len(claims)
+        codes = {field: self._codes(field, claims) for field in self.vocab}
+        numbers = {field: self._numbers(field, claims) for field in self.range_fields}
+        land_area = numbers['land_area'] if 'land_area' in numbers else self._numbers('land_area', claims)
+        bonus = self._bonus(claims, land_area)
+
+        # Rows grouped by code per equality field, so a rule starts from the rows
+        # that can satisfy its most selective equality condition
+        groups = {}
+        for field, column in codes.items():
+            order = np.argsort(column, kind='stable')
+            groups[field] = (order, column[order])
+
+        def candidates(condition) -> np.ndarray:
+            order, sorted_codes = groups[condition[1]]
+            starts = np.searchsorted(sorted_codes, condition[2], side='left')
+            ends = np.searchsorted(sorted_codes, condition[2], side='right')
+            return np.concatenate([order[start:end] for start, end in zip(starts, ends)])
+
+        claim_hits, rule_hits = [], []
+        everything = np.arange(count)
+        for position in self.order:
+            conditions = self.conditions[position]
+            equalities = [condition for condition in conditions if condition[0] == 'eq']
+            # An empty list of allowed values matches no claim
+            if any(not len(condition[2]) for condition in equalities):
+                continue
+            if equalities:
+                seed = min(equalities, key=lambda condition: sum(
+                    np.searchsorted(groups[condition[1]][1], condition[2], side='right')
+                    - np.searchsorted(groups[condition[1]][1], condition[2], side='left')))
+                rows = candidates(seed)
+            else:
+                seed, rows = None, everything
+
+            for condition in conditions:
+                if condition is seed or not len(rows):
+                    continue
+                if condition[0] == 'eq':
+                    column, wanted = codes[condition[1]][rows], condition[2]
+                    rows = rows[column == wanted[0] if len(wanted) == 1 else np.isin(column, wanted)]
+                else:
+                    column = numbers[condition[1]][rows]
+                    rows = rows[(column >= condition[2]) & (column <= condition[3])]
+
+            if len(rows):
+                claim_hits.append(rows)
+                rule_hits.append(np.full(len(rows), position, dtype=np.int64))
+
+        if not claim_hits:
+            return [], [], np.zeros(count + 1, dtype=np.int64)
+
+        claim_idx = np.concatenate(claim_hits)
+        rule_idx = np.concatenate(rule_hits)
+        # Stable sort by claim keeps the weight order the rules were visited in
+        by_claim = np.argsort(claim_idx, kind='stable')
+        claim_idx, rule_idx = claim_idx[by_claim], rule_idx[by_claim]
+        scores = np.minimum(self.weights[rule_idx] + bonus[claim_idx], 1.0)
+        offsets = np.searchsorted(claim_idx, np.arange(count + 1), side='left')
+        return rule_idx.tolist(), scores.tolist(), offsets
+
+    def evaluate(self, claims: Sequence[Dict]) -> List[List[Tuple[int, float]]]:
+        """For each claim, its (rule index, match score) pairs in evaluate_claim order"""
+        rules, scores, offsets = self._matches(claims)
+        bounds = offsets.tolist()
+        return [list(zip(rules[bounds[i]:bounds[i + 1]], scores[bounds[i]:bounds[i + 1]]))
+                for i in range(len(claims))]
+
+    def encode(self, ids: Sequence[Any], claims: Sequence[Dict]) -> Iterator[str]:
+        """Evaluate a batch and yield one pre-encoded {"id", "matches"} JSON object per claim"""
+        rules, scores, offsets = self._matches(claims)
+        bounds = offsets.tolist()
+        prefix = self.match_prefix
+        for i, claim_id in enumerate(ids):
+            lo, hi = bounds[i], bounds[i + 1]
+            body = ','.join([prefix[rule] + repr(score) + '}' for rule, score in zip(rules[lo:hi], scores[lo:hi])])
+            yield '{"id": %s, "matches": [%s]}' % (json.dumps(claim_id), body)
+
+def table_columns(table, fields: Iterable[str]) -> List[Any]:
+    """The claims table columns among the rule fields, plus id"""
+    return [table.c.id] + [table.c[field] for field in fields if field in table.c and field != 'id']
+
+def rows_to_claims(rows: Iterable[Any]) -> List[Dict]:
+    """Turn selected claim rows into dicts shaped like Claim.to_dict() for the rule fields"""
+    return [dict(row._mapping) for row in rows]
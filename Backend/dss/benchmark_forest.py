@@ -0,0 +1,81 @@
+"""Benchmark single-row DSS predictions on the flat forest against scikit-learn.
+
+Usage: python -m dss.benchmark_forest [--samples 5000] [--trees 100] [--queries 500]
+"""
+import argparse
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from dss.feature_store import FEATURE_NAMES
+from dss.forest import FlatForest, top_k
+
+def synthetic_training_set(samples: int, rng: np.random.Generator):
+    """Feature rows in the ranges of the feature store, labelled by a few noisy thresholds"""
+    X = np.column_stack([
+        rng.uniform(0, 60, samples),          # land_area
+        rng.integers(0, 2, samples),          # claim_type_encoded
+        rng.uniform(100, 10000, samples),     # village_population
+        rng.uniform(0.1, 1.0, samples),       # district_development_index
+        rng.uniform(50000, 200000, samples),  # state_gdp_per_capita
+        rng.uniform(0, 50, samples),          # distance_to_forest
+        rng.uniform(0.1, 1.0, samples),       # soil_quality
+        rng.uniform(0.1, 1.0, samples)        # water_availability
+    ])
+    y = (X[:, 0] > 10).astype(int) + 2 * X[:, 1].astype(int) + (X[:, 5] < 10) * 4
+    noise = rng.random(samples) < 0.1
+    y[noise] = rng.integers(0, y.max() + 1, noise.sum())
+    return X, y
+
+def timed(fn, rows) -> float:
+    start = time.perf_counter()
+    for row in rows:
+        fn(row)
+    return (time.perf_counter() - start) / len(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--samples', type=int, default=5000)
+    parser.add_argument('--trees', type=int, default=100)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    X, y = synthetic_training_set(args.samples, rng)
+    model = RandomForestClassifier(n_estimators=args.trees, random_state=args.seed, n_jobs=-1).fit(X, y)
+
+    start = time.perf_counter()
+    forest = FlatForest.from_sklearn(model)
+    compile_time = time.perf_counter() - start
+
+    queries = [X[i:i + 1] for i in rng.integers(0, len(X), args.queries)]
+
+    expected = model.predict_proba(np.vstack(queries))
+    if not np.allclose(forest.predict_proba(np.vstack(queries)), expected):
+        raise SystemExit('Flat forest and scikit-learn probabilities disagree')
+
+    def sklearn_parallel(row):
+        # What predict_schemes used to do: two forest passes with n_jobs=-1
+        model.predict(row)
+        model.predict_proba(row)
+
+    def flat(row):
+        top_k(forest.predict_proba(row)[0], 3)
+
+    parallel_time = timed(sklearn_parallel, queries)
+    model.n_jobs = None
+    serial_time = timed(lambda row: model.predict_proba(row), queries)
+    flat_time = timed(flat, queries)
+
+    print(f'{args.trees} trees, {forest.value.shape[0]} nodes, depth {forest.depth}, '
+          f'{len(FEATURE_NAMES)} features, {forest.n_classes} classes')
+    print(f'compile:                 {compile_time * 1000:.1f} ms')
+    print(f'sklearn predict+proba:   {parallel_time * 1e6:.0f} us/row (n_jobs=-1)')
+    print(f'sklearn predict_proba:   {serial_time * 1e6:.0f} us/row (n_jobs=None)')
+    print(f'flat forest + top-k:     {flat_time * 1e6:.0f} us/row')
+    print(f'speedup: {parallel_time / flat_time:.1f}x vs before, {serial_time / flat_time:.1f}x vs serial sklearn')
+
+if __name__ == '__main__':
+    main()
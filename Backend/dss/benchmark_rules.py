@@ -0,0 +1,100 @@
+"""Benchmark the compiled rule index and vectorized batch evaluation against the linear rule scan.
+
+Usage: python -m dss.benchmark_rules [--rules 5000] [--claims 2000]
+"""
+import argparse
+import random
+import time
+from typing import Dict, List
+
+from dss.engine import RuleEngine
+
+STATES = ['Madhya Pradesh', 'Odisha', 'Chhattisgarh', 'Jharkhand', 'Maharashtra', 'Telangana']
+CLAIM_TYPES = ['individual', 'community']
+LAND_TYPES = ['forest', 'agricultural', 'grazing', 'water_body']
+
+def synthetic_rules(count: int, rng: random.Random) -> List[Dict]:
+    """State- and district-specific rules shaped like the default rule set"""
+    rules = []
+    for i in range(count):
+        state = rng.choice(STATES)
+        conditions = {
+            'state': state,
+            'district': f'{state} District {rng.randrange(30)}',
+            'land_area': {'min': round(rng.uniform(0, 5), 1), 'max': round(rng.uniform(5, 50), 1)}
+        }
+        if rng.random() < 0.7:
+            conditions['claim_type'] = rng.choice(CLAIM_TYPES)
+        if rng.random() < 0.5:
+            conditions['land_type'] = rng.sample(LAND_TYPES, rng.randint(1, 2))
+        rules.append({
+            'id': f'bench_{i:05d}',
+            'name': f'Benchmark rule {i}',
+            'description': 'Synthetic rule',
+            'conditions': conditions,
+            'schemes': ['forest_development'],
+            'priority': 'medium',
+            'weight': round(rng.uniform(0.5, 0.95), 2)
+        })
+    return rules
+
+def synthetic_claims(count: int, rng: random.Random) -> List[Dict]:
+    claims = []
+    for _ in range(count):
+        state = rng.choice(STATES)
+        claims.append({
+            'applicant_name': 'Applicant',
+            'village': 'Village',
+            'state': state,
+            'district': f'{state} District {rng.randrange(30)}',
+            'claim_type': rng.choice(CLAIM_TYPES),
+            'land_type': rng.choice(LAND_TYPES),
+            'land_area': round(rng.uniform(0, 60), 2)
+        })
+    return claims
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rules', type=int, default=5000)
+    parser.add_argument('--claims', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    engine = RuleEngine()
+    engine.rules = synthetic_rules(args.rules, rng)
+
+    start = time.perf_counter()
+    engine.mark_changed()
+    compile_time = time.perf_counter() - start
+
+    claims = synthetic_claims(args.claims, rng)
+
+    start = time.perf_counter()
+    linear = [engine.evaluate_claim_linear(claim) for claim in claims]
+    linear_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = [engine.evaluate_claim(claim) for claim in claims]
+    indexed_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = engine.vectorized.evaluate(claims)
+    batch_time = time.perf_counter() - start
+
+    if indexed != linear:
+        raise SystemExit('Indexed and linear evaluation disagree')
+    expected = [[(match['rule_id'], match['match_score']) for match in result] for result in linear]
+    if [[(engine.rules[rule]['id'], score) for rule, score in result] for result in batch] != expected:
+        raise SystemExit('Vectorized and linear evaluation disagree')
+
+    matches = sum(len(result) for result in indexed)
+    print(f'{args.rules} rules, {args.claims} claims, {matches} matches')
+    print(f'compile: {compile_time * 1000:.1f} ms')
+    print(f'linear:  {linear_time * 1000:.1f} ms ({linear_time / args.claims * 1e6:.1f} us/claim)')
+    print(f'indexed: {indexed_time * 1000:.1f} ms ({indexed_time / args.claims * 1e6:.1f} us/claim)')
+    print(f'batch:   {batch_time * 1000:.1f} ms ({batch_time / args.claims * 1e6:.1f} us/claim)')
+    print(f'speedup: {linear_time / indexed_time:.1f}x indexed, {linear_time / batch_time:.1f}x batch')
+
+if __name__ == '__main__':
+    main()
@@ -1,20 +1,107 @@
+import hashlib
 import json
 import os
-from typing import Dict, List, Any, Tuple
-from flask import Blueprint, request, jsonify
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from flask_jwt_extended import jwt_required
+from sqlalchemy import select
 from api.models import Claim, Scheme, db
+from api.conditional import conditional
+from api.authz import current_principal
+from api.serialization import json_list_response
+from dss.rule_index import CompiledRules
+from dss.batch import COMPLETENESS_FIELDS, VectorizedRules, table_columns, rows_to_claims
+from dss.feature_store import feature_store, CLAIM_FIELDS, FEATURE_NAMES
+from dss.rule_store import (RULES_CHECK_INTERVAL, RULES_LISTEN, RuleChangeListener, RuleStore,
+                             rule_store, validate_rule)
+from dss.model_registry import LoadedModel, ModelRegistry, model_registry
+from dss.forest import FlatForest, top_k, top_k_rows
+import click
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import LabelEncoder
-import joblib
 
 dss_bp = Blueprint('dss', __name__)
 
+BATCH_CHUNK_SIZE = 5000
+MAX_BATCH_CLAIMS = 10000
+MAX_BATCH_PAGE_SIZE = 10000
+BATCH_FILTER_FIELDS = ['state', 'district', 'village', 'status', 'claim_type']
+# Claims per forest pass in batch prediction; bounds the (claims x trees x classes) working set
+PREDICT_CHUNK_SIZE = 1000
+MAX_TOP_K = 10
+N_ESTIMATORS = 100
+# Trees added per warm-start step while training, between progress reports
+TREE_STEP = 10
+
 class RuleEngine:
     """Rule-based decision support system"""
     
-    def __init__(self):
+    def __init__(self, store: RuleStore = rule_store, check_interval: float = RULES_CHECK_INTERVAL,
+                 listen: bool = RULES_LISTEN):
+        self.store = store
+        self.check_interval = check_interval
+        self.listen = listen
+        # Served until the rules table is first read
         self.rules = self._load_rules()
+        self.mark_changed()
+        self.reset()
+    
+    def reset(self) -> None:
+        """Fresh lock, listener and check clock, e.g. in a freshly forked worker"""
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._listener = None
+    
+    def mark_changed(self, version: Optional[str] = None, last_modified: Optional[datetime] = None):
+        """Recompile the rule index after the rule set changes and record its version"""
+        index = CompiledRules(self.rules)
+        vectorized = VectorizedRules(self.rules)
+        if version is None:
+            payload = json.dumps(self.rules, sort_keys=True).encode('utf-8')
+            version = hashlib.sha1(payload).hexdigest()
+        self.index, self.vectorized = index, vectorized
+        self.version = version
+        self.last_modified = last_modified or datetime.now(timezone.utc)
+    
+    def _notified(self) -> None:
+        # Called from the listener thread; the next request re-reads the version
+        self._checked_at = 0.0
+    
+    def _start_listener(self, session) -> None:
+        self._listener = RuleChangeListener(session.get_bind().url, self._notified).start()
+    
+    def refresh(self, session, force: bool = False) -> None:
+        """Recompile from the rules table if its version moved since the last check.
+
+        The version is read at most once per check interval, or on the next call
+        after a NOTIFY. An empty table is seeded from rules.json or the defaults.
+        """
+        if not force and time.monotonic() - self._checked_at < self.check_interval:
+            return
+        with self._lock:
+            if not force and time.monotonic() - self._checked_at < self.check_interval:
+                return
+            if self.listen and self._listener is None:
+                self._start_listener(session)
+            self._checked_at = time.monotonic()
+            
+            version, _ = self.store.version(session)
+            if version is not None and str(version) == self.version:
+                return
+            version, last_modified, rules = self.store.load(session)
+            if not rules and self.store.seed(session, self._load_rules()):
+                session.commit()
+                version, last_modified, rules = self.store.load(session)
+            self.rules = rules
+            self.mark_changed(str(version), last_modified)
+    
+    def version_info(self) -> Tuple[str, datetime]:
+        """Current rules version and modification time, for conditional GET"""
+        return self.version, self.last_modified
     
     def _load_rules(self) -> List[Dict]:
         """Load decision rules from file"""
@@ -26,7 +113,11 @@ class RuleEngine:
             return self._get_default_rules()
     
     def _get_default_rules(self) -> List[Dict]:
-        """Get default rules for FRA scheme matching"""
+        """Get default rules for FRA scheme matching.
+
+        They only condition on claims table columns, so out of the box they can
+        label training data and evaluate claims selected by a batch filter.
+        """
         return [
             {
                 "id": "rule_001",
@@ -34,8 +125,7 @@ class RuleEngine:
                 "description": "Match individual forest rights claimants to forest development schemes",
                 "conditions": {
                     "claim_type": "individual",
-                    "land_area": {"min": 0.1, "max": 4.0},
-                    "land_type": "forest"
+                    "land_area": {"min": 0.1, "max": 4.0}
                 },
                 "schemes": ["forest_development", "livelihood_support"],
                 "priority": "high",
@@ -47,8 +137,7 @@ class RuleEngine:
                 "description": "Match community forest rights claimants to community development schemes",
                 "conditions": {
                     "claim_type": "community",
-                    "land_area": {"min": 1.0, "max": 1000.0},
-                    "land_type": "forest"
+                    "land_area": {"min": 1.0, "max": 1000.0}
                 },
                 "schemes": ["community_forest_management", "ecotourism", "forest_protection"],
                 "priority": "high",
@@ -56,10 +145,11 @@ class RuleEngine:
             },
             {
                 "id": "rule_003",
-                "name": "Agricultural Land Rights",
-                "description": "Match agricultural land claimants to agricultural schemes",
+                "name": "Recognised Individual Holdings",
+                "description": "Match approved individual claims on cultivable holdings to agricultural schemes",
                 "conditions": {
-                    "land_type": "agricultural",
+                    "claim_type": "individual",
+                    "status": "approved",
                     "land_area": {"min": 0.5, "max": 10.0}
                 },
                 "schemes": ["agricultural_support", "irrigation", "crop_insurance"],
@@ -69,10 +159,10 @@ class RuleEngine:
             {
                 "id": "rule_004",
                 "name": "Small Landholders",
-                "description": "Match small landholders to micro-finance and skill development schemes",
+                "description": "Match small individual landholders to micro-finance and skill development schemes",
                 "conditions": {
-                    "land_area": {"max": 1.0},
-                    "income_level": "low"
+                    "claim_type": "individual",
+                    "land_area": {"max": 1.0}
                 },
                 "schemes": ["micro_finance", "skill_development", "women_empowerment"],
                 "priority": "medium",
@@ -80,11 +170,11 @@ class RuleEngine:
             },
             {
                 "id": "rule_005",
-                "name": "Tribal Communities",
-                "description": "Match tribal communities to tribal development schemes",
+                "name": "Recognised Community Rights",
+                "description": "Match communities with approved rights to tribal development schemes",
                 "conditions": {
-                    "community_type": "tribal",
-                    "claim_type": "community"
+                    "claim_type": "community",
+                    "status": "approved"
                 },
                 "schemes": ["tribal_development", "cultural_preservation", "education_support"],
                 "priority": "high",
@@ -94,21 +184,31 @@ class RuleEngine:
     
     def evaluate_claim(self, claim_data: Dict) -> List[Dict]:
         """Evaluate claim against rules and return matching schemes"""
+        return self._rank_matches(claim_data, self.index.matching_rules(claim_data))
+    
+    def evaluate_claim_linear(self, claim_data: Dict) -> List[Dict]:
+        """Evaluate claim by checking every rule in turn; the reference for the rule index"""
+        rules = [rule for rule in self.rules if self._check_conditions(claim_data, rule['conditions'])]
+        return self._rank_matches(claim_data, rules)
+    
+    def _rank_matches(self, claim_data: Dict, rules: List[Dict]) -> List[Dict]:
+        """Score matched rules and order them by match score and weight"""
         matches = []
+        # The claim-dependent part of the score is the same for every rule
+        claim_bonus = self._claim_score_bonus(claim_data)
         
-        for rule in self.rules:
-            if self._check_conditions(claim_data, rule['conditions']):
-                match_score = self._calculate_match_score(claim_data, rule)
-                
-                matches.append({
-                    'rule_id': rule['id'],
-                    'rule_name': rule['name'],
-                    'description': rule['description'],
-                    'schemes': rule['schemes'],
-                    'priority': rule['priority'],
-                    'match_score': match_score,
-                    'weight': rule['weight']
-                })
+        for rule in rules:
+            match_score = min(rule['weight'] + claim_bonus, 1.0)  # Cap at 1.0
+            
+            matches.append({
+                'rule_id': rule['id'],
+                'rule_name': rule['name'],
+                'description': rule['description'],
+                'schemes': rule['schemes'],
+                'priority': rule['priority'],
+                'match_score': match_score,
+                'weight': rule['weight']
+            })
         
         # Sort by match score and priority
         matches.sort(key=lambda x: (x['match_score'], x['weight']), reverse=True)
@@ -137,9 +237,9 @@ class RuleEngine:
         
         return True
     
-    def _calculate_match_score(self, claim_data: Dict, rule: Dict) -> float:
-        """Calculate match score for a rule"""
-        base_score = rule['weight']
+    def _claim_score_bonus(self, claim_data: Dict) -> float:
+        """Score added to a matched rule's weight for land area and claim completeness"""
+        base_score = 0.0
         
         # Adjust score based on land area
         if 'land_area' in claim_data:
@@ -153,7 +253,7 @@ class RuleEngine:
         completeness_score = self._calculate_completeness_score(claim_data)
         base_score += completeness_score * 0.2
         
-        return min(base_score, 1.0)  # Cap at 1.0
+        return base_score
     
     def _calculate_completeness_score(self, claim_data: Dict) -> float:
         """Calculate completeness score for claim data"""
@@ -165,25 +265,17 @@ class RuleEngine:
 class MLDSS:
     """Machine Learning-based Decision Support System"""
     
-    def __init__(self):
-        self.model = None
-        self.label_encoder = LabelEncoder()
-        self.feature_names = [
-            'land_area', 'claim_type_encoded', 'village_population',
-            'district_development_index', 'state_gdp_per_capita',
-            'distance_to_forest', 'soil_quality', 'water_availability'
-        ]
+    def __init__(self, registry: ModelRegistry = model_registry):
+        self.registry = registry
+        self.feature_names = list(FEATURE_NAMES)
     
     def prepare_training_data(self, claims: List[Dict], scheme_matches: List[Dict]) -> Tuple[np.ndarray, np.ndarray]:
         """Prepare training data for ML model"""
-        features = []
+        # Features for all claims in one vectorized join against the feature store
+        features = feature_store.feature_matrix(claims)
         labels = []
         
-        for claim, matches in zip(claims, scheme_matches):
-            # Extract features
-            feature_vector = self._extract_features(claim)
-            features.append(feature_vector)
-            
+        for matches in scheme_matches:
             # Extract label (most relevant scheme)
             if matches:
                 best_match = matches[0]
@@ -191,106 +283,121 @@ class MLDSS:
             else:
                 labels.append('no_match')
         
-        return np.array(features), np.array(labels)
+        return features, np.array(labels)
     
     def _extract_features(self, claim_data: Dict) -> List[float]:
         """Extract features from claim data"""
-        features = []
-        
-        # Land area
-        features.append(claim_data.get('land_area', 0.0))
-        
-        # Claim type (encoded)
-        claim_type = claim_data.get('claim_type', 'individual')
-        claim_type_encoded = 1 if claim_type == 'community' else 0
-        features.append(claim_type_encoded)
-        
-        # Mock additional features (in production, these would come from external data)
-        features.append(np.random.uniform(100, 10000))  # Village population
-        features.append(np.random.uniform(0.1, 1.0))    # District development index
-        features.append(np.random.uniform(50000, 200000))  # State GDP per capita
-        features.append(np.random.uniform(0, 50))        # Distance to forest (km)
-        features.append(np.random.uniform(0.1, 1.0))     # Soil quality
-        features.append(np.random.uniform(0.1, 1.0))     # Water availability
-        
-        return features
+        return feature_store.feature_matrix([claim_data])[0].tolist()
     
     def train_model(self, claims: List[Dict], scheme_matches: List[Dict]) -> Dict[str, Any]:
-        """Train ML model for scheme matching"""
+        """Train ML model for scheme matching and publish it as a new registry version"""
         try:
-            # Prepare data
             X, y = self.prepare_training_data(claims, scheme_matches)
-            
-            # Encode labels
-            y_encoded = self.label_encoder.fit_transform(y)
-            
-            # Train model
-            self.model = RandomForestClassifier(
-                n_estimators=100,
-                random_state=42,
-                n_jobs=-1
-            )
-            self.model.fit(X, y_encoded)
-            
-            # Evaluate
-            train_score = self.model.score(X, y_encoded)
-            
-            # Save model
-            model_path = os.path.join(os.path.dirname(__file__), 'dss_model.joblib')
-            joblib.dump({
-                'model': self.model,
-                'label_encoder': self.label_encoder,
-                'feature_names': self.feature_names
-            }, model_path)
-            
-            return {
-                'accuracy': train_score,
-                'model_path': model_path,
-                'feature_importance': self.model.feature_importances_.tolist(),
-                'classes': self.label_encoder.classes_.tolist()
-            }
-            
+            return self.fit_and_publish(X, y)
         except Exception as e:
             return {'error': str(e)}
     
+    def fit_and_publish(self, X: np.ndarray, y: np.ndarray, metadata: Optional[Dict[str, Any]] = None,
+                        progress: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        """Train the forest on a feature matrix and labels and publish it as a new registry version.
+
+        Trees are grown TREE_STEP at a time; progress(trees_built, total_trees) is
+        called after each step and may raise to abandon training.
+        """
+        # Encode labels
+        label_encoder = LabelEncoder()
+        y_encoded = label_encoder.fit_transform(y)
+        if len(label_encoder.classes_) < 2:
+            # A one-class forest answers the same scheme with confidence 1.0; never publish it
+            raise ValueError('Training data needs at least two distinct labels')
+        
+        # Train model
+        model = RandomForestClassifier(
+            n_estimators=TREE_STEP,
+            random_state=42,
+            n_jobs=-1,
+            warm_start=True
+        )
+        for trees in range(TREE_STEP, N_ESTIMATORS + TREE_STEP, TREE_STEP):
+            model.n_estimators = min(trees, N_ESTIMATORS)
+            model.fit(X, y_encoded)
+            if progress:
+                progress(model.n_estimators, N_ESTIMATORS)
+        
+        # Evaluate
+        train_score = model.score(X, y_encoded)
+        
+        # Serve without thread fan-out; the flat forest is the fast path
+        model.n_jobs = None
+        model.warm_start = False
+        
+        # Publish; serving workers switch to it on their next reload check
+        version = self.registry.publish({
+            'model': model,
+            'forest': FlatForest.from_sklearn(model),
+            'label_encoder': label_encoder,
+            'feature_names': self.feature_names
+        }, metadata=dict(metadata or {}, **{
+            'accuracy': train_score,
+            'training_samples': len(X),
+            'classes': label_encoder.classes_.tolist()
+        }))
+        
+        return {
+            'accuracy': train_score,
+            'model_version': version,
+            'training_samples': len(X),
+            'feature_importance': model.feature_importances_.tolist(),
+            'classes': label_encoder.classes_.tolist()
+        }
+    
+    @staticmethod
+    def _forest(loaded: LoadedModel) -> FlatForest:
+        """The version's flat forest, compiled on first use for artifacts published without one"""
+        forest = loaded.artifact.get('forest')
+        if forest is None:
+            forest = loaded.artifact['forest'] = FlatForest.from_sklearn(loaded.artifact['model'])
+        return forest
+    
+    def encode_batch(self, loaded: LoadedModel, ids: List[Any], claims: List[Dict], k: int = 3) -> Iterator[str]:
+        """Predict a chunk of claims in one forest pass and yield one pre-encoded result per claim"""
+        if not claims:
+            return
+        probabilities = self._forest(loaded).predict_proba(feature_store.feature_matrix(claims))
+        indices, confidences = top_k_rows(probabilities, k)
+        names = [json.dumps(str(scheme)) for scheme in loaded.artifact['label_encoder'].classes_]
+        for claim_id, top_indices, top_confidences in zip(ids, indices.tolist(), confidences.tolist()):
+            top_schemes = ','.join('{"scheme": %s, "confidence": %r}' % (names[idx], confidence)
+                                   for idx, confidence in zip(top_indices, top_confidences))
+            yield '{"id": %s, "predicted_scheme": %s, "confidence": %r, "top_schemes": [%s]}' % (
+                json.dumps(claim_id), names[top_indices[0]], top_confidences[0], top_schemes)
+    
     def predict_schemes(self, claim_data: Dict) -> Dict[str, Any]:
-        """Predict schemes for a claim using ML model"""
+        """Predict schemes for a claim using the promoted ML model version"""
         try:
-            if not self.model:
-                # Load model
-                model_path = os.path.join(os.path.dirname(__file__), 'dss_model.joblib')
-                if os.path.exists(model_path):
-                    model_data = joblib.load(model_path)
-                    self.model = model_data['model']
-                    self.label_encoder = model_data['label_encoder']
-                else:
-                    return {'error': 'Model not trained yet'}
+            loaded = self.registry.current()
+            if loaded is None:
+                return {'error': 'Model not trained yet'}
+            classes = loaded.artifact['label_encoder'].classes_
             
             # Extract features
-            features = np.array([self._extract_features(claim_data)])
+            features = feature_store.feature_matrix([claim_data])
             
-            # Predict
-            prediction = self.model.predict(features)[0]
-            probabilities = self.model.predict_proba(features)[0]
+            # One probability pass over the flat forest
+            probabilities = self._forest(loaded).predict_proba(features)[0]
             
-            # Get scheme name
-            scheme_name = self.label_encoder.inverse_transform([prediction])[0]
-            
-            # Get top 3 predictions
-            top_indices = np.argsort(probabilities)[-3:][::-1]
-            top_schemes = []
-            for idx in top_indices:
-                scheme = self.label_encoder.inverse_transform([idx])[0]
-                confidence = probabilities[idx]
-                top_schemes.append({
-                    'scheme': scheme,
-                    'confidence': float(confidence)
-                })
+            # Get top 3 predictions; the first is the predicted scheme
+            top_indices, confidences = top_k(probabilities, 3)
+            top_schemes = [
+                {'scheme': str(classes[idx]), 'confidence': float(confidence)}
+                for idx, confidence in zip(top_indices, confidences)
+            ]
             
             return {
-                'predicted_scheme': scheme_name,
-                'confidence': float(probabilities[prediction]),
-                'top_schemes': top_schemes
+                'predicted_scheme': top_schemes[0]['scheme'],
+                'confidence': top_schemes[0]['confidence'],
+                'top_schemes': top_schemes,
+                'model_version': loaded.version
             }
             
         except Exception as e:
@@ -300,6 +407,23 @@ class MLDSS:
 rule_engine = RuleEngine()
 ml_dss = MLDSS()
 
+# The listener thread does not survive a fork; each worker starts its own
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=rule_engine.reset)
+
+@dss_bp.before_request
+def refresh_rules():
+    """Keep this worker's compiled rules in step with the rules table.
+
+    A failed check (database down, rules table not migrated yet) must not take
+    down the DSS endpoints: the last compiled rules keep being served.
+    """
+    try:
+        rule_engine.refresh(db.session)
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.warning(f'Rule refresh failed, serving rules version {rule_engine.version}: {str(e)}')
+
 @dss_bp.route('/evaluate-claim', methods=['POST'])
 def evaluate_claim():
     """Evaluate claim using rule-based system"""
@@ -322,6 +446,129 @@ def evaluate_claim():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def chunked(items: List[Any], size: int) -> Iterator[Tuple[int, List[Any]]]:
+    """(start offset, slice) pairs covering items in slices of at most size"""
+    for start in range(0, len(items), size):
+        yield start, items[start:start + size]
+
+def batch_claims_query(data: Dict, user, fields: List[str]):
+    """Select the given claim fields (plus id) for a batch request's filter, in id order.
+
+    As in GET /api/claims, only admins sweep every claim; other users only their own.
+    """
+    filters = data.get('filter')
+    if not isinstance(filters, dict) or not filters:
+        raise ValueError('Provide claims or a filter')
+    unknown = [field for field in filters if field not in BATCH_FILTER_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown filter fields: {', '.join(unknown)}")
+    
+    query = select(*table_columns(Claim.__table__, fields))
+    query = query.where(*[getattr(Claim, field) == value for field, value in filters.items()])
+    if user.role != 'admin':
+        query = query.where(Claim.user_id == user.id)
+    return query.order_by(Claim.id)
+
+def batch_claims_page(data: Dict, query) -> Tuple[List[Dict], bool]:
+    """One id-keyset page of a batch query (cursor, limit) and whether more rows follow"""
+    try:
+        after = int(data.get('cursor') or 0)
+        limit = max(1, min(int(data.get('limit', BATCH_CHUNK_SIZE)), MAX_BATCH_PAGE_SIZE))
+    except (TypeError, ValueError):
+        raise ValueError('cursor and limit must be integers')
+    claims = rows_to_claims(db.session.execute(query.where(Claim.id > after).limit(limit + 1)))
+    return claims[:limit], len(claims) > limit
+
+def batch_claims_chunks(query) -> Iterator[List[Dict]]:
+    """All rows of a batch query, fetched and yielded BATCH_CHUNK_SIZE claims at a time"""
+    rows = db.session.execute(query.execution_options(yield_per=BATCH_CHUNK_SIZE))
+    for chunk in rows.partitions():
+        yield rows_to_claims(chunk)
+
+def stream_batch(header: Dict, encoded_chunks: Iterator[Iterable[str]]) -> Response:
+    """Stream {**header, "results": [...]} from chunks of pre-encoded result objects"""
+    def generate():
+        yield json.dumps(header)[:-1] + (', ' if header else '') + '"results": ['
+        first = True
+        for encoded in encoded_chunks:
+            body = ','.join(encoded)
+            if body:
+                yield ('' if first else ',') + body
+                first = False
+        yield ']}'
+    
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+@dss_bp.route('/evaluate-batch', methods=['POST'])
+@jwt_required()
+def evaluate_batch():
+    """Evaluate many claims against all rules at once, from a claim list or a claims-table filter.
+
+    List mode returns every result. Filter mode pages through matching claims by id
+    (cursor, limit) or, with stream=true, streams them all. Filter mode only sees
+    claims table columns, so rules conditioned on other attributes (land_type,
+    income_level, ...) cannot match there; their ids are returned as
+    unevaluable_rules, and the request is rejected if no rule can be evaluated.
+    Send such claims inline with those attributes instead.
+    """
+    try:
+        user = current_principal()
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        data = request.get_json() or {}
+        vectorized = rule_engine.vectorized
+        
+        if 'claims' in data:
+            claims = data['claims']
+            if not isinstance(claims, list) or not all(isinstance(claim, dict) for claim in claims):
+                return jsonify({'error': 'claims must be a list of objects'}), 400
+            if len(claims) > MAX_BATCH_CLAIMS:
+                return jsonify({'error': f'At most {MAX_BATCH_CLAIMS} claims per request; use a filter for larger sweeps'}), 400
+            
+            results = []
+            for start, chunk in chunked(claims, BATCH_CHUNK_SIZE):
+                ids = [claim.get('id', start + i) for i, claim in enumerate(chunk)]
+                results.extend(vectorized.encode(ids, chunk))
+            return json_list_response('results', results, serializer=str, members={'rules_version': rule_engine.version})
+        
+        try:
+            query = batch_claims_query(data, user, vectorized.fields)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        unevaluable = vectorized.unevaluable(Claim.__table__.c.keys())
+        if len(unevaluable) == len(vectorized.rules):
+            missing = sorted(set(vectorized.fields) - set(Claim.__table__.c.keys()) - set(COMPLETENESS_FIELDS))
+            return jsonify({
+                'error': 'No rule can be evaluated from claims table columns; send the claims inline',
+                'missing_fields': missing
+            }), 400
+        header = {
+            'rules_version': rule_engine.version,
+            'unevaluable_rules': [vectorized.rules[position]['id'] for position in unevaluable]
+        }
+        
+        if data.get('stream'):
+            return stream_batch(header, (
+                vectorized.encode([claim['id'] for claim in claims], claims)
+                for claims in batch_claims_chunks(query)
+            ))
+        
+        try:
+            claims, has_more = batch_claims_page(data, query)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        results = list(vectorized.encode([claim['id'] for claim in claims], claims))
+        
+        return json_list_response('results', results, serializer=str, members=dict(header, **{
+            'next_cursor': claims[-1]['id'] if has_more else None,
+            'has_more': has_more
+        }))
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @dss_bp.route('/predict-schemes', methods=['POST'])
 def predict_schemes():
     """Predict schemes using ML model"""
@@ -340,54 +587,162 @@ def predict_schemes():
         
         return jsonify({
             'message': 'Scheme prediction completed',
-            'prediction': prediction
+            'prediction': prediction,
+            'model_version': prediction['model_version']
         }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@dss_bp.route('/predict-batch', methods=['POST'])
+@jwt_required()
+def predict_batch():
+    """Predict top-k schemes for many claims, from a claim list or a claims-table filter.
+
+    Claim lists are streamed back chunk by chunk. Filter mode pages through matching
+    claims by id (cursor, limit) or, with stream=true, streams them all. One model
+    version serves the whole response.
+    """
+    try:
+        user = current_principal()
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        
+        data = request.get_json() or {}
+        try:
+            k = max(1, min(int(data.get('top_k', 3)), MAX_TOP_K))
+        except (TypeError, ValueError):
+            return jsonify({'error': 'top_k must be an integer'}), 400
+        
+        loaded = ml_dss.registry.current()
+        if loaded is None:
+            return jsonify({'error': 'Model not trained yet'}), 503
+        header = {'model_version': loaded.version}
+        
+        def encode(ids, claims):
+            return ml_dss.encode_batch(loaded, ids, claims, k)
+        
+        if 'claims' in data:
+            claims = data['claims']
+            if not isinstance(claims, list) or not all(isinstance(claim, dict) for claim in claims):
+                return jsonify({'error': 'claims must be a list of objects'}), 400
+            if len(claims) > MAX_BATCH_CLAIMS:
+                return jsonify({'error': f'At most {MAX_BATCH_CLAIMS} claims per request; use a filter for larger sweeps'}), 400
+            
+            return stream_batch(header, (
+                encode([claim.get('id', start + i) for i, claim in enumerate(chunk)], chunk)
+                for start, chunk in chunked(claims, PREDICT_CHUNK_SIZE)
+            ))
+        
+        try:
+            query = batch_claims_query(data, user, CLAIM_FIELDS)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if data.get('stream'):
+            return stream_batch(header, (
+                encode([claim['id'] for claim in chunk], chunk)
+                for claims in batch_claims_chunks(query)
+                for _, chunk in chunked(claims, PREDICT_CHUNK_SIZE)
+            ))
+        
+        try:
+            claims, has_more = batch_claims_page(data, query)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        results = []
+        for _, chunk in chunked(claims, PREDICT_CHUNK_SIZE):
+            results.extend(encode([claim['id'] for claim in chunk], chunk))
+        
+        return json_list_response('results', results, serializer=str, members=dict(header, **{
+            'next_cursor': claims[-1]['id'] if has_more else None,
+            'has_more': has_more
+        }))
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @dss_bp.route('/train-ml-model', methods=['POST'])
+@jwt_required()
 def train_ml_model():
-    """Train ML model for scheme matching"""
+    """Queue a background job that trains the ML model on claims from the database.
+
+    An optional filter (same fields as /evaluate-batch) limits the training claims.
+    Poll /training-jobs/<job_id> for progress and metrics.
+    """
     try:
-        # Get sample data (in production, this would come from database)
-        claims = [
-            {
-                'land_area': 2.5,
-                'claim_type': 'individual',
-                'village': 'Sample Village',
-                'district': 'Sample District',
-                'state': 'Sample State'
-            },
-            {
-                'land_area': 15.0,
-                'claim_type': 'community',
-                'village': 'Community Village',
-                'district': 'Community District',
-                'state': 'Community State'
-            }
-        ]
+        user = current_principal()
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        if user.role not in ('admin', 'officer'):
+            return jsonify({'error': 'Access denied'}), 403
         
-        scheme_matches = [
-            [{'schemes': ['forest_development']}],
-            [{'schemes': ['community_forest_management']}]
-        ]
+        # Imported here: dss.training imports this module and needs Celery and Redis
+        from dss.training import train_model_job, validate_filters
         
-        # Train model
-        result = ml_dss.train_model(claims, scheme_matches)
+        data = request.get_json(silent=True) or {}
+        try:
+            filters = validate_filters(data.get('filter'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        if 'error' in result:
-            return jsonify({'error': result['error']}), 500
+        job = train_model_job.delay(filters)
         
         return jsonify({
-            'message': 'ML model trained successfully',
-            'results': result
-        }), 200
+            'message': 'Training job queued',
+            'job_id': job.id,
+            'status_url': f'/api/dss/training-jobs/{job.id}'
+        }), 202
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@dss_bp.route('/training-jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_training_job(job_id):
+    """Get a training job's state, progress and metrics"""
+    try:
+        user = current_principal()
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        if user.role not in ('admin', 'officer'):
+            return jsonify({'error': 'Access denied'}), 403
+        
+        from dss.training import job_status
+        
+        return jsonify(job_status(job_id)), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@dss_bp.route('/training-jobs/<job_id>', methods=['DELETE'])
+@jwt_required()
+def cancel_training_job(job_id):
+    """Cancel a queued or running training job"""
+    try:
+        user = current_principal()
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        if user.role not in ('admin', 'officer'):
+            return jsonify({'error': 'Access denied'}), 403
+        
+        from dss.training import job_status, request_cancel
+        
+        status = job_status(job_id)
+        if status['state'] in ('SUCCESS', 'FAILURE', 'REVOKED'):
+            return jsonify({'error': f"Job already finished ({status['state']})"}), 409
+        request_cancel(job_id)
+        
+        return jsonify({
+            'message': 'Cancellation requested',
+            'job_id': job_id
+        }), 202
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @dss_bp.route('/rules', methods=['GET'])
+@conditional(rule_engine.version_info, per_user=False)
 def get_rules():
     """Get all decision rules"""
     try:
@@ -400,29 +755,45 @@ def get_rules():
         return jsonify({'error': str(e)}), 500
 
 @dss_bp.route('/rules', methods=['POST'])
+@jwt_required()
 def add_rule():
-    """Add new decision rule"""
+    """Add new decision rule (admin only; shared by every worker)"""
     try:
+        user = current_principal()
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+        if user.role != 'admin':
+            return jsonify({'error': 'Access denied'}), 403
+        
         data = request.get_json()
         new_rule = data.get('rule')
         
         if not new_rule:
             return jsonify({'error': 'No rule provided'}), 400
         
-        # Add rule
-        rule_engine.rules.append(new_rule)
+        # Reject rules that fail to compile or evaluate before any worker loads them
+        try:
+            validate_rule(new_rule)
+        except ValueError as e:
+            return jsonify({'error': f'Invalid rule: {e}'}), 400
         
-        # Save rules
-        rules_path = os.path.join(os.path.dirname(__file__), 'rules.json')
-        with open(rules_path, 'w') as f:
-            json.dump(rule_engine.rules, f, indent=2)
+        # Add rule; the table trigger bumps the rules version and notifies every worker
+        try:
+            rule_store.add(db.session, new_rule)
+        except ValueError as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 409
+        db.session.commit()
+        rule_engine.refresh(db.session, force=True)
         
         return jsonify({
             'message': 'Rule added successfully',
-            'rule': new_rule
+            'rule': new_rule,
+            'rules_version': rule_engine.version
         }), 201
         
     except Exception as e:
+        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @dss_bp.route('/comprehensive-evaluation', methods=['POST'])
@@ -479,8 +850,28 @@ def comprehensive_evaluation():
         
         return jsonify({
             'message': 'Comprehensive evaluation completed',
-            'results': combined_result
+            'results': combined_result,
+            'rules_version': rule_engine.version,
+            'model_version': ml_prediction.get('model_version')
         }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+@dss_bp.cli.command('models')
+def list_models():
+    """List published ML model versions"""
+    current = model_registry.current_version()
+    for entry in model_registry.versions():
+        marker = '*' if entry['version'] == current else ' '
+        click.echo(f"{marker} {entry['version']}  accuracy={entry.get('accuracy')}  samples={entry.get('training_samples')}")
+
+@dss_bp.cli.command('promote-model')
+@click.argument('version')
+def promote_model(version):
+    """Serve a published ML model version (also used to roll back)"""
+    try:
+        model_registry.promote(version)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    click.echo(f'Promoted {version}; workers reload within {model_registry.reload_interval:g}s')
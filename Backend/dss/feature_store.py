@@ -0,0 +1,191 @@
+import csv
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence
+import numpy as np
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+FEATURE_STORE_DIR = os.getenv('FEATURE_STORE_DIR', os.path.join(os.path.dirname(__file__), 'features'))
+
+VILLAGE_FEATURES = ['village_population', 'distance_to_forest', 'soil_quality', 'water_availability']
+DISTRICT_FEATURES = ['district_development_index', 'state_gdp_per_capita']
+
+# Column order of the feature matrix, matching MLDSS.feature_names
+FEATURE_NAMES = [
+    'land_area', 'claim_type_encoded', 'village_population',
+    'district_development_index', 'state_gdp_per_capita',
+    'distance_to_forest', 'soil_quality', 'water_availability'
+]
+
+# Claim fields the feature matrix is built from
+CLAIM_FIELDS = ['land_area', 'claim_type', 'state', 'district', 'village']
+
+# Used for villages and districts missing from the tables, and for tables that are absent
+DEFAULTS = {
+    'village_population': 5050.0,
+    'district_development_index': 0.55,
+    'state_gdp_per_capita': 125000.0,
+    'distance_to_forest': 25.0,
+    'soil_quality': 0.55,
+    'water_availability': 0.55
+}
+
+def normalize_key(*parts) -> str:
+    """Lookup key from names, insensitive to case and surrounding whitespace"""
+    return '|'.join(str(part or '').strip().casefold() for part in parts)
+
+class FeatureTable:
+    """Numeric feature columns keyed by a string key, held as sorted NumPy arrays.
+
+    lookup() joins a whole array of keys at once with np.searchsorted; rows with
+    unknown keys get the table's fill values.
+    """
+
+    def __init__(self, keys: Sequence[str], columns: List[str], values: np.ndarray,
+                 fill: Optional[np.ndarray] = None):
+        self.columns = columns
+        keys = np.asarray(keys, dtype=str)
+        values = np.asarray(values, dtype=np.float64).reshape(len(keys), len(columns))
+
+        # Later rows win for duplicate keys
+        _, last = np.unique(keys[::-1], return_index=True)
+        keep = np.sort(len(keys) - 1 - last)
+        order = np.argsort(keys[keep], kind='stable')
+        self.keys = keys[keep][order]
+        self.values = values[keep][order]
+
+        defaults = np.array([DEFAULTS[column] for column in columns], dtype=np.float64)
+        if fill is None:
+            fill = self._medians(defaults)
+        self.fill = fill
+        # Blank cells take the column fill value so lookups never return NaN
+        self.values = np.where(np.isnan(self.values), self.fill, self.values)
+
+    def _medians(self, defaults: np.ndarray) -> np.ndarray:
+        if not len(self.values):
+            return defaults
+        return np.array([
+            np.median(column[~np.isnan(column)]) if (~np.isnan(column)).any() else default
+            for column, default in zip(self.values.T, defaults)
+        ])
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def lookup(self, keys: Sequence[str]) -> np.ndarray:
+        """Feature rows for each key, shape (len(keys), len(columns))"""
+        keys = np.asarray(keys, dtype=str)
+        if not len(self.keys):
+            return np.tile(self.fill, (len(keys), 1))
+        positions = np.searchsorted(self.keys, keys)
+        positions = np.minimum(positions, len(self.keys) - 1)
+        found = self.keys[positions] == keys
+        return np.where(found[:, None], self.values[positions], self.fill)
+
+    @classmethod
+    def empty(cls, columns: List[str]) -> 'FeatureTable':
+        return cls([], columns, np.empty((0, len(columns))))
+
+def _float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+def _read_rows(path: str) -> List[Dict]:
+    if path.endswith('.parquet'):
+        if pd is None:
+            raise RuntimeError('pandas (with pyarrow) is required to read Parquet feature tables')
+        return pd.read_parquet(path).to_dict('records')
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+def read_table(path: str, key_fields: List[str], columns: List[str]) -> FeatureTable:
+    """Load a CSV or Parquet feature table keyed by key_fields"""
+    rows = _read_rows(path)
+    keys = [normalize_key(*(row.get(field) for field in key_fields)) for row in rows]
+    values = np.array([[_float(row.get(column)) for column in columns] for row in rows], dtype=np.float64)
+    return FeatureTable(keys, columns, values)
+
+def _find_table(directory: str, name: str) -> Optional[str]:
+    for extension in ('.parquet', '.csv'):
+        path = os.path.join(directory, name + extension)
+        if os.path.exists(path):
+            return path
+    return None
+
+class FeatureStore:
+    """Village and district features for MLDSS, joined onto claims in batches.
+
+    Tables live in FEATURE_STORE_DIR as villages.(parquet|csv), keyed by state,
+    district and village, and districts.(parquet|csv), keyed by state and district,
+    since district and village names repeat across states. Unknown keys take
+    the column medians and absent tables fixed defaults, so features are always
+    deterministic.
+    """
+
+    def __init__(self, directory: str = FEATURE_STORE_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._tables = None
+
+    def load(self) -> None:
+        """(Re)load the tables from disk; readers switch over atomically"""
+        villages_path = _find_table(self.directory, 'villages')
+        districts_path = _find_table(self.directory, 'districts')
+        tables = {
+            'villages': read_table(villages_path, ['state', 'district', 'village'], VILLAGE_FEATURES)
+            if villages_path else FeatureTable.empty(VILLAGE_FEATURES),
+            'districts': read_table(districts_path, ['state', 'district'], DISTRICT_FEATURES)
+            if districts_path else FeatureTable.empty(DISTRICT_FEATURES)
+        }
+        with self._lock:
+            self._tables = tables
+
+    @property
+    def tables(self) -> Dict[str, FeatureTable]:
+        """The loaded tables, reading them from disk on first use"""
+        if self._tables is None:
+            self.load()
+        return self._tables
+
+    def feature_matrix_from_columns(self, land_area: Iterable, claim_type: Iterable, state: Iterable,
+                                    district: Iterable, village: Iterable) -> np.ndarray:
+        """Feature matrix (rows x FEATURE_NAMES) from per-claim column sequences"""
+        land_area = np.array([_float(value) for value in land_area], dtype=np.float64)
+        land_area = np.nan_to_num(land_area, nan=0.0)
+        claim_type = np.asarray(list(claim_type), dtype=object)
+        state = list(state)
+        district = list(district)
+        village = list(village)
+
+        tables = self.tables
+        village_features = tables['villages'].lookup(
+            [normalize_key(s, d, v) for s, d, v in zip(state, district, village)])
+        district_features = tables['districts'].lookup([normalize_key(s, d) for s, d in zip(state, district)])
+
+        columns = {
+            'land_area': land_area,
+            'claim_type_encoded': (claim_type == 'community').astype(np.float64)
+        }
+        for i, name in enumerate(VILLAGE_FEATURES):
+            columns[name] = village_features[:, i]
+        for i, name in enumerate(DISTRICT_FEATURES):
+            columns[name] = district_features[:, i]
+        return np.column_stack([columns[name] for name in FEATURE_NAMES])
+
+    def feature_matrix(self, claims: Sequence[Dict]) -> np.ndarray:
+        """Feature matrix for a batch of claim dicts"""
+        return self.feature_matrix_from_columns(
+            (claim.get('land_area') for claim in claims),
+            (claim.get('claim_type', 'individual') for claim in claims),
+            (claim.get('state') for claim in claims),
+            (claim.get('district') for claim in claims),
+            (claim.get('village') for claim in claims)
+        )
+
+feature_store = FeatureStore()
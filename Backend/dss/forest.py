@@ -0,0 +1,79 @@
+from typing import Tuple
+import numpy as np
+
+class FlatForest:
+    """A fitted RandomForestClassifier packed into flat NumPy node arrays.
+
+    All trees share one set of arrays indexed by global node id. Leaves point
+    to themselves, so every tree can be walked in lockstep for a fixed number
+    of steps (the deepest tree's depth) with plain array indexing, and class
+    probabilities come from a single pass with no thread pool. Results match
+    predict_proba of the source forest.
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray, right: np.ndarray,
+                 value: np.ndarray, roots: np.ndarray, depth: int):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.depth = depth
+
+    @classmethod
+    def from_sklearn(cls, model) -> 'FlatForest':
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset, depth = 0, 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            count = tree.node_count
+            ids = np.arange(offset, offset + count, dtype=np.int64)
+            leaf = tree.children_left == -1
+            features.append(np.where(leaf, 0, tree.feature).astype(np.int64))
+            thresholds.append(tree.threshold.astype(np.float64))
+            lefts.append(np.where(leaf, ids, tree.children_left + offset))
+            rights.append(np.where(leaf, ids, tree.children_right + offset))
+            # Leaf class distributions as fractions, as DecisionTreeClassifier.predict_proba does
+            counts = tree.value[:, 0, :].astype(np.float64)
+            totals = counts.sum(axis=1, keepdims=True)
+            values.append(np.divide(counts, totals, out=np.zeros_like(counts), where=totals > 0))
+            roots.append(offset)
+            offset += count
+            depth = max(depth, tree.max_depth)
+        return cls(np.concatenate(features), np.concatenate(thresholds), np.concatenate(lefts),
+                   np.concatenate(rights), np.concatenate(values), np.array(roots, dtype=np.int64), depth)
+
+    @property
+    def n_classes(self) -> int:
+        return self.value.shape[1]
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Mean leaf class distribution over all trees, shape (rows, classes)"""
+        # Trees split on float32 features, so compare the same way sklearn does
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        if X.ndim == 1:
+            X = X[None, :]
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        for step in range(1, self.depth + 1):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+            # Most paths end well short of the deepest leaf
+            if step % 8 == 0 and (self.left[nodes] == nodes).all():
+                break
+        return self.value[nodes].mean(axis=1)
+
+def top_k_rows(probabilities: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Indices and values of the k largest probabilities in each row, largest first"""
+    k = min(k, probabilities.shape[1])
+    # Sorted first so ties rank by class index, as argmax does
+    candidates = np.sort(np.argpartition(-probabilities, k - 1, axis=1)[:, :k], axis=1)
+    values = np.take_along_axis(probabilities, candidates, axis=1)
+    order = np.argsort(-values, axis=1, kind='stable')
+    return np.take_along_axis(candidates, order, axis=1), np.take_along_axis(values, order, axis=1)
+
+def top_k(probabilities: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """top_k_rows for a single row of probabilities"""
+    indices, values = top_k_rows(probabilities[None, :], k)
+    return indices[0], values[0]
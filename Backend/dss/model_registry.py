@@ -0,0 +1,180 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+import joblib
+
+MODEL_REGISTRY_DIR = os.getenv('MODEL_REGISTRY_DIR', os.path.join(os.path.dirname(__file__), 'models'))
+# Seconds between checks of the CURRENT pointer for a newly promoted version
+MODEL_RELOAD_INTERVAL = float(os.getenv('MODEL_RELOAD_INTERVAL', 5))
+MODEL_KEEP_VERSIONS = int(os.getenv('MODEL_KEEP_VERSIONS', 5))
+
+# Model file written by train_model before the registry existed
+LEGACY_MODEL_PATH = os.path.join(os.path.dirname(__file__), 'dss_model.joblib')
+
+ARTIFACT_NAME = 'model.joblib'
+METADATA_NAME = 'metadata.json'
+POINTER_NAME = 'CURRENT'
+
+# A loaded model version; the artifact dict holds model, label_encoder and feature_names
+LoadedModel = namedtuple('LoadedModel', ['version', 'artifact', 'metadata'])
+
+def _write_atomic(path: str, content: str) -> None:
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+class ModelRegistry:
+    """Versioned DSS model artifacts with atomic publish and hot reload.
+
+    Each version lives in its own directory and is never rewritten; the CURRENT
+    file names the version being served and is swapped with os.replace, so
+    readers see either the old or the new version, never a half-written file.
+    Artifacts are stored uncompressed and loaded with mmap_mode='r' so the
+    arrays stay in the page cache rather than each worker's heap. Workers notice
+    a promotion within MODEL_RELOAD_INTERVAL seconds and swap models in place.
+    """
+
+    def __init__(self, directory: str = MODEL_REGISTRY_DIR, reload_interval: float = MODEL_RELOAD_INTERVAL,
+                 keep_versions: int = MODEL_KEEP_VERSIONS):
+        self.directory = directory
+        self.reload_interval = reload_interval
+        self.keep_versions = keep_versions
+        self._loaded: Optional[LoadedModel] = None
+        self.reset()
+
+    def reset(self) -> None:
+        """Fresh lock and reload clock, e.g. in a freshly forked worker; the loaded model is kept"""
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+
+    def _path(self, *parts) -> str:
+        return os.path.join(self.directory, *parts)
+
+    def current_version(self) -> Optional[str]:
+        """The promoted version according to the CURRENT pointer"""
+        try:
+            with open(self._path(POINTER_NAME)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def versions(self) -> List[Dict[str, Any]]:
+        """Metadata of every published version, oldest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        result = []
+        for name in sorted(os.listdir(self.directory)):
+            metadata_path = self._path(name, METADATA_NAME)
+            if os.path.exists(metadata_path):
+                with open(metadata_path) as f:
+                    result.append(json.load(f))
+        return result
+
+    def publish(self, artifact: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None,
+                promote: bool = True) -> str:
+        """Write a new immutable version and optionally promote it; returns the version"""
+        os.makedirs(self.directory, exist_ok=True)
+        created = datetime.now(timezone.utc)
+        staging = self._path(f'.staging-{os.getpid()}-{threading.get_ident()}')
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        try:
+            artifact_path = os.path.join(staging, ARTIFACT_NAME)
+            # Uncompressed so the arrays can be memory-mapped on load
+            joblib.dump(artifact, artifact_path, compress=0)
+            digest = hashlib.sha1()
+            with open(artifact_path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(block)
+            version = f"{created.strftime('%Y%m%dT%H%M%S')}-{digest.hexdigest()[:8]}"
+            with open(os.path.join(staging, METADATA_NAME), 'w') as f:
+                json.dump(dict(metadata or {}, version=version, created_at=created.isoformat()), f, indent=2)
+            # Renaming the finished directory is what makes the version visible
+            os.rename(staging, self._path(version))
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        if promote:
+            self.promote(version)
+        return version
+
+    def promote(self, version: str) -> None:
+        """Point CURRENT at an existing version; every worker picks it up on its next check"""
+        if not os.path.exists(self._path(version, ARTIFACT_NAME)):
+            raise ValueError(f'Unknown model version: {version}')
+        _write_atomic(self._path(POINTER_NAME), version + '\n')
+        self._checked_at = 0.0
+        self._prune()
+
+    def _prune(self) -> None:
+        """Delete the oldest versions beyond keep_versions, never the promoted one.
+
+        Workers still mapping a deleted artifact keep their pages until they reload.
+        """
+        current = self.current_version()
+        names = [entry['version'] for entry in self.versions()]
+        for name in names[:max(0, len(names) - self.keep_versions)]:
+            if name != current:
+                shutil.rmtree(self._path(name), ignore_errors=True)
+
+    def _load(self, version: str) -> LoadedModel:
+        artifact = joblib.load(self._path(version, ARTIFACT_NAME), mmap_mode='r')
+        with open(self._path(version, METADATA_NAME)) as f:
+            metadata = json.load(f)
+        return LoadedModel(version, artifact, metadata)
+
+    def _load_legacy(self) -> Optional[LoadedModel]:
+        if not os.path.exists(LEGACY_MODEL_PATH):
+            return None
+        return LoadedModel('legacy', joblib.load(LEGACY_MODEL_PATH), {'version': 'legacy'})
+
+    def refresh(self, force: bool = False) -> Optional[LoadedModel]:
+        """Load the promoted version if it differs from the one in memory"""
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.reload_interval:
+            return self._loaded
+        with self._lock:
+            if not force and now - self._checked_at < self.reload_interval:
+                return self._loaded
+            version = self.current_version()
+            loaded = self._loaded
+            if version is None:
+                if loaded is None:
+                    loaded = self._load_legacy()
+            elif loaded is None or loaded.version != version:
+                loaded = self._load(version)
+            # Readers holding the previous LoadedModel finish with it undisturbed
+            self._loaded = loaded
+            self._checked_at = time.monotonic()
+            return loaded
+
+    def current(self) -> Optional[LoadedModel]:
+        """The model to serve, reloading at most once per reload interval"""
+        return self.refresh()
+
+    def warm_up(self, sample: Optional[Any] = None) -> Optional[str]:
+        """Load the promoted model ahead of the first request and touch its pages.
+
+        Called before workers fork, the loaded model is shared copy-on-write.
+        """
+        loaded = self.refresh(force=True)
+        if loaded is None:
+            return None
+        if sample is not None:
+            loaded.artifact['model'].predict_proba(sample)
+        return loaded.version
+
+model_registry = ModelRegistry()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=model_registry.reset)
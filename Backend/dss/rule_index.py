@@ -0,0 +1,130 @@
+import math
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List
+
+def _bits(mask: int) -> Iterator[int]:
+    """Positions of the set bits in mask, lowest first"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+class EqualityIndex:
+    """Hash dispatch for one field: value -> bitmask of rules requiring that value"""
+
+    def __init__(self):
+        self.by_value = defaultdict(int)
+        self.constrained = 0
+        self.unconstrained = 0
+
+    def add(self, position: int, value: Any) -> None:
+        bit = 1 << position
+        self.constrained |= bit
+        for option in value if isinstance(value, list) else [value]:
+            self.by_value[option] |= bit
+
+    def mask(self, claim_data: Dict, field: str) -> int:
+        if field not in claim_data:
+            return self.unconstrained
+        try:
+            return self.unconstrained | self.by_value.get(claim_data[field], 0)
+        except TypeError:
+            # Unhashable claim values (lists, dicts) never equal a rule value
+            return self.unconstrained
+
+class IntervalIndex:
+    """Closed [min, max] ranges for one field, cut into elementary slots.
+
+    Slot 2i is the open gap before the i-th distinct endpoint and slot 2i + 1 is
+    the endpoint itself, so a lookup is one bisect plus a precomputed mask.
+    """
+
+    def __init__(self):
+        self.ranges = []
+        self.constrained = 0
+        self.unconstrained = 0
+        self.points = []
+        self.masks = []
+
+    def add(self, position: int, bounds: Dict[str, float]) -> None:
+        self.constrained |= 1 << position
+        self.ranges.append((position, bounds.get('min', -math.inf), bounds.get('max', math.inf)))
+
+    def build(self) -> None:
+        self.points = sorted({value for _, low, high in self.ranges for value in (low, high)
+                              if not math.isinf(value)})
+        point_slots = {value: 2 * i + 1 for i, value in enumerate(self.points)}
+        slots = 2 * len(self.points) + 1
+        starts, ends = [0] * slots, [0] * slots
+        for position, low, high in self.ranges:
+            first = 0 if math.isinf(low) else point_slots[low]
+            last = slots - 1 if math.isinf(high) else point_slots[high]
+            if first > last:
+                continue
+            starts[first] |= 1 << position
+            ends[last] |= 1 << position
+
+        # Sweep once over the slots, carrying the set of ranges still open
+        self.masks = []
+        running = 0
+        for slot in range(slots):
+            running |= starts[slot]
+            self.masks.append(running)
+            running &= ~ends[slot]
+
+    def _slot(self, value: float) -> int:
+        i = bisect_left(self.points, value)
+        if i < len(self.points) and self.points[i] == value:
+            return 2 * i + 1
+        return 2 * i
+
+    def mask(self, claim_data: Dict, field: str) -> int:
+        value = claim_data.get(field)
+        # Missing, non-numeric and NaN values satisfy no range
+        if not isinstance(value, (int, float)) or math.isnan(value):
+            return self.unconstrained
+        return self.unconstrained | self.masks[self._slot(value)]
+
+class CompiledRules:
+    """Decision index over a rule list, compiled once per rules version.
+
+    Each field constrained by any rule gets an EqualityIndex (scalar or list
+    values) or IntervalIndex (min/max dicts). A claim's candidate rules are the
+    AND of the per-field masks, so evaluation only ever touches matching rules.
+    Matches come back in rule-list order, as from a linear scan.
+    """
+
+    def __init__(self, rules: List[Dict]):
+        self.rules = list(rules)
+        self.all_rules = (1 << len(self.rules)) - 1
+        self.equality: Dict[str, EqualityIndex] = {}
+        self.intervals: Dict[str, IntervalIndex] = {}
+
+        for position, rule in enumerate(self.rules):
+            for field, value in rule.get('conditions', {}).items():
+                if isinstance(value, dict):
+                    self.intervals.setdefault(field, IntervalIndex()).add(position, value)
+                else:
+                    self.equality.setdefault(field, EqualityIndex()).add(position, value)
+
+        for index in self.intervals.values():
+            index.build()
+        for index in list(self.equality.values()) + list(self.intervals.values()):
+            index.unconstrained = self.all_rules & ~index.constrained
+
+    def match_mask(self, claim_data: Dict) -> int:
+        mask = self.all_rules
+        for field, index in self.equality.items():
+            mask &= index.mask(claim_data, field)
+            if not mask:
+                return 0
+        for field, index in self.intervals.items():
+            mask &= index.mask(claim_data, field)
+            if not mask:
+                return 0
+        return mask
+
+    def matching_rules(self, claim_data: Dict) -> List[Dict]:
+        """Rules whose conditions the claim satisfies"""
+        return [self.rules[position] for position in _bits(self.match_mask(claim_data))]
@@ -0,0 +1,172 @@
+import os
+import select
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from datetime import datetime
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.pool import NullPool
+
+from api.models import DecisionRule
+from dss.batch import VectorizedRules
+from dss.rule_index import CompiledRules
+
+RULES_TABLE = 'decision_rules'
+# Seconds between rule version checks when no change notification arrives
+RULES_CHECK_INTERVAL = float(os.getenv('RULES_CHECK_INTERVAL', 5))
+RULES_LISTEN = os.getenv('RULES_LISTEN', 'true').lower() == 'true'
+
+RULE_FIELDS = ['id', 'name', 'description', 'conditions', 'schemes', 'priority', 'weight']
+
+VERSION_SQL = text("SELECT version, updated_at FROM table_versions WHERE table_name = 'decision_rules'")
+
+# Version and rules read by one statement, so they come from the same snapshot
+LOAD_SQL = text("""
+    SELECT v.version, v.updated_at, r.rule
+    FROM table_versions v
+    LEFT JOIN decision_rules r ON true
+    WHERE v.table_name = 'decision_rules'
+    ORDER BY r.id
+""")
+
+SEED_LOCK_SQL = text("SELECT pg_advisory_xact_lock(hashtext('decision_rules_seed'))")
+
+SCALAR_TYPES = (str, int, float, bool)
+
+def _validate_condition(field: str, value) -> None:
+    if isinstance(value, dict):
+        if not value or set(value) - {'min', 'max'}:
+            raise ValueError(f'Range condition on {field} must have min and/or max only')
+        for bound in value.values():
+            if isinstance(bound, bool) or not isinstance(bound, (int, float)):
+                raise ValueError(f'Range bounds on {field} must be numbers')
+    elif isinstance(value, list):
+        if not value:
+            raise ValueError(f'Condition on {field} must list at least one value')
+        if not all(isinstance(option, SCALAR_TYPES) for option in value):
+            raise ValueError(f'Values allowed for {field} must be strings, numbers or booleans')
+    elif not isinstance(value, SCALAR_TYPES):
+        raise ValueError(f'Condition on {field} must be a value, a list of values or a min/max range')
+
+def _sample_claim(rule: Dict) -> Dict:
+    """A claim that satisfies the rule's conditions, for a trial evaluation"""
+    claim = {}
+    for field, value in rule['conditions'].items():
+        if isinstance(value, dict):
+            claim[field] = value.get('min', value.get('max'))
+        else:
+            claim[field] = value[0] if isinstance(value, list) else value
+    return claim
+
+def validate_rule(rule) -> Dict:
+    """Check a rule's fields and condition types, then evaluate it the ways workers will.
+
+    A rule that passes is safe to share: it compiles into the rule index and the
+    batch evaluator and evaluates against a matching and an empty claim.
+    """
+    if not isinstance(rule, dict):
+        raise ValueError('rule must be an object')
+    missing = [field for field in RULE_FIELDS if field not in rule]
+    if missing:
+        raise ValueError(f"Rule is missing fields: {', '.join(missing)}")
+    if not isinstance(rule['id'], (str, int)) or isinstance(rule['id'], bool):
+        raise ValueError('id must be a string or number')
+    if not isinstance(rule['conditions'], dict):
+        raise ValueError('conditions must be an object')
+    for field, value in rule['conditions'].items():
+        _validate_condition(field, value)
+    if not isinstance(rule['schemes'], list) or not rule['schemes']:
+        raise ValueError('schemes must be a non-empty list')
+    if isinstance(rule['weight'], bool) or not isinstance(rule['weight'], (int, float)):
+        raise ValueError('weight must be a number')
+
+    claims = [_sample_claim(rule), {}]
+    try:
+        index = CompiledRules([rule])
+        for claim in claims:
+            index.matching_rules(claim)
+        batch = VectorizedRules([rule])
+        batch.evaluate(claims)
+        list(batch.encode([0, 1], claims))
+    except Exception as e:
+        raise ValueError(f'Rule cannot be evaluated: {e}')
+    return rule
+
+class RuleStore:
+    """Decision rules kept in the decision_rules table.
+
+    Every write bumps the table's row in table_versions and sends a NOTIFY on
+    the decision_rules channel (see database/init.sql), so workers can tell
+    whether their compiled rules are current with one primary-key read.
+    """
+
+    def version(self, session) -> Tuple[Optional[int], Optional[datetime]]:
+        row = session.execute(VERSION_SQL).first()
+        return (row.version, row.updated_at) if row else (None, None)
+
+    def load(self, session) -> Tuple[int, datetime, List[Dict]]:
+        """Version, modification time and rules in insertion order, as of one snapshot"""
+        rows = session.execute(LOAD_SQL).fetchall()
+        if not rows:
+            raise RuntimeError('table_versions has no decision_rules row; apply database/init.sql')
+        return rows[0].version, rows[0].updated_at, [row.rule for row in rows if row.rule is not None]
+
+    def add(self, session, rule: Dict) -> None:
+        """Insert a rule; the caller commits. Raises ValueError for invalid rules and duplicate ids"""
+        validate_rule(rule)
+        try:
+            with session.begin_nested():
+                session.add(DecisionRule(rule_id=str(rule['id']), rule=rule))
+        except IntegrityError:
+            raise ValueError(f"A rule with id {rule['id']} already exists")
+
+    def seed(self, session, rules: List[Dict]) -> bool:
+        """Fill an empty rules table, e.g. from rules.json; concurrent seeders wait on a lock"""
+        session.execute(SEED_LOCK_SQL)
+        if session.query(DecisionRule.id).first() is not None:
+            return False
+        session.add_all([DecisionRule(rule_id=str(rule['id']), rule=rule) for rule in rules])
+        return True
+
+class RuleChangeListener:
+    """Background LISTEN on the decision_rules channel, calling on_change for each notification.
+
+    Uses its own unpooled connection to the application database (psycopg2's
+    poll/notifies API). After a dropped connection it reconnects and calls
+    on_change once, since notifications sent in between are lost.
+    """
+
+    def __init__(self, url, on_change: Callable[[], None], channel: str = RULES_TABLE,
+                 retry_delay: float = 5.0):
+        self.engine = create_engine(url, poolclass=NullPool)
+        self.on_change = on_change
+        self.channel = channel
+        self.retry_delay = retry_delay
+        self._thread = threading.Thread(target=self._run, name='rule-listener', daemon=True)
+
+    def start(self) -> 'RuleChangeListener':
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        reconnect = False
+        while True:
+            try:
+                with self.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+                    connection.exec_driver_sql(f'LISTEN {self.channel}')
+                    driver = connection.connection.driver_connection
+                    if reconnect:
+                        self.on_change()
+                    while True:
+                        if select.select([driver], [], [], 60) == ([], [], []):
+                            continue
+                        driver.poll()
+                        if driver.notifies:
+                            driver.notifies.clear()
+                            self.on_change()
+            except Exception:
+                reconnect = True
+                time.sleep(self.retry_delay)
+
+rule_store = RuleStore()
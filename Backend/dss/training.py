@@ -0,0 +1,163 @@
+"""Background DSS model training on Celery, sourced from the claims table.
+
+Run a worker with: celery -A dss.training worker --concurrency=1
+"""
+import os
+from typing import Dict, List, Optional
+import numpy as np
+import redis
+from celery import Celery
+from celery.exceptions import Ignore
+from sqlalchemy import func, select
+
+from api.models import Claim, db
+from dss.batch import VectorizedRules, table_columns, rows_to_claims
+from dss.engine import BATCH_FILTER_FIELDS, ml_dss, rule_engine
+from dss.feature_store import CLAIM_FIELDS, feature_store
+
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379')
+# Claims fetched per server-side cursor round trip while building the training set
+TRAIN_CHUNK_SIZE = int(os.getenv('DSS_TRAIN_CHUNK_SIZE', 20000))
+CANCEL_TTL = 86400
+NO_MATCH = 'no_match'
+# Claims that must match a rule before a job may train and publish a model
+MIN_LABELLED_CLAIMS = int(os.getenv('DSS_MIN_LABELLED_CLAIMS', 100))
+
+celery_app = Celery('fra_dss', broker=REDIS_URL, backend=REDIS_URL)
+celery_app.conf.update(
+    task_track_started=True,
+    worker_prefetch_multiplier=1,
+    result_extended=True
+)
+
+class TrainingCancelled(Exception):
+    """Cancellation was requested while the job was running"""
+
+def _redis() -> redis.Redis:
+    return redis.Redis.from_url(REDIS_URL)
+
+def _cancel_key(job_id: str) -> str:
+    return f'dss:training:{job_id}:cancel'
+
+def request_cancel(job_id: str) -> None:
+    """Stop a queued job from starting and ask a running one to stop at its next checkpoint"""
+    _redis().set(_cancel_key(job_id), 1, ex=CANCEL_TTL)
+    celery_app.control.revoke(job_id)
+
+def cancel_requested(job_id: str) -> bool:
+    return bool(_redis().exists(_cancel_key(job_id)))
+
+def training_query(vectorized: VectorizedRules, filters: Dict[str, str]):
+    """Claims-table select of the rule and feature fields for the claims to train on, in id order"""
+    fields = sorted(set(vectorized.fields) | set(CLAIM_FIELDS))
+    query = select(*table_columns(Claim.__table__, fields))
+    query = query.where(*[getattr(Claim, field) == value for field, value in filters.items()])
+    return query.order_by(Claim.id)
+
+def labelling_rules() -> VectorizedRules:
+    """The current rules that only use claims table columns, compiled for labelling.
+
+    Rules conditioned on attributes claims do not store (land_type, income_level,
+    ...) would never match a claim read from the table, so they are left out.
+    """
+    vectorized = rule_engine.vectorized
+    unevaluable = set(vectorized.unevaluable(Claim.__table__.c.keys()))
+    rules = [rule for position, rule in enumerate(vectorized.rules) if position not in unevaluable]
+    if not rules:
+        raise ValueError('No rule can be evaluated from claims table columns, so claims cannot be labelled')
+    return VectorizedRules(rules)
+
+def rule_labels(vectorized: VectorizedRules, claims: List[Dict]) -> List[str]:
+    """Label each claim with the first scheme of its best-scoring rule, as the rule engine ranks them"""
+    rules = vectorized.rules
+    return [rules[matches[0][0]]['schemes'][0] if matches else NO_MATCH
+            for matches in vectorized.evaluate(claims)]
+
+def check_training_labels(labels: np.ndarray, min_labelled: int = MIN_LABELLED_CLAIMS) -> None:
+    """Refuse training sets that would produce a useless model, before anything is published"""
+    labelled = int((labels != NO_MATCH).sum())
+    if labelled < min_labelled:
+        raise ValueError(f'Only {labelled} claims matched a rule; at least {min_labelled} are needed to train')
+    classes = np.unique(labels)
+    if len(classes) < 2:
+        raise ValueError(f'All training claims have the label {classes[0]}; at least two classes are needed')
+
+@celery_app.task(bind=True, name='dss.train_model')
+def train_model_job(self, filters: Optional[Dict[str, str]] = None):
+    """Build the training set from the claims table chunk by chunk, train, and publish a model version"""
+    # Imported here so the worker, not the web process, creates its own app and engine
+    from app import app
+
+    filters = filters or {}
+    job_id = self.request.id
+
+    def checkpoint(meta: Dict) -> None:
+        if cancel_requested(job_id):
+            raise TrainingCancelled()
+        self.update_state(state='PROGRESS', meta=dict(meta, filters=filters))
+
+    try:
+        with app.app_context():
+            # Label with the rules currently in the table, not whatever this worker last saw
+            rule_engine.refresh(db.session, force=True)
+            vectorized = labelling_rules()
+            query = training_query(vectorized, filters)
+            total = db.session.execute(select(func.count()).select_from(query.order_by(None).subquery())).scalar()
+            checkpoint({'stage': 'loading', 'processed': 0, 'total': total})
+
+            features, labels = [], []
+            processed = 0
+            # yield_per streams rows through a server-side cursor instead of loading them all
+            rows = db.session.execute(query.execution_options(yield_per=TRAIN_CHUNK_SIZE))
+            for chunk in rows.partitions():
+                claims = rows_to_claims(chunk)
+                features.append(feature_store.feature_matrix(claims))
+                labels.extend(rule_labels(vectorized, claims))
+                processed += len(claims)
+                checkpoint({'stage': 'loading', 'processed': processed, 'total': total})
+            rows.close()
+            db.session.remove()
+
+        if not processed:
+            raise ValueError('No claims match the training filter')
+
+        X = np.vstack(features)
+        y = np.array(labels)
+        del features, labels
+        check_training_labels(y)
+
+        result = ml_dss.fit_and_publish(X, y, metadata={'job_id': job_id, 'filters': filters},
+                                        progress=lambda trees, total_trees: checkpoint({
+                                            'stage': 'training', 'processed': processed, 'total': total,
+                                            'trees': trees, 'total_trees': total_trees}))
+        return dict(result, filters=filters)
+
+    except TrainingCancelled:
+        self.update_state(state='REVOKED', meta={'filters': filters, 'cancelled': True})
+        # Keep the REVOKED state instead of letting Celery record a result
+        raise Ignore()
+
+def job_status(job_id: str) -> Dict:
+    """State, progress and (when finished) metrics or error of a training job"""
+    result = celery_app.AsyncResult(job_id)
+    status = {'job_id': job_id, 'state': result.state}
+    if result.state == 'PROGRESS':
+        status['progress'] = result.info
+    elif result.state == 'SUCCESS':
+        status['result'] = result.result
+    elif result.state == 'FAILURE':
+        status['error'] = str(result.info)
+    elif result.state == 'REVOKED':
+        status['cancelled'] = True
+    return status
+
+def validate_filters(filters) -> Dict[str, str]:
+    """Check a training filter against the fields batch requests may filter on"""
+    if filters is None:
+        return {}
+    if not isinstance(filters, dict):
+        raise ValueError('filter must be an object')
+    unknown = [field for field in filters if field not in BATCH_FILTER_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown filter fields: {', '.join(unknown)}")
+    return filters
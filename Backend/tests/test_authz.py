@@ -0,0 +1,96 @@
+import pytest
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token, verify_jwt_in_request
+
+from api import authz
+from api.authz import current_principal, token_claims
+from api.models import User, db
+
+def make_worker(database_uri):
+    """One API worker process: its own app, engine and session over the shared database"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
+    app.config['JWT_SECRET_KEY'] = 'test-secret-key-long-enough-for-hs256'
+    db.init_app(app)
+    JWTManager(app)
+    return app
+
+@pytest.fixture
+def workers(tmp_path):
+    uri = f"sqlite:///{tmp_path / 'users.db'}"
+    first, second = make_worker(uri), make_worker(uri)
+    with first.app_context():
+        User.__table__.create(db.engine)
+        user = User(username='officer', email='officer@example.org', role='admin')
+        db.session.add(user)
+        db.session.commit()
+        token = create_access_token(identity=str(user.id), additional_claims=token_claims(user))
+    return first, second, token
+
+def principal_on(app, token):
+    with app.test_request_context(headers={'Authorization': f'Bearer {token}'}):
+        verify_jwt_in_request()
+        return current_principal()
+
+def test_second_worker_sees_role_change(workers):
+    first, second, token = workers
+    assert principal_on(second, token).role == 'admin'
+
+    with first.app_context():
+        db.session.get(User, 1).role = 'user'
+        db.session.commit()
+
+    # The token still claims admin, but the other worker must not honour it
+    assert principal_on(second, token).role == 'user'
+
+def test_second_worker_rejects_deleted_user(workers):
+    first, second, token = workers
+    assert principal_on(second, token) is not None
+
+    with first.app_context():
+        db.session.execute(db.delete(User).where(User.id == 1))
+        db.session.commit()
+
+    assert principal_on(second, token) is None
+
+class FakeRedis:
+    """The slice of the redis client AuthVersionCache uses"""
+
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value.encode()
+        return True
+
+def test_current_token_role_is_trusted_without_reading_users(workers, monkeypatch):
+    first, second, token = workers
+    cache = authz.AuthVersionCache(FakeRedis())
+    monkeypatch.setattr(authz, 'auth_versions', cache)
+    assert principal_on(second, token).role == 'admin'
+
+    with first.app_context():
+        db.session.execute(db.delete(User).where(User.id == 1))
+        db.session.commit()
+
+    # auth_version is cached and matches the token, so the users table is not read
+    assert principal_on(second, token) == authz.Principal(1, 'admin')
+
+def test_published_role_change_stops_trusting_older_tokens(workers, monkeypatch):
+    first, second, token = workers
+    cache = authz.AuthVersionCache(FakeRedis())
+    monkeypatch.setattr(authz, 'auth_versions', cache)
+    assert principal_on(second, token).role == 'admin'
+
+    with first.app_context():
+        user = db.session.get(User, 1)
+        user.role, user.auth_version = 'user', 1
+        db.session.commit()
+        authz.publish_auth_version(user)
+
+    assert principal_on(second, token).role == 'user'
@@ -0,0 +1,51 @@
+from api.models import Claim
+from dss.batch import VectorizedRules
+from dss.engine import RuleEngine
+
+def make_rule(rule_id, conditions, weight=0.8):
+    return {
+        'id': rule_id,
+        'name': rule_id,
+        'description': 'Test rule',
+        'conditions': conditions,
+        'schemes': ['forest_development'],
+        'priority': 'medium',
+        'weight': weight
+    }
+
+CLAIMS = [
+    {'id': 1, 'state': 'Odisha', 'land_type': 'forest', 'land_area': 3.0},
+    {'id': 2, 'state': 'Odisha', 'land_area': 12.0},
+    {'id': 3, 'state': 'Telangana', 'land_type': 'grazing', 'land_area': 1.0}
+]
+
+def test_empty_list_condition_matches_nothing():
+    rules = [
+        make_rule('empty', {'land_type': []}),
+        make_rule('odisha', {'state': 'Odisha', 'land_area': {'min': 0, 'max': 20}}, weight=0.6)
+    ]
+    engine = RuleEngine()
+    engine.rules = rules
+    engine.mark_changed()
+
+    batch = engine.vectorized.evaluate(CLAIMS)
+    assert [[rules[rule]['id'] for rule, _ in result] for result in batch] == [['odisha'], ['odisha'], []]
+
+    expected = [[(match['rule_id'], match['match_score']) for match in engine.evaluate_claim_linear(claim)]
+                for claim in CLAIMS]
+    assert [[(rules[rule]['id'], score) for rule, score in result] for result in batch] == expected
+    assert [engine.evaluate_claim(claim) for claim in CLAIMS] == [engine.evaluate_claim_linear(claim)
+                                                                   for claim in CLAIMS]
+
+def test_only_empty_list_rules():
+    vectorized = VectorizedRules([make_rule('empty', {'land_type': [], 'state': 'Odisha'})])
+    assert vectorized.evaluate(CLAIMS) == [[], [], []]
+    assert list(vectorized.encode([1, 2, 3], CLAIMS))[0] == '{"id": 1, "matches": []}'
+
+def test_default_rules_only_use_claims_table_columns():
+    vectorized = VectorizedRules(RuleEngine()._get_default_rules())
+    assert vectorized.unevaluable(Claim.__table__.c.keys()) == []
+
+    claims = [{'claim_type': 'individual', 'land_area': 2.5, 'status': 'pending'},
+              {'claim_type': 'community', 'land_area': 15.0, 'status': 'approved'}]
+    assert [len(matches) > 0 for matches in vectorized.evaluate(claims)] == [True, True]
@@ -0,0 +1,75 @@
+import io
+import pytest
+
+from api import bulk_import
+from api.bulk_import import convert_geometries, read_geojson_features, validate_row
+
+def features(text):
+    return list(read_geojson_features(io.BytesIO(text.encode())))
+
+def valid_row(**overrides):
+    row = {'applicant_name': 'Ramesh', 'village': 'Jamuna', 'district': 'Koraput',
+           'state': 'Odisha', 'claim_type': 'individual'}
+    row.update(overrides)
+    return row
+
+def test_feature_collection_is_read_across_blocks(monkeypatch):
+    monkeypatch.setattr(bulk_import._JsonReader, 'BLOCK_SIZE', 5)
+    rows = features('{"type": "FeatureCollection", "bbox": [1.5, 22.25], '
+                    '"features": [{"properties": {"village": "A"}, "geometry": null}, 7, {"properties": [1]}]}')
+    assert rows == [
+        (1, {'village': 'A', 'geometry': None}),
+        (2, {'_error': 'GeoJSON feature must be an object'}),
+        (3, {'_error': 'GeoJSON feature properties must be an object'})
+    ]
+
+@pytest.mark.parametrize('text', ['not json', '[]', '{"type": "FeatureCollection"}',
+                                  '{"features": [{"a": 1} {"b": 2}]}', '{"features": [{"a": '])
+def test_unreadable_collection_raises_value_error(text):
+    with pytest.raises(ValueError):
+        features(text)
+
+def test_validate_row_rejects_values_the_claims_table_cannot_hold():
+    values, errors = validate_row(valid_row(applicant_name='x' * 101, claim_type='household',
+                                            claim_number={'n': 1}), allow_status=False)
+    assert values is None
+    assert errors == ['claim_number must be text', 'applicant_name must be at most 100 characters',
+                      'claim_type must be one of individual, community']
+
+def test_validate_row_accepts_numeric_claim_numbers():
+    values, errors = validate_row(valid_row(claim_number=123), allow_status=False)
+    assert errors == []
+    assert values['claim_number'] == '123'
+
+@pytest.mark.parametrize('claim_number', ['FRA000500', 'FRA-ODI-000017', 'FRA-ODI-KOR-001234'])
+def test_validate_row_rejects_numbers_the_sequence_may_issue(claim_number):
+    values, errors = validate_row(valid_row(claim_number=claim_number), allow_status=False)
+    assert values is None
+    assert errors == [f'claim_number {claim_number} is reserved for generated numbers; leave it empty to allocate one']
+
+def test_validate_row_keeps_numbers_outside_the_sequence_namespace():
+    values, errors = validate_row(valid_row(claim_number='OD/KOR/2023/17'), allow_status=False)
+    assert errors == []
+    assert values['claim_number'] == 'OD/KOR/2023/17'
+
+@pytest.mark.parametrize('overrides, error', [
+    ({'land_area': 'nan'}, 'land_area must be a finite number'),
+    ({'land_area': float('inf')}, 'land_area must be a finite number'),
+    ({'supporting_documents': '{"deed": "a.pdf"}'}, 'supporting_documents must be a JSON array'),
+    ({'supporting_documents': 'deed.pdf'}, 'supporting_documents must be a JSON array'),
+    ({'supporting_documents': {'deed': 'a.pdf'}}, 'supporting_documents must be a JSON array')
+])
+def test_validate_row_rejects_values_outside_the_column_types(overrides, error):
+    values, errors = validate_row(valid_row(**overrides), allow_status=False)
+    assert values is None
+    assert errors == [error]
+
+def test_convert_geometries_drops_z_coordinates():
+    geometries, errors = convert_geometries([
+        'POLYGON Z ((0 0 5, 1 0 5, 1 1 5, 0 0 5))',
+        {'type': 'Polygon', 'coordinates': [[[0, 0, 1], [1, 0, 1], [1, 1, 1], [0, 0, 1]]]},
+        None
+    ])
+    assert errors == [None, None, None]
+    assert [geometry.has_z for geometry in geometries[:2]] == [False, False]
+    assert geometries[0].wkt == 'POLYGON ((0 0, 1 0, 1 1, 0 0))'
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta, timezone
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token, jwt_required
+
+from api import conditional as conditional_module
+from api.conditional import conditional
+from api.models import User, db
+
+def make_client(state):
+    app = Flask(__name__)
+
+    @app.route('/items')
+    @conditional(lambda: (state['version'], state['updated_at']), per_user=False)
+    def items():
+        return {'version': state['version']}
+
+    return app.test_client()
+
+def test_recent_writes_are_validated_by_etag_only(monkeypatch):
+    written = datetime.now(timezone.utc)
+
+    class Clock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            # Held within the write's second, however slowly the requests run
+            return written
+
+    monkeypatch.setattr(conditional_module, 'datetime', Clock)
+    state = {'version': '1', 'updated_at': written}
+    client = make_client(state)
+    response = client.get('/items')
+    assert 'Last-Modified' not in response.headers
+
+    # A second write within the same second must not be hidden by If-Modified-Since
+    state['version'] = '2'
+    since = response.date or datetime.now(timezone.utc)
+    response = client.get('/items', headers={'If-Modified-Since': since.strftime('%a, %d %b %Y %H:%M:%S GMT')})
+    assert response.status_code == 200
+
+def test_settled_writes_answer_if_modified_since():
+    state = {'version': '1', 'updated_at': datetime.now(timezone.utc) - timedelta(minutes=5)}
+    client = make_client(state)
+    response = client.get('/items')
+    last_modified = response.headers['Last-Modified']
+
+    assert client.get('/items', headers={'If-Modified-Since': last_modified}).status_code == 304
+    # The ETag wins over the date when both are sent
+    stale = client.get('/items', headers={'If-Modified-Since': last_modified, 'If-None-Match': '"other"'})
+    assert stale.status_code == 200
+
+def test_role_change_changes_the_etag(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'users.db'}"
+    app.config['JWT_SECRET_KEY'] = 'test-secret-key-long-enough-for-hs256'
+    db.init_app(app)
+    JWTManager(app)
+    settled = datetime.now(timezone.utc) - timedelta(minutes=5)
+
+    @app.route('/claims')
+    @jwt_required()
+    @conditional(lambda: ('7', settled))
+    def claims():
+        return {'claims': []}
+
+    with app.app_context():
+        User.__table__.create(db.engine)
+        db.session.add(User(username='officer', email='officer@example.org', role='admin'))
+        db.session.commit()
+        token = create_access_token(identity='1')
+
+    client = app.test_client()
+    headers = {'Authorization': f'Bearer {token}'}
+    etag = client.get('/claims', headers=headers).headers['ETag']
+    assert client.get('/claims', headers=dict(headers, **{'If-None-Match': etag})).status_code == 304
+
+    with app.app_context():
+        db.session.get(User, 1).role = 'user'
+        db.session.commit()
+
+    # Same data version, but the demoted user must not keep the admin-scoped listing
+    assert client.get('/claims', headers=dict(headers, **{'If-None-Match': etag})).status_code == 200
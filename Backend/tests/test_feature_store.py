@@ -0,0 +1,21 @@
+from dss.feature_store import FEATURE_NAMES, FeatureStore
+
+def test_same_named_districts_in_different_states_keep_their_own_features(tmp_path):
+    (tmp_path / 'districts.csv').write_text(
+        'state,district,district_development_index,state_gdp_per_capita\n'
+        'Odisha,Bilaspur,0.3,90000\n'
+        'Himachal Pradesh,Bilaspur,0.7,180000\n'
+    )
+    (tmp_path / 'villages.csv').write_text(
+        'state,district,village,village_population,distance_to_forest,soil_quality,water_availability\n'
+        'Odisha,Bilaspur,Rampur,1000,5,0.4,0.5\n'
+        'Himachal Pradesh,Bilaspur,Rampur,3000,15,0.6,0.7\n'
+    )
+    matrix = FeatureStore(str(tmp_path)).feature_matrix([
+        {'state': 'odisha', 'district': 'Bilaspur', 'village': 'Rampur'},
+        {'state': 'Himachal Pradesh ', 'district': 'bilaspur', 'village': 'RAMPUR'}
+    ])
+    index = FEATURE_NAMES.index('district_development_index')
+    population = FEATURE_NAMES.index('village_population')
+    assert matrix[:, index].tolist() == [0.3, 0.7]
+    assert matrix[:, population].tolist() == [1000.0, 3000.0]
@@ -0,0 +1,49 @@
+import types
+import pytest
+from flask import Flask
+
+from api import hashing
+from api.hashing import (HashingBusy, LocalHashingSlots, LoginThrottle, PasswordHasher, RedisLoginThrottle,
+                         TooManyAttempts)
+
+def test_throttle_counts_each_client_separately():
+    throttle = LoginThrottle(max_attempts=2, window=60, max_user_attempts=10)
+    throttle.hit('Asha', '10.0.0.1')
+    throttle.hit('asha ', '10.0.0.1')
+    with pytest.raises(TooManyAttempts):
+        throttle.hit('asha', '10.0.0.1')
+    # Another client can still sign in to the same account
+    throttle.hit('asha', '10.0.0.2')
+    throttle.clear('asha', '10.0.0.1')
+    throttle.hit('asha', '10.0.0.1')
+
+def test_hasher_fails_fast_once_every_slot_is_taken():
+    hasher = PasswordHasher(LocalHashingSlots(limit=1))
+    with pytest.raises(HashingBusy):
+        hasher.run(lambda: hasher.run(lambda: None))
+    assert hasher.run(lambda value: value * 2, 21) == 42
+
+def test_throttle_caps_attempts_on_a_username_across_clients():
+    throttle = LoginThrottle(max_attempts=2, window=60, max_user_attempts=3)
+    for client in ('10.0.0.1', '10.0.0.2', '10.0.0.3'):
+        throttle.hit('asha', client)
+    with pytest.raises(TooManyAttempts):
+        throttle.hit('asha', '10.0.0.4')
+    throttle.hit('ravi', '10.0.0.4')
+
+class UnreachableRedis:
+    def pipeline(self):
+        raise ConnectionError('redis is down')
+
+    def delete(self, *keys):
+        raise ConnectionError('redis is down')
+
+def test_redis_throttle_falls_back_to_process_counts(monkeypatch):
+    monkeypatch.setattr(hashing, 'redis', types.SimpleNamespace(RedisError=ConnectionError))
+    throttle = RedisLoginThrottle(UnreachableRedis(), max_attempts=1, window=60)
+    with Flask(__name__).app_context():
+        throttle.hit('asha', '10.0.0.1')
+        with pytest.raises(TooManyAttempts):
+            throttle.hit('asha', '10.0.0.1')
+        throttle.clear('asha', '10.0.0.1')
+        throttle.hit('asha', '10.0.0.1')
@@ -0,0 +1,19 @@
+import pytest
+
+from dss.rule_store import validate_rule
+from tests.test_batch import make_rule
+
+def test_default_shaped_rule_is_valid():
+    rule = make_rule('ok', {'state': 'Odisha', 'land_type': ['forest'], 'land_area': {'min': 0, 'max': 4}})
+    assert validate_rule(rule) is rule
+
+@pytest.mark.parametrize('conditions', [
+    {'land_type': []},
+    {'land_area': {'min': 'low'}},
+    {'land_area': {}},
+    {'land_type': [['forest']]},
+    {'state': None}
+])
+def test_rules_that_would_break_workers_are_rejected(conditions):
+    with pytest.raises(ValueError):
+        validate_rule(make_rule('bad', conditions))
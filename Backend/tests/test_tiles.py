@@ -0,0 +1,17 @@
+from flask import Flask
+
+from api import tiles
+from api.authz import Principal
+
+class UnreachableCache:
+    def version(self, *args):
+        raise ConnectionError('redis is down')
+
+    def set(self, *args):
+        raise AssertionError('a tile without a version must not be cached')
+
+def test_cache_outage_renders_from_the_database(monkeypatch):
+    monkeypatch.setattr(tiles, 'tile_cache', UnreachableCache())
+    monkeypatch.setattr(tiles, 'render_tile', lambda session, layer, z, x, y, user: b'tile')
+    with Flask(__name__).app_context():
+        assert tiles.get_tile(None, 'claims', 3, 1, 2, Principal(1, 'admin')) == b'tile'
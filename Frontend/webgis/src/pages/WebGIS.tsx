@@ -4,7 +4,7 @@ import L from 'leaflet';
 import { useQuery } from 'react-query';
 import { MapPin, Layers, Filter, Download, Upload } from 'lucide-react';
 import toast from 'react-hot-toast';
-import { api } from '../services/api';
+import { fetchAllPages } from '../services/api';
 
 // Fix for default markers in React Leaflet
 delete (L.Icon.Default.prototype as any)._getIconUrl;
@@ -188,7 +188,7 @@ const WebGIS: React.FC = () => {
   // Fetch claims data
   const { data: claims = [], isLoading: claimsLoading } = useQuery(
     'claims',
-    () => api.get('/claims').then(res => res.data.claims),
+    () => fetchAllPages<any>('/claims', 'claims'),
     {
       onError: (error: any) => {
         toast.error('Failed to load claims data');
@@ -200,7 +200,7 @@ const WebGIS: React.FC = () => {
   // Fetch assets data
   const { data: assets = [], isLoading: assetsLoading } = useQuery(
     'assets',
-    () => api.get('/assets').then(res => res.data.assets),
+    () => fetchAllPages<any>('/assets', 'assets'),
     {
       onError: (error: any) => {
         toast.error('Failed to load assets data');
@@ -42,3 +42,17 @@ api.interceptors.response.use(
     return Promise.reject(error);
   }
 );
+
+// List endpoints return one keyset page at a time; follow next_cursor until the last page
+const PAGE_SIZE = 1000;
+
+export async function fetchAllPages<T>(path: string, key: string): Promise<T[]> {
+  const items: T[] = [];
+  let cursor: string | undefined;
+  do {
+    const response = await api.get(path, { params: { limit: PAGE_SIZE, cursor } });
+    items.push(...response.data[key]);
+    cursor = response.data.has_more ? response.data.next_cursor : undefined;
+  } while (cursor);
+  return items;
+}
@@ -4,6 +4,7 @@
 -- Enable PostGIS extension
 CREATE EXTENSION IF NOT EXISTS postgis;
 CREATE EXTENSION IF NOT EXISTS postgis_topology;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
 
 -- Create database if not exists (run this manually)
 -- CREATE DATABASE fra_db;
@@ -16,6 +17,7 @@ CREATE TABLE IF NOT EXISTS users (
     email VARCHAR(120) UNIQUE NOT NULL,
     password_hash VARCHAR(128),
     role VARCHAR(20) DEFAULT 'user',
+    auth_version INTEGER NOT NULL DEFAULT 0, -- bumped with every role change (see api/authz.py)
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
@@ -32,9 +34,18 @@ CREATE TABLE IF NOT EXISTS claims (
     claim_type VARCHAR(50),
     land_area FLOAT,
     land_description TEXT,
-    supporting_documents TEXT, -- JSON array of document paths
+    supporting_documents JSONB, -- array of document paths
     status VARCHAR(20) DEFAULT 'pending',
     geometry GEOMETRY(POLYGON, 4326),
+    geometry_simplified_low GEOMETRY(POLYGON, 4326), -- maintained by trigger
+    geometry_simplified_medium GEOMETRY(POLYGON, 4326), -- maintained by trigger
+    geometry_simplified_high GEOMETRY(POLYGON, 4326), -- maintained by trigger
+    geodesic_area_hectares DOUBLE PRECISION, -- maintained by trigger
+    -- Declared area more than 10% off the geodesic area (AREA_DISCREPANCY_TOLERANCE in api/areas.py)
+    area_discrepancy BOOLEAN GENERATED ALWAYS AS (
+        land_area IS NOT NULL AND geodesic_area_hectares > 0
+        AND abs(land_area - geodesic_area_hectares) > 0.1 * geodesic_area_hectares
+    ) STORED,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     user_id INTEGER REFERENCES users(id) NOT NULL
@@ -48,29 +59,101 @@ CREATE TABLE IF NOT EXISTS assets (
     area_hectares FLOAT,
     description TEXT,
     satellite_image_path VARCHAR(200),
-    classification_result TEXT, -- JSON with ML classification results
+    classification_result JSONB, -- ML classification results, e.g. {"predicted_class": ..., "confidence": ...}
     confidence_score FLOAT,
     geometry GEOMETRY(POLYGON, 4326),
+    geometry_simplified_low GEOMETRY(POLYGON, 4326), -- maintained by trigger
+    geometry_simplified_medium GEOMETRY(POLYGON, 4326), -- maintained by trigger
+    geometry_simplified_high GEOMETRY(POLYGON, 4326), -- maintained by trigger
+    geodesic_area_hectares DOUBLE PRECISION, -- maintained by trigger
+    area_discrepancy BOOLEAN GENERATED ALWAYS AS (
+        area_hectares IS NOT NULL AND geodesic_area_hectares > 0
+        AND abs(area_hectares - geodesic_area_hectares) > 0.1 * geodesic_area_hectares
+    ) STORED,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     claim_id INTEGER REFERENCES claims(id) NOT NULL
 );
 
+-- Claim numbers are drawn from a sequence in prefetched blocks (see api/claim_numbers.py)
+CREATE SEQUENCE IF NOT EXISTS claim_number_seq START WITH 1;
+
 -- Create schemes table
 CREATE TABLE IF NOT EXISTS schemes (
     id SERIAL PRIMARY KEY,
     scheme_name VARCHAR(100) NOT NULL,
     scheme_code VARCHAR(50) UNIQUE NOT NULL,
     description TEXT,
-    eligibility_criteria TEXT, -- JSON with criteria
-    benefits TEXT, -- JSON with benefits
+    eligibility_criteria JSONB, -- criteria
+    benefits JSONB,
     application_process TEXT,
-    contact_info TEXT, -- JSON with contact details
+    contact_info JSONB, -- contact details
     is_active BOOLEAN DEFAULT TRUE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Convert JSON columns created as TEXT by earlier versions of this schema to JSONB
+DO $$
+DECLARE
+    col RECORD;
+BEGIN
+    FOR col IN
+        SELECT table_name, column_name FROM information_schema.columns
+        WHERE table_schema = 'public' AND data_type = 'text' AND (table_name, column_name) IN (
+            ('claims', 'supporting_documents'), ('assets', 'classification_result'),
+            ('schemes', 'eligibility_criteria'), ('schemes', 'benefits'), ('schemes', 'contact_info')
+        )
+    LOOP
+        EXECUTE format('ALTER TABLE %I ALTER COLUMN %I TYPE JSONB USING NULLIF(%I, '''')::jsonb',
+                       col.table_name, col.column_name, col.column_name);
+    END LOOP;
+END;
+$$;
+
+-- Per-table data versions for conditional GET (ETag / Last-Modified), bumped by triggers
+CREATE TABLE IF NOT EXISTS table_versions (
+    table_name VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO table_versions (table_name) VALUES ('claims'), ('assets'), ('schemes'), ('decision_rules')
+ON CONFLICT (table_name) DO NOTHING;
+
+-- Claim counters by state, district, status and claim_type, kept current by triggers.
+-- NULL dimensions are stored as '' so they can be part of the primary key.
+CREATE TABLE IF NOT EXISTS claim_stats (
+    state VARCHAR(100) NOT NULL DEFAULT '',
+    district VARCHAR(100) NOT NULL DEFAULT '',
+    status VARCHAR(20) NOT NULL DEFAULT '',
+    claim_type VARCHAR(50) NOT NULL DEFAULT '',
+    claim_count BIGINT NOT NULL DEFAULT 0,
+    total_land_area DOUBLE PRECISION NOT NULL DEFAULT 0,
+    land_area_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (state, district, status, claim_type)
+);
+
+-- Row-level change feed for /api/claims/changes and /api/assets/changes, written by triggers.
+-- txid orders changes by transaction; owner_id is the claim owner so users only see their own rows.
+CREATE TABLE IF NOT EXISTS change_log (
+    id BIGSERIAL PRIMARY KEY,
+    table_name VARCHAR(50) NOT NULL,
+    row_id INTEGER NOT NULL,
+    operation VARCHAR(10) NOT NULL, -- insert, update or delete
+    owner_id INTEGER,
+    txid BIGINT NOT NULL DEFAULT txid_current(),
+    changed_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Position of the newest pruned change per table (flask claims/assets prune-changes).
+-- Feed cursors behind it get 410 Gone, since the changes they would need are gone.
+CREATE TABLE IF NOT EXISTS change_log_horizon (
+    table_name VARCHAR(50) PRIMARY KEY,
+    txid BIGINT NOT NULL,
+    change_id BIGINT NOT NULL
+);
+
 -- Create spatial indexes
 CREATE INDEX IF NOT EXISTS idx_claims_geometry ON claims USING GIST (geometry);
 CREATE INDEX IF NOT EXISTS idx_assets_geometry ON assets USING GIST (geometry);
@@ -82,8 +165,22 @@ CREATE INDEX IF NOT EXISTS idx_claims_village ON claims (village);
 CREATE INDEX IF NOT EXISTS idx_claims_district ON claims (district);
 CREATE INDEX IF NOT EXISTS idx_claims_state ON claims (state);
 CREATE INDEX IF NOT EXISTS idx_assets_claim_id ON assets (claim_id);
+CREATE INDEX IF NOT EXISTS idx_change_log_table_txid ON change_log (table_name, txid, id);
+
+-- Search indexes for /api/claims/search (expressions must match api/search.py)
+CREATE INDEX IF NOT EXISTS idx_claims_applicant_name_trgm ON claims USING GIN (applicant_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_claims_village_trgm ON claims USING GIN (village gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_claims_district_trgm ON claims USING GIN (district gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_claims_land_description_tsv ON claims
+    USING GIN (to_tsvector('english', coalesce(land_description, '')));
 CREATE INDEX IF NOT EXISTS idx_assets_asset_type ON assets (asset_type);
 
+-- Containment (@>) indexes on JSONB documents, e.g. classification_result @> '{"predicted_class": "forest"}'
+CREATE INDEX IF NOT EXISTS idx_assets_classification_result ON assets USING GIN (classification_result jsonb_path_ops);
+CREATE INDEX IF NOT EXISTS idx_assets_confidence_score ON assets (confidence_score);
+CREATE INDEX IF NOT EXISTS idx_claims_supporting_documents ON claims USING GIN (supporting_documents jsonb_path_ops);
+CREATE INDEX IF NOT EXISTS idx_schemes_eligibility_criteria ON schemes USING GIN (eligibility_criteria jsonb_path_ops);
+
 -- Insert sample data
 INSERT INTO users (username, email, password_hash, role) VALUES
 ('admin', 'admin@fra-webgis.local', 'pbkdf2:sha256:260000$...', 'admin'),
@@ -106,19 +203,19 @@ INSERT INTO schemes (scheme_name, scheme_code, description, eligibility_criteria
  '{"contact_person": "Community Officer", "phone": "1234567891", "email": "community@gov.in"}'),
  
 ('Agricultural Support Scheme', 'agricultural_support', 'Support for agricultural activities',
- '{"land_type": "agricultural", "land_area": {"min": 0.5, "max": 10.0}}',
+ '{"claim_type": "individual", "status": "approved", "land_area": {"min": 0.5, "max": 10.0}}',
  '{"seeds_provided": true, "irrigation_support": true}',
  'Submit land documents and crop plan',
  '{"contact_person": "Agriculture Officer", "phone": "1234567892", "email": "agriculture@gov.in"}'),
  
 ('Micro Finance Scheme', 'micro_finance', 'Micro finance for small landholders',
- '{"land_area": {"max": 1.0}, "income_level": "low"}',
+ '{"claim_type": "individual", "land_area": {"max": 1.0}}',
  '{"loan_amount": 25000, "interest_rate": 4.0}',
  'Submit income certificate and land documents',
  '{"contact_person": "Finance Officer", "phone": "1234567893", "email": "finance@gov.in"}'),
  
 ('Tribal Development Scheme', 'tribal_development', 'Development support for tribal communities',
- '{"community_type": "tribal", "claim_type": "community"}',
+ '{"claim_type": "community", "status": "approved"}',
  '{"educational_support": true, "healthcare_support": true}',
  'Submit tribal certificate and community documents',
  '{"contact_person": "Tribal Officer", "phone": "1234567894", "email": "tribal@gov.in"}')
@@ -207,13 +304,14 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
--- Create function to calculate land area
+-- Create function to calculate land area (geodesic, in hectares; the value is also
+-- stored in claims.geodesic_area_hectares)
 CREATE OR REPLACE FUNCTION calculate_land_area(claim_id INTEGER)
 RETURNS FLOAT AS $$
 DECLARE
     area_hectares FLOAT;
 BEGIN
-    SELECT ST_Area(ST_Transform(geometry, 3857)) / 10000 INTO area_hectares
+    SELECT ST_Area(geometry::geography) / 10000 INTO area_hectares
     FROM claims
     WHERE id = claim_id;
     
@@ -247,6 +345,279 @@ CREATE TRIGGER update_assets_updated_at BEFORE UPDATE ON assets
 CREATE TRIGGER update_schemes_updated_at BEFORE UPDATE ON schemes
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+-- Role changes made directly in SQL invalidate issued tokens too; the API bumps the
+-- version itself, so only bump when the statement left it unchanged
+CREATE OR REPLACE FUNCTION bump_user_auth_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.role IS DISTINCT FROM OLD.role AND NEW.auth_version = OLD.auth_version THEN
+        NEW.auth_version = OLD.auth_version + 1;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER users_auth_version BEFORE UPDATE OF role ON users
+    FOR EACH ROW EXECUTE FUNCTION bump_user_auth_version();
+
+-- Bump the table version once per writing statement; the row lock keeps versions
+-- transactional, so a new version is never visible before its data is committed
+CREATE OR REPLACE FUNCTION bump_table_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE table_versions
+    SET version = version + 1, updated_at = clock_timestamp()
+    WHERE table_name = TG_TABLE_NAME;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Every writer of a table updates the same table_versions row. Bumping it from a
+-- deferred trigger takes that row lock only while the transaction commits, so a
+-- long write (e.g. a bulk-import chunk) no longer blocks other writers for its
+-- whole duration, and updated_at is close to the moment the data became visible.
+-- Constraint triggers fire per row, so only the first row of a transaction bumps.
+CREATE OR REPLACE FUNCTION bump_table_version_on_commit()
+RETURNS TRIGGER AS $$
+DECLARE
+    flag TEXT := 'table_versions.bumped_' || TG_TABLE_NAME;
+BEGIN
+    IF current_setting(flag, true) IS DISTINCT FROM 'on' THEN
+        PERFORM set_config(flag, 'on', true);
+        UPDATE table_versions
+        SET version = version + 1, updated_at = clock_timestamp()
+        WHERE table_name = TG_TABLE_NAME;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE CONSTRAINT TRIGGER claims_table_version AFTER INSERT OR UPDATE OR DELETE ON claims
+    DEFERRABLE INITIALLY DEFERRED
+    FOR EACH ROW EXECUTE FUNCTION bump_table_version_on_commit();
+
+CREATE TRIGGER claims_table_version_truncate AFTER TRUNCATE ON claims
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+CREATE CONSTRAINT TRIGGER assets_table_version AFTER INSERT OR UPDATE OR DELETE ON assets
+    DEFERRABLE INITIALLY DEFERRED
+    FOR EACH ROW EXECUTE FUNCTION bump_table_version_on_commit();
+
+CREATE TRIGGER assets_table_version_truncate AFTER TRUNCATE ON assets
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+CREATE CONSTRAINT TRIGGER schemes_table_version AFTER INSERT OR UPDATE OR DELETE ON schemes
+    DEFERRABLE INITIALLY DEFERRED
+    FOR EACH ROW EXECUTE FUNCTION bump_table_version_on_commit();
+
+CREATE TRIGGER schemes_table_version_truncate AFTER TRUNCATE ON schemes
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+-- DSS decision rules, shared by every worker. The API seeds the table from rules.json
+-- (or the built-in defaults) the first time it finds it empty.
+CREATE TABLE IF NOT EXISTS decision_rules (
+    id SERIAL PRIMARY KEY,
+    rule_id VARCHAR(50) UNIQUE NOT NULL,
+    rule JSONB NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TRIGGER update_decision_rules_updated_at BEFORE UPDATE ON decision_rules
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+CREATE TRIGGER decision_rules_table_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON decision_rules
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+-- Tell listening workers to recompile; NOTIFY is delivered only when the transaction commits
+CREATE OR REPLACE FUNCTION notify_decision_rules()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('decision_rules', (SELECT version::text FROM table_versions WHERE table_name = 'decision_rules'));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Named to fire after decision_rules_table_version, so the payload is the new version
+CREATE TRIGGER decision_rules_zz_notify AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON decision_rules
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_decision_rules();
+
+-- Apply per-statement claim deltas to claim_stats. Transition tables aggregate a whole
+-- bulk statement into one upsert per group; groups are upserted in key order to avoid deadlocks.
+CREATE OR REPLACE FUNCTION update_claim_stats()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO claim_stats AS s (state, district, status, claim_type, claim_count, total_land_area, land_area_count)
+        SELECT COALESCE(state, ''), COALESCE(district, ''), COALESCE(status, ''), COALESCE(claim_type, ''),
+               -COUNT(*), -COALESCE(SUM(land_area), 0), -COUNT(land_area)
+        FROM old_claims
+        GROUP BY 1, 2, 3, 4
+        ORDER BY 1, 2, 3, 4
+        ON CONFLICT (state, district, status, claim_type) DO UPDATE SET
+            claim_count = s.claim_count + EXCLUDED.claim_count,
+            total_land_area = s.total_land_area + EXCLUDED.total_land_area,
+            land_area_count = s.land_area_count + EXCLUDED.land_area_count;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO claim_stats AS s (state, district, status, claim_type, claim_count, total_land_area, land_area_count)
+        SELECT COALESCE(state, ''), COALESCE(district, ''), COALESCE(status, ''), COALESCE(claim_type, ''),
+               COUNT(*), COALESCE(SUM(land_area), 0), COUNT(land_area)
+        FROM new_claims
+        GROUP BY 1, 2, 3, 4
+        ORDER BY 1, 2, 3, 4
+        ON CONFLICT (state, district, status, claim_type) DO UPDATE SET
+            claim_count = s.claim_count + EXCLUDED.claim_count,
+            total_land_area = s.total_land_area + EXCLUDED.total_land_area,
+            land_area_count = s.land_area_count + EXCLUDED.land_area_count;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION truncate_claim_stats()
+RETURNS TRIGGER AS $$
+BEGIN
+    TRUNCATE claim_stats;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER claim_stats_insert AFTER INSERT ON claims
+    REFERENCING NEW TABLE AS new_claims
+    FOR EACH STATEMENT EXECUTE FUNCTION update_claim_stats();
+
+CREATE TRIGGER claim_stats_update AFTER UPDATE ON claims
+    REFERENCING OLD TABLE AS old_claims NEW TABLE AS new_claims
+    FOR EACH STATEMENT EXECUTE FUNCTION update_claim_stats();
+
+CREATE TRIGGER claim_stats_delete AFTER DELETE ON claims
+    REFERENCING OLD TABLE AS old_claims
+    FOR EACH STATEMENT EXECUTE FUNCTION update_claim_stats();
+
+CREATE TRIGGER claim_stats_truncate AFTER TRUNCATE ON claims
+    FOR EACH STATEMENT EXECUTE FUNCTION truncate_claim_stats();
+
+-- Log one change_log row per changed claim or asset, a whole statement at a time.
+-- A row that moves to another owner is logged as a delete for the previous owner.
+CREATE OR REPLACE FUNCTION log_claim_changes()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO change_log (table_name, row_id, operation, owner_id)
+        SELECT 'claims', n.id, 'insert', n.user_id FROM new_claims n ORDER BY n.id;
+    ELSIF TG_OP = 'UPDATE' THEN
+        INSERT INTO change_log (table_name, row_id, operation, owner_id)
+        SELECT 'claims', o.id, 'delete', o.user_id
+        FROM old_claims o JOIN new_claims n ON n.id = o.id
+        WHERE n.user_id IS DISTINCT FROM o.user_id
+        ORDER BY o.id;
+        INSERT INTO change_log (table_name, row_id, operation, owner_id)
+        SELECT 'claims', n.id, 'update', n.user_id FROM new_claims n ORDER BY n.id;
+    ELSE
+        INSERT INTO change_log (table_name, row_id, operation, owner_id)
+        SELECT 'claims', o.id, 'delete', o.user_id FROM old_claims o ORDER BY o.id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION log_asset_changes()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO change_log (table_name, row_id, operation, owner_id)
+        SELECT 'assets', n.id, 'insert', c.user_id
+        FROM new_assets n LEFT JOIN claims c ON c.id = n.claim_id ORDER BY n.id;
+    ELSIF TG_OP = 'UPDATE' THEN
+        INSERT INTO change_log (table_name, row_id, operation, owner_id)
+        SELECT 'assets', o.id, 'delete', oc.user_id
+        FROM old_assets o
+        JOIN new_assets n ON n.id = o.id
+        LEFT JOIN claims oc ON oc.id = o.claim_id
+        LEFT JOIN claims nc ON nc.id = n.claim_id
+        WHERE nc.user_id IS DISTINCT FROM oc.user_id
+        ORDER BY o.id;
+        INSERT INTO change_log (table_name, row_id, operation, owner_id)
+        SELECT 'assets', n.id, 'update', c.user_id
+        FROM new_assets n LEFT JOIN claims c ON c.id = n.claim_id ORDER BY n.id;
+    ELSE
+        INSERT INTO change_log (table_name, row_id, operation, owner_id)
+        SELECT 'assets', o.id, 'delete', c.user_id
+        FROM old_assets o LEFT JOIN claims c ON c.id = o.claim_id ORDER BY o.id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER claims_change_log_insert AFTER INSERT ON claims
+    REFERENCING NEW TABLE AS new_claims
+    FOR EACH STATEMENT EXECUTE FUNCTION log_claim_changes();
+
+CREATE TRIGGER claims_change_log_update AFTER UPDATE ON claims
+    REFERENCING OLD TABLE AS old_claims NEW TABLE AS new_claims
+    FOR EACH STATEMENT EXECUTE FUNCTION log_claim_changes();
+
+CREATE TRIGGER claims_change_log_delete AFTER DELETE ON claims
+    REFERENCING OLD TABLE AS old_claims
+    FOR EACH STATEMENT EXECUTE FUNCTION log_claim_changes();
+
+CREATE TRIGGER assets_change_log_insert AFTER INSERT ON assets
+    REFERENCING NEW TABLE AS new_assets
+    FOR EACH STATEMENT EXECUTE FUNCTION log_asset_changes();
+
+CREATE TRIGGER assets_change_log_update AFTER UPDATE ON assets
+    REFERENCING OLD TABLE AS old_assets NEW TABLE AS new_assets
+    FOR EACH STATEMENT EXECUTE FUNCTION log_asset_changes();
+
+CREATE TRIGGER assets_change_log_delete AFTER DELETE ON assets
+    REFERENCING OLD TABLE AS old_assets
+    FOR EACH STATEMENT EXECUTE FUNCTION log_asset_changes();
+
+-- Seed the counters from claims inserted before the triggers existed
+TRUNCATE claim_stats;
+INSERT INTO claim_stats (state, district, status, claim_type, claim_count, total_land_area, land_area_count)
+SELECT COALESCE(state, ''), COALESCE(district, ''), COALESCE(status, ''), COALESCE(claim_type, ''),
+       COUNT(*), COALESCE(SUM(land_area), 0), COUNT(land_area)
+FROM claims
+GROUP BY 1, 2, 3, 4;
+
+-- Keep multi-resolution geometry copies in sync with the full geometry.
+-- Tolerances (degrees) must match SIMPLIFICATION_LEVELS in api/spatial.py.
+CREATE OR REPLACE FUNCTION simplify_geometry_levels()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.geometry_simplified_low = ST_SimplifyPreserveTopology(NEW.geometry, 0.01);
+    NEW.geometry_simplified_medium = ST_SimplifyPreserveTopology(NEW.geometry, 0.001);
+    NEW.geometry_simplified_high = ST_SimplifyPreserveTopology(NEW.geometry, 0.0001);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER simplify_claims_geometry BEFORE INSERT OR UPDATE OF geometry ON claims
+    FOR EACH ROW EXECUTE FUNCTION simplify_geometry_levels();
+
+CREATE TRIGGER simplify_assets_geometry BEFORE INSERT OR UPDATE OF geometry ON assets
+    FOR EACH ROW EXECUTE FUNCTION simplify_geometry_levels();
+
+-- Keep the geodesic area (on the WGS84 spheroid, in hectares) in sync with the geometry.
+-- The expression must match AREA_SQL in api/areas.py.
+CREATE OR REPLACE FUNCTION compute_geodesic_area()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.geodesic_area_hectares = ST_Area(NEW.geometry::geography) / 10000;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER claims_geodesic_area BEFORE INSERT OR UPDATE OF geometry ON claims
+    FOR EACH ROW EXECUTE FUNCTION compute_geodesic_area();
+
+CREATE TRIGGER assets_geodesic_area BEFORE INSERT OR UPDATE OF geometry ON assets
+    FOR EACH ROW EXECUTE FUNCTION compute_geodesic_area();
+
 -- Insert additional sample data for testing
 INSERT INTO claims (claim_number, applicant_name, village, district, state, claim_type, land_area, status, user_id) VALUES
 ('FRA000004', 'Test User 1', 'Test Village 1', 'Test District 1', 'Test State 1', 'individual', 3.2, 'pending', 3),
@@ -254,6 +625,11 @@ INSERT INTO claims (claim_number, applicant_name, village, district, state, clai
 ('FRA000006', 'Test User 3', 'Test Village 3', 'Test District 3', 'Test State 3', 'individual', 0.8, 'rejected', 3)
 ON CONFLICT (claim_number) DO NOTHING;
 
+-- Continue claim numbering after the highest number already issued
+SELECT setval('claim_number_seq', GREATEST(COALESCE(MAX(substring(claim_number from '(\d+)$')::BIGINT), 0), 1),
+              COALESCE(MAX(substring(claim_number from '(\d+)$')::BIGINT), 0) > 0)
+FROM claims;
+
 -- Create sample geometries for claims (simplified polygons)
 UPDATE claims SET geometry = ST_GeomFromText('POLYGON((77.0 28.0, 77.1 28.0, 77.1 28.1, 77.0 28.1, 77.0 28.0))', 4326) WHERE id = 1;
 UPDATE claims SET geometry = ST_GeomFromText('POLYGON((77.2 28.2, 77.3 28.2, 77.3 28.3, 77.2 28.3, 77.2 28.2))', 4326) WHERE id = 2;
@@ -265,33 +641,35 @@ UPDATE assets SET geometry = ST_GeomFromText('POLYGON((77.2 28.2, 77.3 28.2, 77.
 UPDATE assets SET geometry = ST_GeomFromText('POLYGON((77.4 28.4, 77.5 28.4, 77.5 28.5, 77.4 28.5, 77.4 28.4))', 4326) WHERE id = 3;
 
 -- Create additional indexes for performance
-CREATE INDEX IF NOT EXISTS idx_claims_created_at ON claims (created_at);
-CREATE INDEX IF NOT EXISTS idx_assets_created_at ON assets (created_at);
+-- Composite index backs keyset pagination on (created_at, id)
+CREATE INDEX IF NOT EXISTS idx_claims_created_at_id ON claims (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_assets_created_at_id ON assets (created_at, id);
+-- Partial index for review queues of claims whose declared area disagrees with the geometry
+CREATE INDEX IF NOT EXISTS idx_claims_area_discrepancy ON claims (id) WHERE area_discrepancy;
 CREATE INDEX IF NOT EXISTS idx_schemes_is_active ON schemes (is_active);
 
--- Create materialized view for dashboard statistics
-CREATE MATERIALIZED VIEW dashboard_stats AS
-SELECT 
-    COUNT(*) as total_claims,
-    COUNT(CASE WHEN status = 'approved' THEN 1 END) as approved_claims,
-    COUNT(CASE WHEN status = 'pending' THEN 1 END) as pending_claims,
-    COUNT(CASE WHEN status = 'rejected' THEN 1 END) as rejected_claims,
-    COUNT(CASE WHEN claim_type = 'individual' THEN 1 END) as individual_claims,
-    COUNT(CASE WHEN claim_type = 'community' THEN 1 END) as community_claims,
-    AVG(land_area) as avg_land_area,
-    SUM(land_area) as total_land_area
-FROM claims;
-
--- Create refresh function for materialized view
-CREATE OR REPLACE FUNCTION refresh_dashboard_stats()
-RETURNS VOID AS $$
+-- Dashboard statistics read from the trigger-maintained claim_stats counters.
+-- Earlier schemas created dashboard_stats as a materialized view, which CREATE OR REPLACE VIEW cannot replace.
+DO $$
 BEGIN
-    REFRESH MATERIALIZED VIEW dashboard_stats;
+    IF EXISTS (SELECT 1 FROM pg_matviews WHERE schemaname = 'public' AND matviewname = 'dashboard_stats') THEN
+        DROP MATERIALIZED VIEW dashboard_stats;
+    END IF;
 END;
-$$ LANGUAGE plpgsql;
+$$;
+DROP FUNCTION IF EXISTS refresh_dashboard_stats();
 
--- Grant execute permission on refresh function
-GRANT EXECUTE ON FUNCTION refresh_dashboard_stats() TO fra_user;
+CREATE OR REPLACE VIEW dashboard_stats AS
+SELECT 
+    COALESCE(SUM(claim_count), 0) as total_claims,
+    COALESCE(SUM(claim_count) FILTER (WHERE status = 'approved'), 0) as approved_claims,
+    COALESCE(SUM(claim_count) FILTER (WHERE status = 'pending'), 0) as pending_claims,
+    COALESCE(SUM(claim_count) FILTER (WHERE status = 'rejected'), 0) as rejected_claims,
+    COALESCE(SUM(claim_count) FILTER (WHERE claim_type = 'individual'), 0) as individual_claims,
+    COALESCE(SUM(claim_count) FILTER (WHERE claim_type = 'community'), 0) as community_claims,
+    SUM(total_land_area) / NULLIF(SUM(land_area_count), 0) as avg_land_area,
+    SUM(total_land_area) as total_land_area
+FROM claim_stats;
 
 -- Create a function to get scheme recommendations for a claim
 CREATE OR REPLACE FUNCTION get_scheme_recommendations(claim_id INTEGER)
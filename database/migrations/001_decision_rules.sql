@@ -0,0 +1,63 @@
+-- Add the shared DSS rules table to a database created from init.sql before it existed
+-- (one that already has table_versions, claim_stats and change_log). init.sql only runs
+-- on a fresh volume; this script is idempotent and safe to re-run:
+--   docker-compose exec postgres psql -U fra_user -d fra_db -f /migrations/001_decision_rules.sql
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS table_versions (
+    table_name VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO table_versions (table_name) VALUES ('decision_rules')
+ON CONFLICT (table_name) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION update_updated_at_column()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at = CURRENT_TIMESTAMP;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION bump_table_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE table_versions
+    SET version = version + 1, updated_at = clock_timestamp()
+    WHERE table_name = TG_TABLE_NAME;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TABLE IF NOT EXISTS decision_rules (
+    id SERIAL PRIMARY KEY,
+    rule_id VARCHAR(50) UNIQUE NOT NULL,
+    rule JSONB NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+DROP TRIGGER IF EXISTS update_decision_rules_updated_at ON decision_rules;
+CREATE TRIGGER update_decision_rules_updated_at BEFORE UPDATE ON decision_rules
+    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+DROP TRIGGER IF EXISTS decision_rules_table_version ON decision_rules;
+CREATE TRIGGER decision_rules_table_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON decision_rules
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+CREATE OR REPLACE FUNCTION notify_decision_rules()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('decision_rules', (SELECT version::text FROM table_versions WHERE table_name = 'decision_rules'));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS decision_rules_zz_notify ON decision_rules;
+CREATE TRIGGER decision_rules_zz_notify AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON decision_rules
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_decision_rules();
+
+COMMIT;
@@ -0,0 +1,61 @@
+-- Bump the claims, assets and schemes versions from deferred triggers, so the shared
+-- table_versions row is locked only while a writing transaction commits.
+-- Idempotent and safe to re-run:
+--   docker-compose exec postgres psql -U fra_user -d fra_db -f /migrations/002_table_versions_on_commit.sql
+
+BEGIN;
+
+-- The triggers only update existing rows; without these the versions would never move
+INSERT INTO table_versions (table_name) VALUES ('claims'), ('assets'), ('schemes')
+ON CONFLICT (table_name) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_table_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE table_versions
+    SET version = version + 1, updated_at = clock_timestamp()
+    WHERE table_name = TG_TABLE_NAME;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION bump_table_version_on_commit()
+RETURNS TRIGGER AS $$
+DECLARE
+    flag TEXT := 'table_versions.bumped_' || TG_TABLE_NAME;
+BEGIN
+    IF current_setting(flag, true) IS DISTINCT FROM 'on' THEN
+        PERFORM set_config(flag, 'on', true);
+        UPDATE table_versions
+        SET version = version + 1, updated_at = clock_timestamp()
+        WHERE table_name = TG_TABLE_NAME;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS claims_table_version ON claims;
+DROP TRIGGER IF EXISTS claims_table_version_truncate ON claims;
+CREATE CONSTRAINT TRIGGER claims_table_version AFTER INSERT OR UPDATE OR DELETE ON claims
+    DEFERRABLE INITIALLY DEFERRED
+    FOR EACH ROW EXECUTE FUNCTION bump_table_version_on_commit();
+CREATE TRIGGER claims_table_version_truncate AFTER TRUNCATE ON claims
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+DROP TRIGGER IF EXISTS assets_table_version ON assets;
+DROP TRIGGER IF EXISTS assets_table_version_truncate ON assets;
+CREATE CONSTRAINT TRIGGER assets_table_version AFTER INSERT OR UPDATE OR DELETE ON assets
+    DEFERRABLE INITIALLY DEFERRED
+    FOR EACH ROW EXECUTE FUNCTION bump_table_version_on_commit();
+CREATE TRIGGER assets_table_version_truncate AFTER TRUNCATE ON assets
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+DROP TRIGGER IF EXISTS schemes_table_version ON schemes;
+DROP TRIGGER IF EXISTS schemes_table_version_truncate ON schemes;
+CREATE CONSTRAINT TRIGGER schemes_table_version AFTER INSERT OR UPDATE OR DELETE ON schemes
+    DEFERRABLE INITIALLY DEFERRED
+    FOR EACH ROW EXECUTE FUNCTION bump_table_version_on_commit();
+CREATE TRIGGER schemes_table_version_truncate AFTER TRUNCATE ON schemes
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+COMMIT;
@@ -0,0 +1,9 @@
+-- Record how far change_log has been pruned, for the prune-changes commands.
+-- Idempotent and safe to re-run:
+--   docker-compose exec postgres psql -U fra_user -d fra_db -f /migrations/003_change_log_horizon.sql
+
+CREATE TABLE IF NOT EXISTS change_log_horizon (
+    table_name VARCHAR(50) PRIMARY KEY,
+    txid BIGINT NOT NULL,
+    change_id BIGINT NOT NULL
+);
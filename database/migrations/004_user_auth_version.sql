@@ -0,0 +1,23 @@
+-- Add users.auth_version, which lets workers trust a token's role claim until the role changes.
+-- Idempotent and safe to re-run:
+--   docker-compose exec postgres psql -U fra_user -d fra_db -f /migrations/004_user_auth_version.sql
+
+BEGIN;
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS auth_version INTEGER NOT NULL DEFAULT 0;
+
+CREATE OR REPLACE FUNCTION bump_user_auth_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.role IS DISTINCT FROM OLD.role AND NEW.auth_version = OLD.auth_version THEN
+        NEW.auth_version = OLD.auth_version + 1;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS users_auth_version ON users;
+CREATE TRIGGER users_auth_version BEFORE UPDATE OF role ON users
+    FOR EACH ROW EXECUTE FUNCTION bump_user_auth_version();
+
+COMMIT;
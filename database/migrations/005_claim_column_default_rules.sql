@@ -0,0 +1,25 @@
+-- Replace the built-in DSS rules seeded by earlier releases with versions that only use
+-- claims table columns. The old ones conditioned on land_type, income_level and
+-- community_type, which claims do not store, so model training and filtered batch
+-- evaluation could not use any of them. Only rules still identical to the old defaults
+-- are replaced; edited ones are left alone. Idempotent and safe to re-run:
+--   docker-compose exec postgres psql -U fra_user -d fra_db -f /migrations/005_claim_column_default_rules.sql
+
+BEGIN;
+
+UPDATE decision_rules SET rule = '{"id": "rule_001", "name": "Individual Forest Rights", "description": "Match individual forest rights claimants to forest development schemes", "conditions": {"claim_type": "individual", "land_area": {"min": 0.1, "max": 4.0}}, "schemes": ["forest_development", "livelihood_support"], "priority": "high", "weight": 0.9}'::jsonb
+WHERE rule_id = 'rule_001' AND rule = '{"id": "rule_001", "name": "Individual Forest Rights", "description": "Match individual forest rights claimants to forest development schemes", "conditions": {"claim_type": "individual", "land_area": {"min": 0.1, "max": 4.0}, "land_type": "forest"}, "schemes": ["forest_development", "livelihood_support"], "priority": "high", "weight": 0.9}'::jsonb;
+
+UPDATE decision_rules SET rule = '{"id": "rule_002", "name": "Community Forest Rights", "description": "Match community forest rights claimants to community development schemes", "conditions": {"claim_type": "community", "land_area": {"min": 1.0, "max": 1000.0}}, "schemes": ["community_forest_management", "ecotourism", "forest_protection"], "priority": "high", "weight": 0.95}'::jsonb
+WHERE rule_id = 'rule_002' AND rule = '{"id": "rule_002", "name": "Community Forest Rights", "description": "Match community forest rights claimants to community development schemes", "conditions": {"claim_type": "community", "land_area": {"min": 1.0, "max": 1000.0}, "land_type": "forest"}, "schemes": ["community_forest_management", "ecotourism", "forest_protection"], "priority": "high", "weight": 0.95}'::jsonb;
+
+UPDATE decision_rules SET rule = '{"id": "rule_003", "name": "Recognised Individual Holdings", "description": "Match approved individual claims on cultivable holdings to agricultural schemes", "conditions": {"claim_type": "individual", "status": "approved", "land_area": {"min": 0.5, "max": 10.0}}, "schemes": ["agricultural_support", "irrigation", "crop_insurance"], "priority": "medium", "weight": 0.8}'::jsonb
+WHERE rule_id = 'rule_003' AND rule = '{"id": "rule_003", "name": "Agricultural Land Rights", "description": "Match agricultural land claimants to agricultural schemes", "conditions": {"land_type": "agricultural", "land_area": {"min": 0.5, "max": 10.0}}, "schemes": ["agricultural_support", "irrigation", "crop_insurance"], "priority": "medium", "weight": 0.8}'::jsonb;
+
+UPDATE decision_rules SET rule = '{"id": "rule_004", "name": "Small Landholders", "description": "Match small individual landholders to micro-finance and skill development schemes", "conditions": {"claim_type": "individual", "land_area": {"max": 1.0}}, "schemes": ["micro_finance", "skill_development", "women_empowerment"], "priority": "medium", "weight": 0.7}'::jsonb
+WHERE rule_id = 'rule_004' AND rule = '{"id": "rule_004", "name": "Small Landholders", "description": "Match small landholders to micro-finance and skill development schemes", "conditions": {"land_area": {"max": 1.0}, "income_level": "low"}, "schemes": ["micro_finance", "skill_development", "women_empowerment"], "priority": "medium", "weight": 0.7}'::jsonb;
+
+UPDATE decision_rules SET rule = '{"id": "rule_005", "name": "Recognised Community Rights", "description": "Match communities with approved rights to tribal development schemes", "conditions": {"claim_type": "community", "status": "approved"}, "schemes": ["tribal_development", "cultural_preservation", "education_support"], "priority": "high", "weight": 0.9}'::jsonb
+WHERE rule_id = 'rule_005' AND rule = '{"id": "rule_005", "name": "Tribal Communities", "description": "Match tribal communities to tribal development schemes", "conditions": {"community_type": "tribal", "claim_type": "community"}, "schemes": ["tribal_development", "cultural_preservation", "education_support"], "priority": "high", "weight": 0.9}'::jsonb;
+
+COMMIT;